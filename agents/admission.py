@@ -0,0 +1,176 @@
+"""Admission control for chat messages: bounded queue, per-client limit, cancellation"""
+
+import math
+import os
+import threading
+import time
+
+from .single_flight import Cancelled
+
+# Seconds between checks for cancellation while a request waits for a slot
+SLOT_POLL_SECONDS = 0.25
+
+# Assumed time to answer a message until the first ones have completed
+INITIAL_SERVICE_SECONDS = 5.0
+
+
+class Overloaded(Exception):
+    """Raised when a message is shed instead of queued"""
+
+    def __init__(self, retry_after: float, reason: str = 'busy', message: str = None):
+        self.retry_after = retry_after
+        self.reason = reason
+        super().__init__(message or f"Server busy ({reason}), retry in {retry_after:.0f}s")
+
+    @property
+    def user_message(self) -> str:
+        """Reply sent to the client in place of an answer"""
+        wait_seconds = max(1, math.ceil(self.retry_after))
+        if self.reason == 'client':
+            return (f"I'm still working on your previous questions. "
+                    f"Please try again in about {wait_seconds} seconds.")
+        return f"I'm handling a lot of requests right now. Please try again in about {wait_seconds} seconds."
+
+
+class RequestCancelled(Cancelled):
+    """Raised inside a request whose client has disconnected"""
+
+
+class Ticket:
+    """One admitted message; cancelled when its client disconnects"""
+
+    def __init__(self, sid: str, request_id: str):
+        self.sid = sid
+        self.request_id = request_id
+        self.cancelled = threading.Event()
+
+    def check(self):
+        """Raise RequestCancelled if the client has gone"""
+        if self.cancelled.is_set():
+            raise RequestCancelled(f"request {self.request_id} cancelled, client {self.sid} disconnected")
+
+
+class AdmissionController:
+    """Admit, queue or shed messages, and run admitted ones in a bounded number of slots.
+
+    At most max_active messages run at once and at most max_queued wait
+    behind them; each client may have per_client messages admitted (running
+    or waiting). Anything beyond that is rejected immediately with an
+    Overloaded carrying an estimate of when to retry, so a burst degrades to
+    fast "busy" replies instead of slow answers for everyone.
+    """
+
+    def __init__(self, max_active: int = 32, max_queued: int = 64, per_client: int = 2):
+        self.max_active = max_active
+        self.max_queued = max_queued
+        self.per_client = per_client
+        self.slots = threading.BoundedSemaphore(max_active)
+        self.lock = threading.Lock()
+        self.tickets = {}  # sid -> set of admitted Tickets
+        self.queued = 0
+        self.active = 0
+        # Moving average of how long a running message holds its slot
+        self.service_seconds = INITIAL_SERVICE_SECONDS
+
+        self.admitted = 0
+        self.shed_busy = 0
+        self.shed_client = 0
+        self.cancelled = 0
+        self.completed = 0
+
+    def admit(self, sid: str, request_id: str) -> Ticket:
+        """Admit a message or raise Overloaded"""
+        with self.lock:
+            if len(self.tickets.get(sid, ())) >= self.per_client:
+                self.shed_client += 1
+                raise Overloaded(self.service_seconds, 'client')
+            if self.queued >= self.max_queued:
+                self.shed_busy += 1
+                raise Overloaded(self.retry_after(), 'busy')
+
+            ticket = Ticket(sid, request_id)
+            self.tickets.setdefault(sid, set()).add(ticket)
+            self.queued += 1
+            self.admitted += 1
+            return ticket
+
+    def run(self, ticket: Ticket, fn, *args, **kwargs):
+        """Wait for a slot and run fn(*args, **kwargs) for an admitted ticket.
+
+        Returns fn's result, or None if the ticket was cancelled before or
+        while it ran.
+        """
+        acquired = False
+        try:
+            while not ticket.cancelled.is_set():
+                if self.slots.acquire(timeout=SLOT_POLL_SECONDS):
+                    acquired = True
+                    break
+
+            with self.lock:
+                self.queued -= 1
+                if acquired:
+                    self.active += 1
+            if not acquired:
+                return None
+
+            started = time.monotonic()
+            try:
+                ticket.check()
+                return fn(*args, **kwargs)
+            except RequestCancelled:
+                return None
+            finally:
+                elapsed = time.monotonic() - started
+                with self.lock:
+                    self.active -= 1
+                    self.completed += 1
+                    self.service_seconds = 0.8 * self.service_seconds + 0.2 * elapsed
+                self.slots.release()
+        finally:
+            self.forget(ticket)
+
+    def forget(self, ticket: Ticket):
+        with self.lock:
+            tickets = self.tickets.get(ticket.sid)
+            if tickets is not None:
+                tickets.discard(ticket)
+                if not tickets:
+                    del self.tickets[ticket.sid]
+
+    def cancel(self, sid: str) -> int:
+        """Cancel every admitted message of a client (on disconnect); returns how many"""
+        with self.lock:
+            tickets = list(self.tickets.get(sid, ()))
+            self.cancelled += len(tickets)
+        for ticket in tickets:
+            ticket.cancelled.set()
+        return len(tickets)
+
+    def retry_after(self) -> float:
+        """Seconds until the current queue should have drained (lock held)"""
+        return max(1.0, self.service_seconds * (self.queued + self.active) / self.max_active)
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                'active': self.active,
+                'queued': self.queued,
+                'max_active': self.max_active,
+                'max_queued': self.max_queued,
+                'clients': len(self.tickets),
+                'admitted': self.admitted,
+                'shed_busy': self.shed_busy,
+                'shed_client': self.shed_client,
+                'cancelled': self.cancelled,
+                'completed': self.completed,
+                'service_seconds': round(self.service_seconds, 3)
+            }
+
+
+# Chat messages handled by this process
+admission = AdmissionController(
+    max_active=int(os.getenv('MAX_CONCURRENT_REQUESTS', 32)),
+    max_queued=int(os.getenv('MAX_QUEUED_REQUESTS', 64)),
+    per_client=int(os.getenv('MAX_REQUESTS_PER_CLIENT', 2))
+)
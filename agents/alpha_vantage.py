@@ -0,0 +1,63 @@
+"""Single entry point for Alpha Vantage requests made by the agents"""
+
+import os
+from .http_clients import get_http_session, http_timeout
+from .rate_limiter import INTERACTIVE, RateLimitExceeded, alpha_vantage_limiter
+from .single_flight import SingleFlight
+
+ALPHA_VANTAGE_URL = "https://www.alphavantage.co/query"
+
+# Longest an interactive request waits for quota before giving up
+ALPHA_VANTAGE_MAX_WAIT = float(os.getenv('ALPHA_VANTAGE_MAX_WAIT', 20))
+
+# Identical requests already in flight are shared instead of re-sent
+alpha_vantage_in_flight = SingleFlight()
+
+
+def query_alpha_vantage(params: dict, priority: int = INTERACTIVE, max_wait: float = None) -> dict:
+    """Call the Alpha Vantage query endpoint and return the decoded JSON.
+
+    Concurrent calls with the same parameters (function, symbol, output
+    size, time window...) wait on a single upstream request. Every upstream
+    request takes a token from the shared rate limiter first. Raises
+    RateLimitExceeded when quota is not available within max_wait or when
+    Alpha Vantage answers with a throttling notice.
+    """
+    if max_wait is None and priority == INTERACTIVE:
+        max_wait = ALPHA_VANTAGE_MAX_WAIT
+
+    key = tuple(sorted((name, str(value)) for name, value in params.items() if name != 'apikey'))
+    data, shared = alpha_vantage_in_flight.do(key, fetch_alpha_vantage, params, priority, max_wait)
+    if shared:
+        print(f"DEBUG: Shared in-flight Alpha Vantage response for {dict(key)}")
+    return data
+
+
+def fetch_alpha_vantage(params: dict, priority: int, max_wait: float) -> dict:
+    """Send one rate-limited request to Alpha Vantage"""
+    waited = alpha_vantage_limiter.acquire(priority, max_wait)
+    if waited > 0.5:
+        print(f"DEBUG: Waited {waited:.1f}s for Alpha Vantage quota ({params.get('function')})")
+
+    response = get_http_session().get(ALPHA_VANTAGE_URL, params=params, timeout=http_timeout())
+    data = response.json()
+
+    notice = throttle_notice(data)
+    if notice:
+        daily = 'per day' in notice.lower()
+        alpha_vantage_limiter.penalize(daily=daily)
+        retry_after = alpha_vantage_limiter.seconds_until_reset() if daily else 60
+        raise RateLimitExceeded(retry_after, f"Alpha Vantage throttled the request: {notice}")
+
+    return data
+
+
+def throttle_notice(data: dict) -> str:
+    """Return Alpha Vantage's throttling message if the response is one, else ''"""
+    for key in ('Note', 'Information'):
+        message = data.get(key)
+        if isinstance(message, str) and any(
+            phrase in message.lower() for phrase in ('rate limit', 'call frequency', 'requests per')
+        ):
+            return message
+    return ''
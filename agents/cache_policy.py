@@ -0,0 +1,140 @@
+"""Freshness rules for cached market data.
+
+Each dataset gets a time-to-live that depends on the market phase: quotes
+and news change quickly around the session and hardly at all overnight or
+on closed days. Past its TTL an entry is STALE for a while longer; callers
+answer from it immediately and hand the refresh to the background
+refresher, which runs it at background rate-limit priority. Only EXPIRED
+(or missing) entries make the user wait for a fetch.
+"""
+
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from .market_calendar import CLOSED, POST_MARKET, PRE_MARKET, SESSION, nyse_calendar
+
+FRESH = 'fresh'
+STALE = 'stale'
+EXPIRED = 'expired'
+
+MINUTE = 60
+HOUR = 60 * MINUTE
+DAY = 24 * HOUR
+
+
+class CachePolicy:
+    """Phase-dependent TTL plus a stale-while-revalidate window for one dataset"""
+
+    def __init__(self, name: str, ttls: Dict[str, float], max_stale: float):
+        self.name = name
+        self.ttls = ttls
+        self.max_stale = max_stale
+
+    def ttl(self, now: Optional[float] = None) -> float:
+        """TTL in seconds for entries checked during the current market phase"""
+        moment = None if now is None else datetime.fromtimestamp(now, timezone.utc)
+        return self.ttls[nyse_calendar.phase(moment)]
+
+    def freshness(self, fetched_at: Optional[float], now: Optional[float] = None) -> str:
+        """FRESH, STALE or EXPIRED for an entry last fetched at fetched_at (epoch seconds)"""
+        if not fetched_at:
+            return EXPIRED
+
+        now = time.time() if now is None else now
+        age = now - fetched_at
+        ttl = self.ttl(now)
+        if age <= ttl:
+            return FRESH
+        if age <= ttl + self.max_stale:
+            return STALE
+        return EXPIRED
+
+
+def scaled(seconds: float) -> float:
+    """Apply CACHE_TTL_SCALE (e.g. 0.5 to refresh twice as often)"""
+    return seconds * float(os.getenv('CACHE_TTL_SCALE', 1))
+
+
+# Daily bars only change once a session closes, so recheck often right after
+# the close (until Alpha Vantage publishes the bar) and rarely otherwise
+QUOTE_POLICY = CachePolicy('quote', {
+    PRE_MARKET: scaled(30 * MINUTE),
+    SESSION: scaled(30 * MINUTE),
+    POST_MARKET: scaled(10 * MINUTE),
+    CLOSED: scaled(6 * HOUR),
+}, max_stale=scaled(3 * DAY))
+
+NEWS_POLICY = CachePolicy('news', {
+    PRE_MARKET: scaled(30 * MINUTE),
+    SESSION: scaled(15 * MINUTE),
+    POST_MARKET: scaled(30 * MINUTE),
+    CLOSED: scaled(2 * HOUR),
+}, max_stale=scaled(1 * DAY))
+
+
+class BackgroundRefresher:
+    """Runs cache refreshes off the request path, at most one per key at a time.
+
+    Workers are daemon threads: a refresh can queue for quota for minutes and
+    must not keep the process alive once everything else is done. With no
+    workers (CACHE_REFRESH_WORKERS=0, as in tests) refreshes are dropped.
+    """
+
+    def __init__(self, workers: int):
+        self.tasks = queue.Queue()
+        self.workers = [threading.Thread(target=self.work, name=f'cache-refresh_{i}', daemon=True)
+                        for i in range(workers)]
+        for worker in self.workers:
+            worker.start()
+        self.pending = set()
+        self.lock = threading.Lock()
+
+        self.submitted = 0
+        self.skipped = 0
+        self.failed = 0
+
+    def submit(self, key, fn, *args, **kwargs) -> bool:
+        """Schedule fn(*args, **kwargs) unless a refresh for key is already queued"""
+        with self.lock:
+            if key in self.pending or not self.workers:
+                self.skipped += 1
+                return False
+            self.pending.add(key)
+            self.submitted += 1
+
+        def run():
+            try:
+                fn(*args, **kwargs)
+            except Exception as e:
+                with self.lock:
+                    self.failed += 1
+                print(f"Background refresh {key} failed: {e}")
+            finally:
+                with self.lock:
+                    self.pending.discard(key)
+
+        self.tasks.put(run)
+        return True
+
+    def work(self):
+        while True:
+            self.tasks.get()()
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                'pending': len(self.pending),
+                'submitted': self.submitted,
+                'skipped': self.skipped,
+                'failed': self.failed
+            }
+
+
+background_refresher = BackgroundRefresher(int(os.getenv('CACHE_REFRESH_WORKERS', 2)))
+
+# Longest a background refresh queues for Alpha Vantage quota before giving up
+BACKGROUND_MAX_WAIT = float(os.getenv('CACHE_REFRESH_MAX_WAIT', 120))
@@ -1,10 +1,73 @@
+import os
 import re
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
 from typing import Optional
 from .base_agent import BaseAgent
+from .parsed_message import ParsedMessage
+from .session_store import SessionState
+from .single_flight import Cancelled
+from .ticker_index import extract_tickers
 from .stock_quote_agent import StockQuoteAgent
 from .stock_news_agent import StockNewsAgent
 from .trading_advice_agent import TradingAdviceAgent
 
+# Quote and news context for advice requests is fetched concurrently. Under
+# the eventlet worker the pool threads are green threads, so a pending
+# Alpha Vantage call yields instead of blocking the hub.
+CONTEXT_FETCH_WORKERS = int(os.getenv('CONTEXT_FETCH_WORKERS', 8))
+QUOTE_CONTEXT_TIMEOUT = float(os.getenv('QUOTE_CONTEXT_TIMEOUT', 8))
+NEWS_CONTEXT_TIMEOUT = float(os.getenv('NEWS_CONTEXT_TIMEOUT', 5))
+
+_context_executor = ThreadPoolExecutor(max_workers=CONTEXT_FETCH_WORKERS, thread_name_prefix='context-fetch')
+
+# Personality change requests, checked in order
+PERSONALITY_CHANGE_PATTERNS = [re.compile(pattern) for pattern in [
+    r'change personality to (.+)',
+    r'switch to (.+)',
+    r'become (.+)',
+    r'act like (.+)',
+    r'be (.+)'
+]]
+
+AVAILABLE_PERSONALITIES = [
+    "Warren Buffett", "Peter Lynch", "Benjamin Graham", "George Soros",
+    "Cathie Wood", "Charlie Munger", "Michael Burry", "Phil Fisher",
+    "Rakesh Jhunjhunwala", "Stanley Druckenmiller", "Bill Ackman", "Aswath Damodaran"
+]
+
+# Stock quote keywords
+QUOTE_KEYWORDS = [
+    'price', 'quote', 'stock price', 'current price', 'trading at',
+    'what is', 'how much', 'cost', 'value', 'worth', 'ohlc',
+    'open', 'close', 'high', 'low', 'volume'
+]
+
+# Stock news keywords
+NEWS_KEYWORDS = [
+    'news', 'headlines', 'articles', 'stories', 'reports',
+    'latest', 'recent', 'updates', 'announcements', 'sentiment'
+]
+
+# Trading advice keywords
+ADVICE_KEYWORDS = [
+    'should i buy', 'should i sell', 'invest', 'investment',
+    'advice', 'recommend', 'opinion', 'analysis', 'outlook',
+    'buy', 'sell', 'hold', 'portfolio', 'strategy'
+]
+
+# Intents that reuse the session's last ticker when the message names none
+# ("and the news?" after a quote)
+FOLLOW_UP_INTENTS = ("stock_quote", "stock_news")
+
+# Date patterns which might indicate historical data requests
+DATE_PATTERN = re.compile('|'.join([
+    r'\d{4}-\d{2}-\d{2}',  # YYYY-MM-DD
+    r'\d{2}/\d{2}/\d{4}',  # MM/DD/YYYY
+    r'on \w+',  # "on Monday", "on January"
+    r'yesterday', r'last week', r'last month'
+]))
+
 class CoordinatorAgent(BaseAgent):
     """Main coordinator agent that delegates requests to specialized agents"""
     
@@ -16,146 +79,130 @@ class CoordinatorAgent(BaseAgent):
         self.stock_news_agent = StockNewsAgent()
         self.trading_advice_agent = TradingAdviceAgent()
         
-        # Current personality
-        self.current_personality = "Warren Buffett"
+        # Session used when callers don't pass one (scripts, tests); the web
+        # app passes one SessionState per connection
+        self.default_session = SessionState()
+    
+    @property
+    def current_personality(self) -> str:
+        return self.default_session.personality
     
-    def process_request(self, message: str, context: Optional[dict] = None) -> dict:
-        """Process user message and delegate to appropriate agent"""
+    def process_request(self, message: str, context: Optional[dict] = None, on_chunk=None,
+                        session: Optional[SessionState] = None, on_partial=None) -> dict:
+        """Process user message and delegate to appropriate agent.
+        
+        on_chunk, if given, receives trading advice text as it is streamed.
+        on_partial, if given, is called as on_partial(kind, data) with each
+        card ('stock_data', 'news_data') of an advice answer as soon as it
+        is ready, before the advice itself.
+        session carries the sender's personality and recent tickers.
+        """
+        session = session or self.default_session
         try:
-            # Check if this is a personality change request
-            if self.is_personality_change_request(message):
-                return self.handle_personality_change(message)
+            parsed = self.parse_message(message, session)
             
-            # Determine the intent of the message
-            intent = self.classify_intent(message)
+            # Check if this is a personality change request
+            if parsed.is_personality_change:
+                return self.handle_personality_change(parsed, session)
             
             # Route to appropriate agent based on intent
-            if intent == "stock_quote":
-                return self.handle_stock_quote_request(message)
-            elif intent == "stock_news":
-                return self.handle_stock_news_request(message)
-            elif intent == "trading_advice":
-                return self.handle_trading_advice_request(message)
+            if parsed.intent == "stock_quote":
+                response = self.handle_stock_quote_request(parsed, session)
+            elif parsed.intent == "stock_news":
+                response = self.handle_stock_news_request(parsed, session)
             else:
                 # Default to trading advice for general investment questions
-                return self.handle_trading_advice_request(message)
-                
+                response = self.handle_trading_advice_request(parsed, on_chunk, session, on_partial)
+            
+            session.remember(parsed.tickers)
+            return response
+        
+        except Cancelled:
+            raise
         except Exception as e:
             print(f"Error in coordinator: {e}")
             return {
                 'message': "I apologize, but I encountered an error processing your request. Please try again.",
-                'personality': self.current_personality,
+                'personality': session.personality,
                 'data': None
             }
     
-    def process_message(self, message: str) -> dict:
+    def process_message(self, message: str, on_chunk=None, session: Optional[SessionState] = None,
+                        on_partial=None) -> dict:
         """Wrapper method for backward compatibility"""
-        return self.process_request(message)
+        return self.process_request(message, on_chunk=on_chunk, session=session, on_partial=on_partial)
+    
+    def parse_message(self, message: str, session: Optional[SessionState] = None) -> ParsedMessage:
+        """Extract intent, tickers and dates from the message in one pass"""
+        personality = self.extract_personality_target(message)
+        if personality is not None:
+            return ParsedMessage(text=message, intent="personality_change", personality=personality)
+        
+        intent = self.classify_intent(message)
+        tickers = extract_tickers(message)
+        if not tickers and session and session.last_ticker and intent in FOLLOW_UP_INTENTS:
+            tickers = [session.last_ticker]
+        ticker = tickers[0] if tickers else ""
+        parsed = ParsedMessage(text=message, intent=intent, ticker=ticker, tickers=tickers)
+        
+        # Only parse the dates the target agent will actually use
+        if ticker and intent == "stock_quote":
+            parsed.date = self.stock_quote_agent.extract_date_from_text(message)
+        elif ticker and intent == "stock_news":
+            parsed.date_range = self.stock_news_agent.extract_date_range_from_text(message)
+            parsed.search_terms = self.stock_news_agent.extract_search_terms(message)
+        
+        return parsed
+    
+    def extract_personality_target(self, message: str) -> Optional[str]:
+        """Return the requested personality name, or None if this is not a personality change"""
+        message_lower = message.lower()
+        for pattern in PERSONALITY_CHANGE_PATTERNS:
+            match = pattern.search(message_lower)
+            if match:
+                # Clean up the personality name
+                return match.group(1).strip().replace('personality', '').strip()
+        return None
     
     def is_personality_change_request(self, message: str) -> bool:
         """Check if the message is requesting a personality change"""
-        change_patterns = [
-            r'change personality to (.+)',
-            r'switch to (.+)',
-            r'become (.+)',
-            r'act like (.+)',
-            r'be (.+)'
-        ]
-        
-        for pattern in change_patterns:
-            if re.search(pattern, message.lower()):
-                return True
-        return False
+        return self.extract_personality_target(message) is not None
     
-    def handle_personality_change(self, message: str) -> dict:
+    def handle_personality_change(self, parsed: ParsedMessage, session: SessionState) -> dict:
         """Handle personality change request"""
-        # Extract personality name from message
-        change_patterns = [
-            r'change personality to (.+)',
-            r'switch to (.+)',
-            r'become (.+)',
-            r'act like (.+)',
-            r'be (.+)'
-        ]
+        personality = parsed.personality
         
-        for pattern in change_patterns:
-            match = re.search(pattern, message.lower())
-            if match:
-                personality = match.group(1).strip()
-                # Clean up the personality name
-                personality = personality.replace('personality', '').strip()
-                
-                # Try to match with available personalities
-                available_personalities = [
-                    "Warren Buffett", "Peter Lynch", "Benjamin Graham", "George Soros",
-                    "Cathie Wood", "Charlie Munger", "Michael Burry", "Phil Fisher",
-                    "Rakesh Jhunjhunwala", "Stanley Druckenmiller", "Bill Ackman", "Aswath Damodaran"
-                ]
-                
-                matched_personality = None
-                for avail_personality in available_personalities:
-                    if personality.lower() in avail_personality.lower():
-                        matched_personality = avail_personality
-                        break
-                
-                if matched_personality:
-                    self.set_personality(matched_personality)
-                    return {
-                        'message': f"I've changed my personality to {matched_personality}. How can I help you with your investments?",
-                        'personality': matched_personality,
-                        'data': None
-                    }
-                else:
-                    return {
-                        'message': f"I'm sorry, I don't recognize the personality '{personality}'. Available personalities include Warren Buffett, Peter Lynch, Benjamin Graham, and others.",
-                        'personality': self.current_personality,
-                        'data': None
-                    }
-        
-        return {
-            'message': "I didn't understand the personality change request. Please try 'Change personality to [name]'.",
-            'personality': self.current_personality,
-            'data': None
-        }
+        # Try to match with available personalities
+        matched_personality = None
+        for avail_personality in AVAILABLE_PERSONALITIES:
+            if personality.lower() in avail_personality.lower():
+                matched_personality = avail_personality
+                break
+        
+        if matched_personality:
+            self.set_personality(matched_personality, session)
+            return {
+                'message': f"I've changed my personality to {matched_personality}. How can I help you with your investments?",
+                'personality': matched_personality,
+                'data': None
+            }
+        else:
+            return {
+                'message': f"I'm sorry, I don't recognize the personality '{personality}'. Available personalities include Warren Buffett, Peter Lynch, Benjamin Graham, and others.",
+                'personality': session.personality,
+                'data': None
+            }
     
     def classify_intent(self, message: str) -> str:
         """Classify the intent of the user message"""
         message_lower = message.lower()
         
-        # Stock quote keywords
-        quote_keywords = [
-            'price', 'quote', 'stock price', 'current price', 'trading at',
-            'what is', 'how much', 'cost', 'value', 'worth', 'ohlc',
-            'open', 'close', 'high', 'low', 'volume'
-        ]
-        
-        # Stock news keywords
-        news_keywords = [
-            'news', 'headlines', 'articles', 'stories', 'reports',
-            'latest', 'recent', 'updates', 'announcements', 'sentiment'
-        ]
-        
-        # Trading advice keywords
-        advice_keywords = [
-            'should i buy', 'should i sell', 'invest', 'investment',
-            'advice', 'recommend', 'opinion', 'analysis', 'outlook',
-            'buy', 'sell', 'hold', 'portfolio', 'strategy'
-        ]
-        
-        # Check for date patterns which might indicate historical data requests
-        date_patterns = [
-            r'\d{4}-\d{2}-\d{2}',  # YYYY-MM-DD
-            r'\d{2}/\d{2}/\d{4}',  # MM/DD/YYYY
-            r'on \w+',  # "on Monday", "on January"
-            r'yesterday', r'last week', r'last month'
-        ]
-        
-        has_date = any(re.search(pattern, message_lower) for pattern in date_patterns)
+        has_date = DATE_PATTERN.search(message_lower) is not None
         
         # Score each intent
-        quote_score = sum(1 for keyword in quote_keywords if keyword in message_lower)
-        news_score = sum(1 for keyword in news_keywords if keyword in message_lower)
-        advice_score = sum(1 for keyword in advice_keywords if keyword in message_lower)
+        quote_score = sum(1 for keyword in QUOTE_KEYWORDS if keyword in message_lower)
+        news_score = sum(1 for keyword in NEWS_KEYWORDS if keyword in message_lower)
+        advice_score = sum(1 for keyword in ADVICE_KEYWORDS if keyword in message_lower)
         
         # If there's a date and quote keywords, it's likely a historical quote request
         if has_date and quote_score > 0:
@@ -169,51 +216,96 @@ class CoordinatorAgent(BaseAgent):
         else:
             return "trading_advice"
     
-    def handle_stock_quote_request(self, message: str) -> dict:
+    def handle_stock_quote_request(self, parsed: ParsedMessage, session: SessionState) -> dict:
         """Handle stock quote request"""
-        response = self.stock_quote_agent.process_request(message)
-        response['personality'] = self.current_personality
+        response = self.stock_quote_agent.process_parsed(parsed)
+        response['personality'] = session.personality
         return response
     
-    def handle_stock_news_request(self, message: str) -> dict:
+    def handle_stock_news_request(self, parsed: ParsedMessage, session: SessionState) -> dict:
         """Handle stock news request"""
-        response = self.stock_news_agent.process_request(message)
-        response['personality'] = self.current_personality
+        response = self.stock_news_agent.process_parsed(parsed)
+        response['personality'] = session.personality
         return response
     
-    def handle_trading_advice_request(self, message: str) -> dict:
+    def handle_trading_advice_request(self, parsed: ParsedMessage, on_chunk=None,
+                                      session: Optional[SessionState] = None, on_partial=None) -> dict:
         """Handle trading advice request"""
-        # Get additional context from other agents if ticker is mentioned
-        context = {}
+        session = session or self.default_session
         
-        # Check if there's a ticker in the message
-        ticker = self.extract_ticker_from_text(message)
-        if ticker:
-            # Try to get recent stock data for context
-            try:
-                stock_response = self.stock_quote_agent.process_request(f"{ticker} current price")
-                if stock_response.get('data') and stock_response['data'].get('stock_data'):
-                    context['stock_data'] = stock_response['data']['stock_data']
-            except:
-                pass
-            
-            # Try to get recent news for context
-            try:
-                news_response = self.stock_news_agent.process_request(f"{ticker} news")
-                if news_response.get('data') and news_response['data'].get('news_data'):
-                    context['news_data'] = news_response['data']['news_data'][:500]  # Truncate for context
-            except:
-                pass
+        # Get additional context from other agents if ticker is mentioned
+        context = self.gather_advice_context(parsed, on_partial) if parsed.ticker else {}
         
         # Get trading advice with context
-        response = self.trading_advice_agent.process_request(message, context)
+        response = self.trading_advice_agent.process_request(parsed.text, context, on_chunk=on_chunk,
+                                                             personality=session.personality)
         return response
     
-    def set_personality(self, personality: str):
-        """Set the current personality for all agents"""
-        self.current_personality = personality
-        self.trading_advice_agent.set_personality(personality)
+    def gather_advice_context(self, parsed: ParsedMessage, on_partial=None) -> dict:
+        """Fetch quote and news context concurrently, each with its own timeout.
+        
+        Each fetch hands its card to on_partial the moment it has one, so the
+        fastest source shows first; a card that arrives after its timeout is
+        still delivered while the advice (which goes ahead without it) is
+        being written, and dropped once the answer has been sent.
+        """
+        # Context lookups always use the latest data for the ticker
+        context_request = parsed.for_ticker(parsed.ticker)
+        started = time.monotonic()
+        
+        fetches = [
+            ('stock_data', QUOTE_CONTEXT_TIMEOUT,
+             _context_executor.submit(self.fetch_quote_context, context_request, on_partial)),
+            ('news_sentiment', NEWS_CONTEXT_TIMEOUT,
+             _context_executor.submit(self.fetch_news_context, context_request, on_partial)),
+        ]
+        
+        context = {}
+        for key, timeout, future in fetches:
+            remaining = max(0, timeout - (time.monotonic() - started))
+            try:
+                value = future.result(timeout=remaining)
+                if value:
+                    context[key] = value
+            except TimeoutError:
+                # A slow source degrades to no context rather than stalling the answer
+                print(f"{key} context for {parsed.ticker} timed out after {timeout}s, continuing without it")
+            except Cancelled:
+                raise
+            except Exception as e:
+                print(f"Error fetching {key} context for {parsed.ticker}: {e}")
+        
+        return context
+    
+    def fetch_quote_context(self, parsed: ParsedMessage, on_partial=None) -> Optional[str]:
+        """Get recent stock data for advice context"""
+        stock_response = self.stock_quote_agent.process_parsed(parsed)
+        if stock_response.get('data') and stock_response['data'].get('stock_data'):
+            stock_data = stock_response['data']['stock_data']
+            if on_partial:
+                on_partial('stock_data', stock_data)
+            return stock_data
+        return None
+    
+    def fetch_news_context(self, parsed: ParsedMessage, on_partial=None) -> Optional[str]:
+        """Get a numeric news sentiment summary for advice context.
+        
+        With on_partial the recent headlines are fetched first and sent as the
+        news card; the summary then reads the freshly synced rollup.
+        """
+        if on_partial:
+            news_response = self.stock_news_agent.process_parsed(parsed)
+            if news_response.get('data') and news_response['data'].get('news_data'):
+                on_partial('news_data', news_response['data']['news_data'])
+        return self.stock_news_agent.sentiment_summary(parsed.ticker)
+    
+    def set_personality(self, personality: str, session: Optional[SessionState] = None) -> bool:
+        """Set the personality of one session (default: the coordinator's own); False if unknown"""
+        if personality not in self.trading_advice_agent.personality_prompts:
+            return False
+        (session or self.default_session).personality = personality
+        return True
     
-    def get_current_personality(self) -> str:
+    def get_current_personality(self, session: Optional[SessionState] = None) -> str:
         """Get the current personality"""
-        return self.current_personality 
\ No newline at end of file
+        return (session or self.default_session).personality 
\ No newline at end of file
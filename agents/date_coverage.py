@@ -0,0 +1,82 @@
+"""Sets of date intervals a cache is known to be complete for"""
+
+from datetime import date, timedelta
+from typing import List, Optional, Tuple
+
+import pandas as pd
+
+# A fetch of the entire available history also settles every earlier date
+EARLIEST_DATE = date(1900, 1, 1)
+
+
+def as_date(value) -> date:
+    """Accept date, datetime, numpy datetime64 or 'YYYY-MM-DD' strings"""
+    if isinstance(value, date) and not hasattr(value, 'hour'):
+        return value
+    return pd.Timestamp(value).date()
+
+
+class DateCoverage:
+    """Sorted, non-overlapping inclusive date intervals.
+
+    A date inside an interval has been fetched from the source: if the
+    cache holds no row for it, the source has none either (weekend,
+    holiday, before listing...), so there is no point asking again.
+    """
+
+    def __init__(self, intervals: Optional[List[Tuple[date, date]]] = None):
+        self.intervals = []
+        for start, end in intervals or []:
+            self.add(start, end)
+
+    @classmethod
+    def from_json(cls, data: Optional[list]) -> 'DateCoverage':
+        return cls([(as_date(start), as_date(end)) for start, end in data or []])
+
+    def to_json(self) -> list:
+        return [[start.isoformat(), end.isoformat()] for start, end in self.intervals]
+
+    def add(self, start, end):
+        """Mark [start, end] covered, merging with overlapping or adjacent intervals"""
+        start, end = as_date(start), as_date(end)
+        if end < start:
+            return
+
+        merged = []
+        for existing_start, existing_end in self.intervals:
+            if existing_end + timedelta(days=1) < start or end + timedelta(days=1) < existing_start:
+                merged.append((existing_start, existing_end))
+            else:
+                start = min(start, existing_start)
+                end = max(end, existing_end)
+        merged.append((start, end))
+        self.intervals = sorted(merged)
+
+    def covers(self, day) -> bool:
+        day = as_date(day)
+        return any(start <= day <= end for start, end in self.intervals)
+
+    def gaps(self, start, end) -> List[Tuple[date, date]]:
+        """Sub-intervals of [start, end] that are not covered"""
+        start, end = as_date(start), as_date(end)
+        missing = []
+        cursor = start
+        for covered_start, covered_end in self.intervals:
+            if covered_end < cursor:
+                continue
+            if covered_start > end:
+                break
+            if covered_start > cursor:
+                missing.append((cursor, covered_start - timedelta(days=1)))
+            cursor = max(cursor, covered_end + timedelta(days=1))
+            if cursor > end:
+                break
+        if cursor <= end:
+            missing.append((cursor, end))
+        return missing
+
+    def __bool__(self) -> bool:
+        return bool(self.intervals)
+
+    def __repr__(self) -> str:
+        return f"DateCoverage({self.to_json()})"
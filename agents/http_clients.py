@@ -0,0 +1,70 @@
+"""Process-wide HTTP clients shared by all agents.
+
+Agents used to build their own OpenAI client and call ``requests.get`` for
+every Alpha Vantage request, paying a TCP + TLS handshake each time. The
+clients here are created once per process and keep connections alive.
+"""
+
+import os
+import threading
+import httpx
+import openai
+import requests
+from requests.adapters import HTTPAdapter
+
+# Connection pool and timeout settings
+HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', 20))
+HTTP_KEEPALIVE_SECONDS = float(os.getenv('HTTP_KEEPALIVE_SECONDS', 60))
+HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', 5))
+HTTP_READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', 30))
+OPENAI_TIMEOUT = float(os.getenv('OPENAI_TIMEOUT', 60))
+OPENAI_MAX_RETRIES = int(os.getenv('OPENAI_MAX_RETRIES', 2))
+
+_lock = threading.Lock()
+_openai_client = None
+_http_session = None
+
+
+def get_openai_client() -> openai.OpenAI:
+    """Return the shared OpenAI client, creating it on first use"""
+    global _openai_client
+
+    if _openai_client is None:
+        with _lock:
+            if _openai_client is None:
+                http_client = httpx.Client(
+                    limits=httpx.Limits(
+                        max_connections=HTTP_POOL_SIZE,
+                        max_keepalive_connections=HTTP_POOL_SIZE,
+                        keepalive_expiry=HTTP_KEEPALIVE_SECONDS
+                    ),
+                    timeout=httpx.Timeout(OPENAI_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT)
+                )
+                _openai_client = openai.OpenAI(
+                    api_key=os.getenv('OPENAI_API_KEY'),
+                    http_client=http_client,
+                    max_retries=OPENAI_MAX_RETRIES
+                )
+
+    return _openai_client
+
+
+def get_http_session() -> requests.Session:
+    """Return the shared keep-alive session used for Alpha Vantage requests"""
+    global _http_session
+
+    if _http_session is None:
+        with _lock:
+            if _http_session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=HTTP_POOL_SIZE)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _http_session = session
+
+    return _http_session
+
+
+def http_timeout() -> tuple:
+    """(connect, read) timeout for requests made with the shared session"""
+    return (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
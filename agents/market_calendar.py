@@ -0,0 +1,207 @@
+"""Offline NYSE trading calendar.
+
+Holidays are generated from the exchange's published rules (plus the
+one-off closures since 1990), so no network access or extra package is
+needed. Trading days are kept in a sorted datetime64 array and every
+lookup is a binary search.
+"""
+
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Optional
+from zoneinfo import ZoneInfo
+
+import numpy as np
+from dateutil.easter import easter
+
+from .date_coverage import as_date
+
+MARKET_TIMEZONE = ZoneInfo('America/New_York')
+PRE_MARKET_OPEN = time(4, 0)
+MARKET_OPEN = time(9, 30)
+MARKET_CLOSE = time(16, 0)
+EARLY_CLOSE = time(13, 0)
+AFTER_HOURS_CLOSE = time(20, 0)
+
+# Market phases
+PRE_MARKET = 'pre_market'
+SESSION = 'session'
+POST_MARKET = 'post_market'
+CLOSED = 'closed'
+
+FIRST_YEAR = 1990
+
+# Closures outside the regular holiday rules
+SPECIAL_CLOSURES = {
+    date(1994, 4, 27): "National Day of Mourning for Richard Nixon",
+    date(2001, 9, 11): "September 11 closure",
+    date(2001, 9, 12): "September 11 closure",
+    date(2001, 9, 13): "September 11 closure",
+    date(2001, 9, 14): "September 11 closure",
+    date(2004, 6, 11): "National Day of Mourning for Ronald Reagan",
+    date(2007, 1, 2): "National Day of Mourning for Gerald Ford",
+    date(2012, 10, 29): "Hurricane Sandy closure",
+    date(2012, 10, 30): "Hurricane Sandy closure",
+    date(2018, 12, 5): "National Day of Mourning for George H. W. Bush",
+    date(2025, 1, 9): "National Day of Mourning for Jimmy Carter",
+}
+
+
+def nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """n-th given weekday (Mon=0) of a month; n=-1 for the last one"""
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = (date(year, month + 1, 1) if month < 12 else date(year + 1, 1, 1)) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def observed(day: date) -> date:
+    """Saturday holidays are observed on Friday, Sunday holidays on Monday"""
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+
+def nyse_holidays(year: int) -> Dict[date, str]:
+    """Full-day NYSE closures for one year"""
+    holidays = {}
+
+    # NYSE does not close on Friday Dec 31 when New Year's Day is a Saturday
+    new_year = date(year, 1, 1)
+    if new_year.weekday() != 5:
+        holidays[observed(new_year)] = "New Year's Day"
+    if year >= 1998:
+        holidays[nth_weekday(year, 1, 0, 3)] = "Martin Luther King Jr. Day"
+    holidays[nth_weekday(year, 2, 0, 3)] = "Washington's Birthday"
+    holidays[easter(year) - timedelta(days=2)] = "Good Friday"
+    holidays[nth_weekday(year, 5, 0, -1)] = "Memorial Day"
+    if year >= 2022:
+        holidays[observed(date(year, 6, 19))] = "Juneteenth"
+    holidays[observed(date(year, 7, 4))] = "Independence Day"
+    holidays[nth_weekday(year, 9, 0, 1)] = "Labor Day"
+    holidays[nth_weekday(year, 11, 3, 4)] = "Thanksgiving Day"
+    holidays[observed(date(year, 12, 25))] = "Christmas Day"
+
+    holidays.update({day: name for day, name in SPECIAL_CLOSURES.items() if day.year == year})
+    return holidays
+
+
+def nyse_early_closes(year: int) -> set:
+    """Sessions that close at 1 p.m. Eastern"""
+    candidates = {
+        date(year, 7, 3),
+        nth_weekday(year, 11, 3, 4) + timedelta(days=1),
+        date(year, 12, 24),
+    }
+    holidays = nyse_holidays(year)
+    return {day for day in candidates if day.weekday() < 5 and day not in holidays}
+
+
+class TradingCalendar:
+    """Sorted trading-day index with holiday names and session times"""
+
+    def __init__(self, first_year: int = FIRST_YEAR, last_year: Optional[int] = None):
+        last_year = last_year or date.today().year + 5
+        self.first_year = first_year
+        self.last_year = last_year
+
+        self.holidays = {}
+        self.early_closes = set()
+        for year in range(first_year, last_year + 1):
+            self.holidays.update(nyse_holidays(year))
+            self.early_closes |= nyse_early_closes(year)
+
+        weekdays = np.arange(
+            np.datetime64(date(first_year, 1, 1), 'D'),
+            np.datetime64(date(last_year + 1, 1, 1), 'D')
+        )
+        weekdays = weekdays[np.is_busday(weekdays)]
+        closed = np.array(sorted(self.holidays), dtype='datetime64[D]')
+        self.trading_days = weekdays[~np.isin(weekdays, closed)]
+
+    def position(self, day) -> int:
+        """Index of the first trading day on or after day"""
+        return int(np.searchsorted(self.trading_days, np.datetime64(as_date(day), 'D')))
+
+    def is_trading_day(self, day) -> bool:
+        target = np.datetime64(as_date(day), 'D')
+        position = int(np.searchsorted(self.trading_days, target))
+        return position < len(self.trading_days) and self.trading_days[position] == target
+
+    def holiday_name(self, day) -> Optional[str]:
+        """Name of the holiday or closure on day, if any"""
+        return self.holidays.get(as_date(day))
+
+    def previous_trading_day(self, day, inclusive: bool = True) -> Optional[date]:
+        """Latest trading day on or before day (strictly before if not inclusive)"""
+        target = np.datetime64(as_date(day), 'D')
+        side = 'right' if inclusive else 'left'
+        position = int(np.searchsorted(self.trading_days, target, side=side)) - 1
+        return self.trading_days[position].item() if position >= 0 else None
+
+    def next_trading_day(self, day, inclusive: bool = True) -> Optional[date]:
+        """Earliest trading day on or after day (strictly after if not inclusive)"""
+        target = np.datetime64(as_date(day), 'D')
+        side = 'left' if inclusive else 'right'
+        position = int(np.searchsorted(self.trading_days, target, side=side))
+        return self.trading_days[position].item() if position < len(self.trading_days) else None
+
+    def nearest_trading_day(self, day) -> Optional[date]:
+        """Closest trading day to day (the earlier one on ties)"""
+        day = as_date(day)
+        before = self.previous_trading_day(day)
+        after = self.next_trading_day(day)
+        if before is None or after is None:
+            return before or after
+        return before if (day - before) <= (after - day) else after
+
+    def trading_days_between(self, start, end) -> int:
+        """Number of trading days in [start, end)"""
+        return max(self.position(end) - self.position(start), 0)
+
+    def session_close(self, day) -> datetime:
+        """Closing time of the session on day, in market time"""
+        day = as_date(day)
+        close = EARLY_CLOSE if day in self.early_closes else MARKET_CLOSE
+        return datetime.combine(day, close, tzinfo=MARKET_TIMEZONE)
+
+    def session_open(self, day) -> datetime:
+        return datetime.combine(as_date(day), MARKET_OPEN, tzinfo=MARKET_TIMEZONE)
+
+    def phase(self, now: Optional[datetime] = None) -> str:
+        """PRE_MARKET, SESSION, POST_MARKET or CLOSED (overnight, weekends, holidays)"""
+        now = market_now(now)
+        today = now.date()
+        if not self.is_trading_day(today):
+            return CLOSED
+
+        clock = now.time()
+        if clock < PRE_MARKET_OPEN or clock >= AFTER_HOURS_CLOSE:
+            return CLOSED
+        if clock < MARKET_OPEN:
+            return PRE_MARKET
+        if now < self.session_close(today):
+            return SESSION
+        return POST_MARKET
+
+    def last_completed_session(self, now: Optional[datetime] = None) -> Optional[date]:
+        """Most recent trading day whose session has closed"""
+        now = market_now(now)
+        today = now.date()
+        if self.is_trading_day(today) and now >= self.session_close(today):
+            return today
+        return self.previous_trading_day(today, inclusive=False)
+
+
+def market_now(now: Optional[datetime] = None) -> datetime:
+    """Current (or given) time in the exchange's timezone; naive times are taken as local"""
+    now = now or datetime.now(MARKET_TIMEZONE)
+    if now.tzinfo is None:
+        now = now.astimezone()
+    return now.astimezone(MARKET_TIMEZONE)
+
+
+# Shared calendar; building it takes a few milliseconds
+nyse_calendar = TradingCalendar()
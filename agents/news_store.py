@@ -0,0 +1,358 @@
+"""SQLite store for news articles and their per-ticker sentiment.
+
+Each article is stored once, keyed by URL. ``article_tickers`` holds one
+row per mentioned ticker with that ticker's sentiment and relevance; it
+is indexed on (ticker, published_at), so a date-range query is an index
+seek. An FTS5 index over title and summary answers "news about AAPL
+mentioning tariffs" without scanning. Per-ticker bookkeeping (watermark,
+fetched ranges, last fetch time) lives in ``ticker_meta``, and
+``sentiment_daily`` keeps a per-ticker daily sentiment rollup that is
+recomputed for the touched days whenever articles are stored.
+
+The database runs in WAL mode so readers never block the writer; every
+thread gets its own connection. Import the old CSV caches with::
+
+    python -m agents.news_store migrate [--data-folder data]
+"""
+
+import argparse
+import glob
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+import pandas as pd
+
+from .sentiment_rollup import ROLLUP_COLUMNS, SUM_COLUMNS, daily_rollup, with_scores
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    url TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    summary TEXT,
+    source TEXT,
+    published_at TEXT NOT NULL,
+    overall_sentiment_score REAL,
+    overall_sentiment_label TEXT
+);
+
+CREATE TABLE IF NOT EXISTS article_tickers (
+    ticker TEXT NOT NULL,
+    url TEXT NOT NULL REFERENCES articles(url),
+    published_at TEXT NOT NULL,
+    sentiment_label TEXT,
+    sentiment_score REAL,
+    relevance REAL,
+    PRIMARY KEY (ticker, url)
+);
+
+CREATE INDEX IF NOT EXISTS article_tickers_by_date ON article_tickers(ticker, published_at);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+    title, summary, content='articles', content_rowid='rowid'
+);
+
+CREATE TRIGGER IF NOT EXISTS articles_fts_insert AFTER INSERT ON articles BEGIN
+    INSERT INTO articles_fts(rowid, title, summary) VALUES (new.rowid, new.title, new.summary);
+END;
+
+CREATE TRIGGER IF NOT EXISTS articles_fts_delete AFTER DELETE ON articles BEGIN
+    INSERT INTO articles_fts(articles_fts, rowid, title, summary) VALUES ('delete', old.rowid, old.title, old.summary);
+END;
+
+CREATE TRIGGER IF NOT EXISTS articles_fts_update AFTER UPDATE ON articles BEGIN
+    INSERT INTO articles_fts(articles_fts, rowid, title, summary) VALUES ('delete', old.rowid, old.title, old.summary);
+    INSERT INTO articles_fts(rowid, title, summary) VALUES (new.rowid, new.title, new.summary);
+END;
+
+CREATE TABLE IF NOT EXISTS sentiment_daily (
+    ticker TEXT NOT NULL,
+    day TEXT NOT NULL,
+    articles INTEGER NOT NULL,
+    scored INTEGER NOT NULL,
+    score_sum REAL NOT NULL,
+    weighted_sum REAL NOT NULL,
+    relevance_sum REAL NOT NULL,
+    bullish INTEGER NOT NULL,
+    bearish INTEGER NOT NULL,
+    PRIMARY KEY (ticker, day)
+);
+
+CREATE TABLE IF NOT EXISTS ticker_meta (
+    ticker TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+"""
+
+# Column layout returned by NewsStore.articles_for (and expected by format_news_data)
+ARTICLE_COLUMNS = ['Date', 'published_at', 'title', 'description', 'url', 'source',
+                   'sentiment', 'score', 'relevance']
+
+
+class NewsStore:
+    """Normalised article/ticker tables with full-text search"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.local = threading.local()
+        self.schema_lock = threading.Lock()
+        self.schema_ready = False
+
+    def connection(self) -> sqlite3.Connection:
+        """This thread's connection (created on first use)"""
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            folder = os.path.dirname(self.path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute('PRAGMA foreign_keys=ON')
+            self.local.connection = connection
+
+            with self.schema_lock:
+                if not self.schema_ready:
+                    connection.executescript(SCHEMA)
+                    self.schema_ready = True
+                    # Databases created before the rollup existed get it built once
+                    if not connection.execute("SELECT 1 FROM sentiment_daily LIMIT 1").fetchone():
+                        with self.transaction() as rollup_connection:
+                            self.refresh_rollup(rollup_connection)
+        return connection
+
+    @contextmanager
+    def transaction(self):
+        """BEGIN IMMEDIATE ... COMMIT, so read-modify-write sequences are serialized"""
+        connection = self.connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            yield connection
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+
+    def store_articles(self, news_items: list) -> int:
+        """Insert NEWS_SENTIMENT feed items with every ticker they mention.
+
+        Returns how many articles were new. Sentiment for articles already
+        stored is updated in place.
+        """
+        if not news_items:
+            return 0
+
+        articles = []
+        mentions = []
+        for item in news_items:
+            articles.append((
+                item['url'], item['title'], item.get('summary', ''), item.get('source', ''),
+                item['time_published'], to_float(item.get('overall_sentiment_score')),
+                item.get('overall_sentiment_label')
+            ))
+            for ts in item.get('ticker_sentiment', []):
+                mentions.append((
+                    ts['ticker'].upper(), item['url'], item['time_published'],
+                    ts.get('ticker_sentiment_label') or 'Neutral',
+                    to_float(ts.get('ticker_sentiment_score')), to_float(ts.get('relevance_score')) or 0.0
+                ))
+
+        with self.transaction() as connection:
+            # rowcount counts inserted rows only (not the FTS trigger writes)
+            inserted = connection.executemany(
+                "INSERT OR IGNORE INTO articles VALUES (?, ?, ?, ?, ?, ?, ?)", articles
+            ).rowcount
+            connection.executemany(
+                """INSERT INTO article_tickers VALUES (?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(ticker, url) DO UPDATE SET
+                       sentiment_label = excluded.sentiment_label,
+                       sentiment_score = COALESCE(excluded.sentiment_score, sentiment_score),
+                       relevance = excluded.relevance""",
+                mentions
+            )
+            self.refresh_rollup(connection, {(mention[0], mention[2][:8]) for mention in mentions})
+        return inserted
+
+    def refresh_rollup(self, connection: sqlite3.Connection, touched: Optional[set] = None):
+        """Recompute sentiment_daily for the (ticker, YYYYMMDD) pairs in touched (everything if None)"""
+        if touched is None:
+            mentions = pd.read_sql_query("SELECT * FROM article_tickers", connection)
+        else:
+            days_by_ticker = {}
+            for ticker, day in touched:
+                days_by_ticker.setdefault(ticker, []).append(day)
+            # One indexed range read per ticker; untouched days inside it are simply rewritten unchanged
+            mentions = pd.concat([
+                pd.read_sql_query(
+                    "SELECT * FROM article_tickers WHERE ticker = ? AND published_at >= ? AND published_at < ?",
+                    connection, params=(ticker, min(days), max(days) + 'U')
+                )
+                for ticker, days in days_by_ticker.items()
+            ]) if days_by_ticker else pd.DataFrame()
+
+        rollup = daily_rollup(mentions)
+        connection.executemany(
+            f"INSERT OR REPLACE INTO sentiment_daily ({', '.join(ROLLUP_COLUMNS)}) VALUES ({', '.join('?' * len(ROLLUP_COLUMNS))})",
+            rollup[ROLLUP_COLUMNS].astype(object).itertuples(index=False, name=None)
+        )
+
+    def daily_sentiment(self, ticker: str, start_date: str, end_date: str) -> pd.DataFrame:
+        """Rollup rows for ticker between two YYYY-MM-DD dates (inclusive), oldest first, indexed by Date"""
+        daily = pd.read_sql_query(
+            f"SELECT day, {', '.join(SUM_COLUMNS)} FROM sentiment_daily WHERE ticker = ? AND day >= ? AND day <= ? ORDER BY day",
+            self.connection(), params=(ticker.upper(), compact_date(start_date), compact_date(end_date))
+        )
+        daily.index = pd.to_datetime(daily.pop('day'), format='%Y%m%d').rename('Date')
+        return with_scores(daily)
+
+    def articles_for(self, ticker: str, start_date: str, end_date: str,
+                     search: Optional[str] = None, limit: Optional[int] = None) -> pd.DataFrame:
+        """Articles mentioning ticker published between two YYYY-MM-DD dates (inclusive), newest first.
+
+        search is an FTS5 query over title and summary (e.g. 'tariffs').
+        """
+        sql = """
+            SELECT substr(t.published_at, 1, 8), t.published_at, a.title, substr(COALESCE(a.summary, ''), 1, 500),
+                   a.url, a.source, t.sentiment_label, t.sentiment_score, t.relevance
+            FROM article_tickers t
+            JOIN articles a ON a.url = t.url
+        """
+        params = []
+        if search:
+            sql += " JOIN articles_fts ON articles_fts.rowid = a.rowid AND articles_fts MATCH ?"
+            params.append(search)
+        sql += " WHERE t.ticker = ? AND t.published_at >= ? AND t.published_at < ? ORDER BY t.published_at DESC"
+        params += [ticker.upper(), compact_date(start_date), compact_date(end_date) + 'U']
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        rows = self.connection().execute(sql, params).fetchall()
+        df = pd.DataFrame(rows, columns=ARTICLE_COLUMNS)
+        df['Date'] = pd.to_datetime(df['Date'], format='%Y%m%d')
+        return df
+
+    def article_count(self, ticker: str) -> int:
+        row = self.connection().execute(
+            "SELECT COUNT(*) FROM article_tickers WHERE ticker = ?", (ticker.upper(),)
+        ).fetchone()
+        return row[0]
+
+    def tickers(self) -> set:
+        """Tickers with at least one article or any bookkeeping"""
+        connection = self.connection()
+        mentioned = {row[0] for row in connection.execute("SELECT DISTINCT ticker FROM article_tickers")}
+        return mentioned | {row[0] for row in connection.execute("SELECT ticker FROM ticker_meta")}
+
+    def get_meta(self, ticker: str) -> dict:
+        row = self.connection().execute(
+            "SELECT data FROM ticker_meta WHERE ticker = ?", (ticker.upper(),)
+        ).fetchone()
+        return json.loads(row[0]) if row else {}
+
+    def update_meta(self, ticker: str, update: Callable[[dict], dict]) -> dict:
+        """Atomically replace ticker's meta with update(current meta)"""
+        with self.transaction() as connection:
+            row = connection.execute(
+                "SELECT data FROM ticker_meta WHERE ticker = ?", (ticker.upper(),)
+            ).fetchone()
+            meta = update(json.loads(row[0]) if row else {})
+            connection.execute(
+                "INSERT OR REPLACE INTO ticker_meta VALUES (?, ?)", (ticker.upper(), json.dumps(meta))
+            )
+        return meta
+
+    def stats(self) -> dict:
+        connection = self.connection()
+        return {
+            'articles': connection.execute("SELECT COUNT(*) FROM articles").fetchone()[0],
+            'mentions': connection.execute("SELECT COUNT(*) FROM article_tickers").fetchone()[0],
+            'tickers': connection.execute("SELECT COUNT(DISTINCT ticker) FROM article_tickers").fetchone()[0],
+            'bytes': os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        }
+
+    def migrate_csv(self, csv_path: str, ticker: str) -> int:
+        """Import a legacy {TICKER}_news.csv cache; returns the number of rows read"""
+        df = pd.read_csv(csv_path)
+        if df.empty:
+            return 0
+
+        published = pd.to_datetime(df['Date']).dt.strftime('%Y%m%dT000000')
+        news_items = [
+            {
+                'url': row.url, 'title': row.title,
+                'summary': row.description if isinstance(row.description, str) else '',
+                'source': row.source if isinstance(row.source, str) else '',
+                'time_published': published_at,
+                'ticker_sentiment': [{
+                    'ticker': ticker, 'ticker_sentiment_label': row.sentiment,
+                    'relevance_score': row.relevance
+                }]
+            }
+            for row, published_at in zip(df.itertuples(index=False), published)
+            if isinstance(row.url, str)
+        ]
+        self.store_articles(news_items)
+
+        meta_path = os.path.join(os.path.dirname(csv_path), f"{ticker}_news_meta.json")
+        if os.path.exists(meta_path):
+            with open(meta_path, 'r') as f:
+                legacy_meta = json.load(f)
+            kept = {key: legacy_meta[key] for key in ('watermark', 'coverage', 'fetched_at') if key in legacy_meta}
+            self.update_meta(ticker, lambda meta: dict(kept, **meta))
+        return len(news_items)
+
+
+def to_float(value) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def compact_date(value: str) -> str:
+    """'2024-01-31' -> '20240131' (the published_at prefix)"""
+    return str(value)[:10].replace('-', '')
+
+
+def migrate(data_folder: str, delete_csv: bool = False):
+    """Import every {TICKER}_news.csv in data_folder into data_folder/news.db"""
+    store = NewsStore(os.path.join(data_folder, 'news.db'))
+    csv_files = sorted(glob.glob(os.path.join(data_folder, '*_news.csv')))
+
+    if not csv_files:
+        print(f"No CSV news caches found in {data_folder}")
+        return
+
+    for csv_path in csv_files:
+        ticker = os.path.basename(csv_path)[:-len('_news.csv')]
+        try:
+            rows = store.migrate_csv(csv_path, ticker)
+            print(f"✅ {ticker}: {rows} articles -> {store.path}")
+            if delete_csv:
+                os.remove(csv_path)
+                meta_path = os.path.join(data_folder, f"{ticker}_news_meta.json")
+                if os.path.exists(meta_path):
+                    os.remove(meta_path)
+        except Exception as e:
+            print(f"❌ {ticker}: {e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="News store maintenance")
+    subcommands = parser.add_subparsers(dest='command', required=True)
+
+    migrate_parser = subcommands.add_parser('migrate', help="import CSV news caches into the SQLite store")
+    migrate_parser.add_argument('--data-folder', default=os.getenv('DATA_FOLDER', 'data'))
+    migrate_parser.add_argument('--delete-csv', action='store_true', help="remove each CSV after importing it")
+
+    args = parser.parse_args()
+    if args.command == 'migrate':
+        migrate(args.data_folder, args.delete_csv)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,31 @@
+from dataclasses import dataclass, field, replace
+from typing import List, Optional
+
+
+@dataclass
+class ParsedMessage:
+    """Everything extracted from a user message, computed once per message.
+
+    The coordinator builds one of these and hands it to the sub-agents so
+    they never re-parse the text for tickers or dates.
+    """
+    text: str
+    intent: str = "trading_advice"
+    ticker: str = ""
+    tickers: List[str] = field(default_factory=list)
+    # Single date (YYYY-MM-DD) for historical quote requests
+    date: Optional[str] = None
+    # {'start_date': ..., 'end_date': ...} for news requests
+    date_range: Optional[dict] = None
+    # Free-text topic filter for news requests ("... mentioning tariffs")
+    search_terms: Optional[str] = None
+    # Raw personality name for "change personality to ..." requests
+    personality: Optional[str] = None
+
+    @property
+    def is_personality_change(self) -> bool:
+        return self.personality is not None
+
+    def for_ticker(self, ticker: str) -> 'ParsedMessage':
+        """Return a copy scoped to one ticker with no date constraints"""
+        return replace(self, ticker=ticker, tickers=[ticker], date=None, date_range=None)
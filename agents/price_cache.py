@@ -0,0 +1,233 @@
+"""In-process cache of parsed daily price history, one entry per ticker.
+
+Each ticker's OHLCV history is held as numpy arrays sorted by date, so a
+quote lookup is a binary search instead of a CSV parse. Entries are
+validated against the backing file's mtime/size (so writes by other
+processes are noticed), can be written through by the agent that saved
+the file, and are evicted least-recently-used once the memory cap is hit.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional
+import numpy as np
+import pandas as pd
+
+PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+class PriceHistory:
+    """Daily OHLCV history for one ticker, sorted by ascending date"""
+
+    def __init__(self, dates, open_, high, low, close, volume):
+        # Columns that were not loaded (see PriceStore.read) stay None
+        self.dates = as_column(dates, 'datetime64[D]')
+        self.open = as_column(open_, np.float64)
+        self.high = as_column(high, np.float64)
+        self.low = as_column(low, np.float64)
+        self.close = as_column(close, np.float64)
+        self.volume = as_column(volume, np.int64)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> 'PriceHistory':
+        """Build from a DataFrame with Date/Open/High/Low/Close/Volume columns"""
+        dates = pd.to_datetime(df['Date']).values.astype('datetime64[D]')
+        order = np.argsort(dates, kind='stable')
+        return cls(
+            dates[order],
+            df['Open'].to_numpy(dtype=np.float64)[order],
+            df['High'].to_numpy(dtype=np.float64)[order],
+            df['Low'].to_numpy(dtype=np.float64)[order],
+            df['Close'].to_numpy(dtype=np.float64)[order],
+            df['Volume'].to_numpy(dtype=np.float64).astype(np.int64)[order]
+        )
+
+    @classmethod
+    def from_time_series(cls, time_series: dict) -> 'PriceHistory':
+        """Build from an Alpha Vantage 'Time Series (Daily)' mapping"""
+        dates = sorted(time_series.keys())
+        return cls(
+            np.array(dates, dtype='datetime64[D]'),
+            [float(time_series[d]['1. open']) for d in dates],
+            [float(time_series[d]['2. high']) for d in dates],
+            [float(time_series[d]['3. low']) for d in dates],
+            [float(time_series[d]['4. close']) for d in dates],
+            [int(float(time_series[d]['5. volume'])) for d in dates]
+        )
+
+    def merge(self, newer: 'PriceHistory') -> 'PriceHistory':
+        """Combine with newer rows; rows in `newer` replace rows with the same date"""
+        dates = np.concatenate([newer.dates, self.dates])
+        unique_dates, first_index = np.unique(dates, return_index=True)
+
+        def pick(new_values, old_values):
+            if new_values is None or old_values is None:
+                return None
+            return np.concatenate([new_values, old_values])[first_index]
+
+        return PriceHistory(
+            unique_dates,
+            pick(newer.open, self.open),
+            pick(newer.high, self.high),
+            pick(newer.low, self.low),
+            pick(newer.close, self.close),
+            pick(newer.volume, self.volume)
+        )
+
+    def take(self, index) -> 'PriceHistory':
+        """Select rows by slice, integer index array or boolean mask"""
+        def pick(values):
+            return None if values is None else values[index]
+
+        return PriceHistory(
+            pick(self.dates), pick(self.open), pick(self.high),
+            pick(self.low), pick(self.close), pick(self.volume)
+        )
+
+    def to_frame(self) -> pd.DataFrame:
+        """Return the history as a DataFrame, newest first (the CSV cache layout)"""
+        return pd.DataFrame({
+            'Date': pd.to_datetime(self.dates[::-1]),
+            'Open': self.open[::-1],
+            'High': self.high[::-1],
+            'Low': self.low[::-1],
+            'Close': self.close[::-1],
+            'Volume': self.volume[::-1]
+        })
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(
+            array.nbytes for array in (self.dates, self.open, self.high, self.low, self.close, self.volume)
+            if array is not None
+        )
+
+    @property
+    def latest_date(self):
+        return self.dates[-1] if len(self.dates) else None
+
+    def index_of(self, date) -> Optional[int]:
+        """Binary search for an exact date; returns the row index or None"""
+        target = np.datetime64(pd.Timestamp(date).date(), 'D')
+        position = int(np.searchsorted(self.dates, target))
+        if position < len(self.dates) and self.dates[position] == target:
+            return position
+        return None
+
+    def between(self, start, end) -> 'PriceHistory':
+        """Rows dated from start to end inclusive"""
+        first = np.datetime64(pd.Timestamp(start).date(), 'D')
+        last = np.datetime64(pd.Timestamp(end).date(), 'D')
+        return self.take(slice(
+            int(np.searchsorted(self.dates, first, side='left')),
+            int(np.searchsorted(self.dates, last, side='right'))
+        ))
+
+    def row(self, index: int) -> dict:
+        """Return one row in the shape format_stock_data expects"""
+        return {
+            'Date': pd.Timestamp(self.dates[index]),
+            'Open': self.open[index],
+            'High': self.high[index],
+            'Low': self.low[index],
+            'Close': self.close[index],
+            'Volume': self.volume[index]
+        }
+
+
+class PriceCache:
+    """LRU of PriceHistory objects bounded by total array memory"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # ticker -> (file signature, PriceHistory)
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+
+        self.hits = 0
+        self.loads = 0
+        self.evictions = 0
+
+    def get(self, ticker: str, path: str, loader: Callable[[str], Optional[PriceHistory]]) -> Optional[PriceHistory]:
+        """Return the history for ticker, reloading it if the file changed"""
+        signature = file_signature(path)
+        if signature is None:
+            self.invalidate(ticker)
+            return None
+
+        with self.lock:
+            entry = self.entries.get(ticker)
+            if entry and entry[0] == signature:
+                self.entries.move_to_end(ticker)
+                self.hits += 1
+                return entry[1]
+
+        history = loader(path)
+        if history is not None:
+            with self.lock:
+                self.loads += 1
+                self.store(ticker, signature, history)
+        return history
+
+    def put(self, ticker: str, path: str, history: PriceHistory):
+        """Write-through after the backing file was rewritten"""
+        signature = file_signature(path)
+        with self.lock:
+            if signature is None:
+                self.remove(ticker)
+            else:
+                self.store(ticker, signature, history)
+
+    def invalidate(self, ticker: str):
+        with self.lock:
+            self.remove(ticker)
+
+    def store(self, ticker: str, signature: tuple, history: PriceHistory):
+        """Insert an entry and evict least recently used tickers (lock held)"""
+        self.remove(ticker)
+        self.entries[ticker] = (signature, history)
+        self.total_bytes += history.nbytes
+
+        while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+            _, (_, evicted) = self.entries.popitem(last=False)
+            self.total_bytes -= evicted.nbytes
+            self.evictions += 1
+
+    def remove(self, ticker: str):
+        """Drop an entry if present (lock held)"""
+        entry = self.entries.pop(ticker, None)
+        if entry:
+            self.total_bytes -= entry[1].nbytes
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                'tickers': len(self.entries),
+                'bytes': self.total_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'loads': self.loads,
+                'evictions': self.evictions
+            }
+
+
+def as_column(values, dtype) -> Optional[np.ndarray]:
+    """View values as a 1-d array of dtype without copying when possible"""
+    return None if values is None else np.asarray(values, dtype=dtype)
+
+
+def file_signature(path: str) -> Optional[tuple]:
+    """(mtime_ns, size) of a file, or None if it does not exist"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+# Process-wide cache shared by all quote agents
+price_cache = PriceCache(max_bytes=int(float(os.getenv('PRICE_CACHE_MAX_MB', 64)) * 1024 * 1024))
@@ -0,0 +1,325 @@
+"""Columnar on-disk store for daily price history.
+
+Each ticker gets a folder under ``data/prices/`` holding one raw binary
+file per column (Date as datetime64[D], Open/High/Low/Close as float64,
+Volume as int64) plus a small ``meta.json``. Reads memory-map only the
+columns that are asked for, so loading a full-history ticker costs a few
+page faults rather than a CSV parse.
+
+Routine refreshes append only rows that are new or changed to the end of
+the current column files and then bump the row count in ``meta.json``, so
+adding the latest day costs O(new rows). Rows appended out of date order
+form an unsorted tail that readers fold in (later rows win); once the
+tail grows past PRICE_STORE_COMPACT_ROWS a background compaction rewrites
+the ticker sorted and deduplicated. ``meta.json`` also records which date
+ranges have been fetched completely (see DateCoverage). Full rewrites (compaction, migration)
+create a new generation of column files and then atomically replace
+``meta.json`` to point at it, so readers always see a consistent set of
+columns. Writers for the same ticker are serialized with a file lock,
+which also covers other worker processes.
+
+Convert existing CSV caches, or compact every ticker, with::
+
+    python -m agents.price_store migrate [--data-folder data] [--delete-csv]
+    python -m agents.price_store compact [--data-folder data]
+"""
+
+import argparse
+import glob
+import json
+import os
+import threading
+import time
+from typing import List, Optional
+import numpy as np
+import pandas as pd
+from .date_coverage import DateCoverage
+from .file_lock import file_lock
+from .price_cache import PriceHistory
+
+# Column name -> (file stem, dtype, PriceHistory attribute)
+COLUMNS = {
+    'Date': ('date', 'datetime64[D]', 'dates'),
+    'Open': ('open', np.float64, 'open'),
+    'High': ('high', np.float64, 'high'),
+    'Low': ('low', np.float64, 'low'),
+    'Close': ('close', np.float64, 'close'),
+    'Volume': ('volume', np.int64, 'volume'),
+}
+
+# Unsorted rows tolerated after the sorted prefix before compacting
+COMPACT_TAIL_ROWS = int(os.getenv('PRICE_STORE_COMPACT_ROWS', 64))
+
+
+class PriceStore:
+    """Memory-mapped column files per ticker"""
+
+    def __init__(self, folder: str):
+        self.folder = folder
+        self.compacting = set()
+        self.compacting_lock = threading.Lock()
+
+    def ticker_folder(self, ticker: str) -> str:
+        return os.path.join(self.folder, ticker.upper())
+
+    def meta_path(self, ticker: str) -> str:
+        return os.path.join(self.ticker_folder(ticker), 'meta.json')
+
+    def column_path(self, ticker: str, column: str, generation: int) -> str:
+        stem = COLUMNS[column][0]
+        return os.path.join(self.ticker_folder(ticker), f"{stem}.{generation}.bin")
+
+    def exists(self, ticker: str) -> bool:
+        return os.path.exists(self.meta_path(ticker))
+
+    def read_meta(self, ticker: str) -> Optional[dict]:
+        try:
+            with open(self.meta_path(ticker), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def read(self, ticker: str, columns: Optional[List[str]] = None) -> Optional[PriceHistory]:
+        """Memory-map the requested columns (all by default) without copying"""
+        meta = self.read_meta(ticker)
+        if meta is None:
+            return None
+
+        columns = list(columns or COLUMNS)
+        if 'Date' not in columns:
+            columns.insert(0, 'Date')
+        rows = meta['rows']
+        sorted_rows = meta.get('sorted_rows', rows)
+        arrays = {}
+
+        for column in columns:
+            _, dtype, attribute = COLUMNS[column]
+            if rows == 0:
+                arrays[attribute] = np.empty(0, dtype=dtype)
+            else:
+                arrays[attribute] = np.memmap(
+                    self.column_path(ticker, column, meta['generation']),
+                    dtype=dtype, mode='r', shape=(rows,)
+                )
+
+        history = PriceHistory(
+            arrays.get('dates'), arrays.get('open'), arrays.get('high'),
+            arrays.get('low'), arrays.get('close'), arrays.get('volume')
+        )
+        if sorted_rows == rows:
+            return history
+
+        # Fold in the unsorted tail; reversing it makes the last appended row win
+        tail = history.take(slice(rows - 1, sorted_rows - 1 if sorted_rows else None, -1))
+        return history.take(slice(0, sorted_rows)).merge(tail)
+
+    def fetched_at(self, ticker: str) -> Optional[float]:
+        """Epoch seconds of the last fetch recorded for ticker"""
+        meta = self.read_meta(ticker)
+        return meta.get('fetched_at') if meta else None
+
+    def coverage(self, ticker: str) -> DateCoverage:
+        """Date intervals that have been fetched completely for ticker"""
+        meta = self.read_meta(ticker)
+        return DateCoverage.from_json(meta.get('coverage') if meta else None)
+
+    def append(self, ticker: str, history: PriceHistory, covered: Optional[tuple] = None) -> int:
+        """Append rows that are new or changed; returns how many were written.
+
+        covered=(start, end) records that the source was asked for that whole
+        range, so dates inside it without a row are known non-trading days,
+        and stamps the ticker's fetched_at.
+        """
+        os.makedirs(self.ticker_folder(ticker), exist_ok=True)
+
+        with file_lock(os.path.join(self.ticker_folder(ticker), '.lock')):
+            meta = self.read_meta(ticker)
+            if meta is None:
+                self.write_generation(ticker, history, None, covered)
+                return len(history)
+
+            coverage = DateCoverage.from_json(meta.get('coverage'))
+            if covered:
+                coverage.add(*covered)
+                meta = dict(meta, fetched_at=time.time())
+
+            existing = self.read(ticker)
+            rows = meta['rows']
+            sorted_rows = meta.get('sorted_rows', rows)
+
+            if len(existing):
+                position = np.minimum(np.searchsorted(existing.dates, history.dates), len(existing) - 1)
+                unchanged = existing.dates[position] == history.dates
+                for attribute in ('open', 'high', 'low', 'close', 'volume'):
+                    unchanged &= getattr(existing, attribute)[position] == getattr(history, attribute)
+                history = history.take(~unchanged)
+
+            if not len(history):
+                if covered:
+                    self.write_meta(ticker, dict(meta, coverage=coverage.to_json()))
+                return 0
+
+            for column, (_, dtype, attribute) in COLUMNS.items():
+                values = np.ascontiguousarray(getattr(history, attribute), dtype=dtype)
+                with open(self.column_path(ticker, column, meta['generation']), 'r+b' if rows else 'wb') as f:
+                    # Drop bytes left behind by an append that never reached meta.json
+                    f.seek(rows * values.itemsize)
+                    f.truncate()
+                    f.write(values.tobytes())
+
+            # Rows strictly after the sorted prefix keep the whole file sorted
+            extends_sorted = (
+                sorted_rows == rows
+                and (rows == 0 or history.dates[0] > existing.dates[-1])
+                and bool(np.all(np.diff(history.dates) > np.timedelta64(0, 'D')))
+            )
+            rows += len(history)
+            if extends_sorted:
+                sorted_rows = rows
+            self.write_meta(ticker, dict(meta, rows=rows, sorted_rows=sorted_rows, coverage=coverage.to_json()))
+
+        if rows - sorted_rows > COMPACT_TAIL_ROWS:
+            self.compact_in_background(ticker)
+        return len(history)
+
+    def compact(self, ticker: str) -> bool:
+        """Rewrite the ticker sorted and deduplicated; returns False if it already was"""
+        with file_lock(os.path.join(self.ticker_folder(ticker), '.lock')):
+            meta = self.read_meta(ticker)
+            if meta is None or meta.get('sorted_rows', meta['rows']) == meta['rows']:
+                return False
+            self.write_generation(ticker, self.read(ticker), meta)
+            return True
+
+    def compact_in_background(self, ticker: str):
+        """Start a compaction thread unless one is already running for ticker"""
+        with self.compacting_lock:
+            if ticker in self.compacting:
+                return
+            self.compacting.add(ticker)
+
+        def run():
+            try:
+                self.compact(ticker)
+            except Exception as e:
+                print(f"Error compacting price store for {ticker}: {e}")
+            finally:
+                with self.compacting_lock:
+                    self.compacting.discard(ticker)
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def tickers(self) -> List[str]:
+        if not os.path.isdir(self.folder):
+            return []
+        return sorted(name for name in os.listdir(self.folder) if self.exists(name))
+
+    def write(self, ticker: str, history: PriceHistory):
+        """Replace the stored history for ticker with a new generation"""
+        os.makedirs(self.ticker_folder(ticker), exist_ok=True)
+
+        with file_lock(os.path.join(self.ticker_folder(ticker), '.lock')):
+            self.write_generation(ticker, history, self.read_meta(ticker))
+
+    def write_generation(self, ticker: str, history: PriceHistory, meta: Optional[dict],
+                         covered: Optional[tuple] = None):
+        """Write history as a fresh generation and retire the old one (ticker lock held)"""
+        old_generation = meta['generation'] if meta else None
+        generation = (old_generation or 0) + 1
+        coverage = DateCoverage.from_json(meta.get('coverage') if meta else None)
+        fetched_at = meta.get('fetched_at') if meta else None
+        if covered:
+            coverage.add(*covered)
+            fetched_at = time.time()
+
+        for column, (_, dtype, attribute) in COLUMNS.items():
+            values = np.ascontiguousarray(getattr(history, attribute), dtype=dtype)
+            values.tofile(self.column_path(ticker, column, generation))
+
+        self.write_meta(ticker, {
+            'rows': len(history), 'sorted_rows': len(history),
+            'generation': generation, 'coverage': coverage.to_json(), 'fetched_at': fetched_at
+        })
+
+        if old_generation is not None:
+            self.remove_generation(ticker, old_generation)
+
+    def write_meta(self, ticker: str, meta: dict):
+        """Atomically replace meta.json (ticker lock held)"""
+        path = self.meta_path(ticker)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(temp_path, path)
+
+    def remove_generation(self, ticker: str, generation: int):
+        """Delete the column files of an old generation (open memory maps stay valid)"""
+        for column in COLUMNS:
+            try:
+                os.remove(self.column_path(ticker, column, generation))
+            except OSError:
+                pass
+
+    def migrate_csv(self, csv_path: str, ticker: str) -> Optional[PriceHistory]:
+        """Convert a legacy {TICKER}_data.csv cache file into the store"""
+        df = pd.read_csv(csv_path)
+        if df.empty:
+            return None
+
+        # Legacy files kept the first row written for a date
+        df['Date'] = pd.to_datetime(df['Date'])
+        df = df.drop_duplicates(subset=['Date'], keep='first')
+        history = PriceHistory.from_frame(df)
+        self.write(ticker, history)
+        return history
+
+
+def migrate(data_folder: str, delete_csv: bool = False):
+    """Convert every {TICKER}_data.csv in data_folder into the columnar store"""
+    store = PriceStore(os.path.join(data_folder, 'prices'))
+    csv_files = sorted(glob.glob(os.path.join(data_folder, '*_data.csv')))
+
+    if not csv_files:
+        print(f"No CSV price caches found in {data_folder}")
+        return
+
+    for csv_path in csv_files:
+        ticker = os.path.basename(csv_path)[:-len('_data.csv')]
+        try:
+            history = store.migrate_csv(csv_path, ticker)
+            rows = len(history) if history is not None else 0
+            print(f"✅ {ticker}: {rows} rows -> {store.ticker_folder(ticker)}")
+            if delete_csv and history is not None:
+                os.remove(csv_path)
+        except Exception as e:
+            print(f"❌ {ticker}: {e}")
+
+
+def compact_all(data_folder: str):
+    """Sort and deduplicate every ticker in the store"""
+    store = PriceStore(os.path.join(data_folder, 'prices'))
+    for ticker in store.tickers():
+        compacted = store.compact(ticker)
+        print(f"{'✅' if compacted else '—'} {ticker}: {'compacted' if compacted else 'already compact'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Columnar price store maintenance")
+    subcommands = parser.add_subparsers(dest='command', required=True)
+
+    migrate_parser = subcommands.add_parser('migrate', help="convert CSV price caches to the columnar store")
+    migrate_parser.add_argument('--data-folder', default=os.getenv('DATA_FOLDER', 'data'))
+    migrate_parser.add_argument('--delete-csv', action='store_true', help="remove each CSV after converting it")
+
+    compact_parser = subcommands.add_parser('compact', help="sort and deduplicate appended rows")
+    compact_parser.add_argument('--data-folder', default=os.getenv('DATA_FOLDER', 'data'))
+
+    args = parser.parse_args()
+    if args.command == 'migrate':
+        migrate(args.data_folder, args.delete_csv)
+    elif args.command == 'compact':
+        compact_all(args.data_folder)
+
+
+if __name__ == '__main__':
+    main()
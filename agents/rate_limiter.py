@@ -0,0 +1,186 @@
+"""Alpha Vantage quota enforcement shared by every agent and worker process.
+
+A token bucket (per-minute rate) plus a daily counter live in a small JSON
+state file guarded by an inter-process file lock, so the limit holds across
+gunicorn workers. Within a process, waiting callers are served from a
+priority queue so interactive user requests go ahead of background work.
+"""
+
+import heapq
+import itertools
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from .file_lock import file_lock
+
+# Request priorities (lower is served first)
+INTERACTIVE = 0
+BACKGROUND = 10
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a request cannot be admitted within its allowed wait"""
+
+    def __init__(self, retry_after: float, message: str = None):
+        self.retry_after = retry_after
+        super().__init__(message or f"Alpha Vantage rate limit reached, retry in {retry_after:.0f}s")
+
+
+class RateLimiter:
+    """Priority-queued token bucket backed by a shared state file"""
+
+    def __init__(self, state_path: str, per_minute: int = 5, per_day: int = 25):
+        self.state_path = state_path
+        self.lock_path = f"{state_path}.lock"
+        self.capacity = float(per_minute)
+        self.refill_rate = per_minute / 60.0
+        self.per_day = per_day
+
+        self.condition = threading.Condition()
+        self.waiters = []  # heap of (priority, sequence)
+        self.sequence = itertools.count()
+
+        self.granted = 0
+        self.rejected = 0
+
+    def acquire(self, priority: int = INTERACTIVE, max_wait: float = None) -> float:
+        """Block until a request may be sent and return the seconds waited.
+
+        Raises RateLimitExceeded if the estimated wait is longer than
+        max_wait or the daily quota is used up.
+        """
+        estimated_wait = self.estimate_wait(priority)
+        if max_wait is not None and estimated_wait > max_wait:
+            self.rejected += 1
+            raise RateLimitExceeded(estimated_wait)
+
+        ticket = (priority, next(self.sequence))
+        started = time.monotonic()
+
+        with self.condition:
+            heapq.heappush(self.waiters, ticket)
+            try:
+                while True:
+                    if self.waiters[0] == ticket:
+                        wait, daily_exhausted = self.take_token()
+                        if wait == 0:
+                            self.granted += 1
+                            return time.monotonic() - started
+                        if daily_exhausted:
+                            self.rejected += 1
+                            raise RateLimitExceeded(wait, "Alpha Vantage daily request quota is used up")
+                        if max_wait is not None and time.monotonic() - started + wait > max_wait:
+                            self.rejected += 1
+                            raise RateLimitExceeded(wait)
+                        self.condition.wait(timeout=wait)
+                    else:
+                        # Someone with higher priority is ahead of us
+                        self.condition.wait(timeout=1.0)
+            finally:
+                self.waiters.remove(ticket)
+                heapq.heapify(self.waiters)
+                self.condition.notify_all()
+
+    def estimate_wait(self, priority: int = INTERACTIVE) -> float:
+        """Estimate how long a new request with this priority would wait, in seconds"""
+        with self.condition:
+            ahead = sum(1 for waiter_priority, _ in self.waiters if waiter_priority <= priority)
+
+        state = self.read_state()
+        if state['day_count'] + ahead >= self.per_day:
+            return self.seconds_until_reset()
+
+        needed = ahead + 1 - state['tokens']
+        return max(0.0, needed / self.refill_rate)
+
+    def take_token(self) -> tuple:
+        """Take one token from the shared bucket.
+
+        Returns (0, False) on success, otherwise (seconds until a token is
+        available, whether the daily quota is the reason).
+        """
+        with file_lock(self.lock_path):
+            state = self.read_state()
+
+            if state['day_count'] >= self.per_day:
+                return self.seconds_until_reset(), True
+
+            if state['tokens'] >= 1:
+                state['tokens'] -= 1
+                state['day_count'] += 1
+                self.write_state(state)
+                return 0, False
+
+            self.write_state(state)
+            return (1 - state['tokens']) / self.refill_rate, False
+
+    def penalize(self, daily: bool = False):
+        """Drain the bucket after Alpha Vantage reports throttling"""
+        with file_lock(self.lock_path):
+            state = self.read_state()
+            state['tokens'] = 0.0
+            if daily:
+                state['day_count'] = self.per_day
+            self.write_state(state)
+
+    def read_state(self) -> dict:
+        """Read the shared bucket state, refilled up to now"""
+        now = time.time()
+        today = self.current_day()
+
+        try:
+            with open(self.state_path, 'r') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            state = {'tokens': self.capacity, 'updated': now, 'day': today, 'day_count': 0}
+
+        elapsed = max(0.0, now - state.get('updated', now))
+        state['tokens'] = min(self.capacity, state.get('tokens', self.capacity) + elapsed * self.refill_rate)
+        state['updated'] = now
+
+        if state.get('day') != today:
+            state['day'] = today
+            state['day_count'] = 0
+
+        return state
+
+    def write_state(self, state: dict):
+        """Persist the bucket state (file lock held)"""
+        temp_path = f"{self.state_path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(temp_path, self.state_path)
+
+    def current_day(self) -> str:
+        return datetime.now(timezone.utc).strftime('%Y-%m-%d')
+
+    def seconds_until_reset(self) -> float:
+        """Seconds until the daily quota resets (midnight UTC)"""
+        now = datetime.now(timezone.utc)
+        tomorrow = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+        return (tomorrow - now).total_seconds()
+
+    def stats(self) -> dict:
+        """Return queue and quota counters"""
+        state = self.read_state()
+        with self.condition:
+            queued = len(self.waiters)
+        return {
+            'queued': queued,
+            'granted': self.granted,
+            'rejected': self.rejected,
+            'tokens': round(state['tokens'], 2),
+            'day_count': state['day_count'],
+            'per_minute': int(self.capacity),
+            'per_day': self.per_day
+        }
+
+
+# Process-wide limiter for every Alpha Vantage call
+alpha_vantage_limiter = RateLimiter(
+    os.path.join(os.getenv('DATA_FOLDER', 'data'), '.alpha_vantage_rate_limit.json'),
+    per_minute=int(os.getenv('ALPHA_VANTAGE_REQUESTS_PER_MINUTE', 5)),
+    per_day=int(os.getenv('ALPHA_VANTAGE_REQUESTS_PER_DAY', 25))
+)
@@ -0,0 +1,157 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+
+class ResponseCache:
+    """TTL + LRU cache for LLM responses with an optional on-disk tier.
+
+    Keys are built from the model, system prompt, normalized user prompt and
+    a fingerprint of the context the prompt was enhanced with, so the same
+    question about the same data is answered once per TTL.
+    """
+
+    def __init__(self, max_entries: int = 512, ttl: float = 900, disk_folder: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.disk_folder = disk_folder
+        self.entries = OrderedDict()  # key -> (expires_at, response)
+        self.lock = threading.Lock()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.writes = 0
+
+        if self.disk_folder:
+            if not os.path.exists(self.disk_folder):
+                os.makedirs(self.disk_folder)
+            self.prune_disk()
+
+    @staticmethod
+    def make_key(model: str, system_prompt: str, prompt: str, context: Optional[dict] = None) -> str:
+        """Build a cache key from the request and a hash of its context"""
+        normalized_prompt = ' '.join(prompt.lower().split())
+        context_hash = hashlib.sha256(
+            json.dumps(context or {}, sort_keys=True, default=str).encode('utf-8')
+        ).hexdigest()
+
+        key_source = '\x1f'.join([model, system_prompt or '', normalized_prompt, context_hash])
+        return hashlib.sha256(key_source.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for key, or None"""
+        now = time.time()
+
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry:
+                expires_at, response = entry
+                if expires_at > now:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return response
+                del self.entries[key]
+
+        disk_entry = self.read_from_disk(key, now)
+
+        with self.lock:
+            if disk_entry is None:
+                self.misses += 1
+                return None
+
+            # Promote disk hits into memory
+            expires_at, response = disk_entry
+            self.disk_hits += 1
+            self.store_in_memory(key, response, expires_at)
+            return response
+
+    def set(self, key: str, response: str):
+        """Cache a response under key"""
+        expires_at = time.time() + self.ttl
+
+        with self.lock:
+            self.store_in_memory(key, response, expires_at)
+            self.writes += 1
+
+        self.write_to_disk(key, response, expires_at)
+
+    def store_in_memory(self, key: str, response: str, expires_at: float):
+        """Insert into the LRU, evicting the least recently used entries (lock held)"""
+        self.entries[key] = (expires_at, response)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_folder, f"{key}.json")
+
+    def read_from_disk(self, key: str, now: float) -> Optional[tuple]:
+        """Read (expires_at, response) from the on-disk tier, dropping it if expired"""
+        if not self.disk_folder:
+            return None
+
+        path = self.disk_path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if entry.get('expires_at', 0) <= now:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+
+        return entry['expires_at'], entry.get('response')
+
+    def write_to_disk(self, key: str, response: str, expires_at: float):
+        """Write a response to the on-disk tier atomically"""
+        if not self.disk_folder:
+            return
+
+        path = self.disk_path(key)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({'expires_at': expires_at, 'response': response}, f)
+            os.replace(temp_path, path)
+        except OSError as e:
+            print(f"Error writing response cache entry: {e}")
+
+    def prune_disk(self):
+        """Remove expired entries from the on-disk tier"""
+        if not self.disk_folder:
+            return
+
+        now = time.time()
+        for filename in os.listdir(self.disk_folder):
+            if filename.endswith('.json'):
+                self.read_from_disk(filename[:-len('.json')], now)
+
+    def stats(self) -> dict:
+        """Return hit/miss counters"""
+        with self.lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'writes': self.writes,
+                'hit_rate': (self.hits + self.disk_hits) / lookups if lookups else 0.0
+            }
+
+
+# Process-wide cache shared by all agents
+llm_response_cache = ResponseCache(
+    max_entries=int(os.getenv('LLM_CACHE_SIZE', 512)),
+    ttl=float(os.getenv('LLM_CACHE_TTL', 900)),
+    disk_folder=os.path.join(os.getenv('DATA_FOLDER', 'data'), 'llm_cache') if os.getenv('LLM_CACHE_DISK', 'False').lower() == 'true' else None
+)
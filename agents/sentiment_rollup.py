@@ -0,0 +1,87 @@
+"""Daily per-ticker news sentiment rollups.
+
+Alpha Vantage scores each ticker mention from -1 (bearish) to +1 (bullish)
+with a relevance weight. A rollup row keeps additive sums for one ticker
+and day (articles, scored articles, score and relevance sums, bullish and
+bearish counts), so any range of days can be combined by adding rows and
+the averages are derived at read time.
+"""
+
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+BULLISH_LABELS = ('Bullish', 'Somewhat-Bullish')
+BEARISH_LABELS = ('Bearish', 'Somewhat-Bearish')
+
+# Additive columns stored per (ticker, day)
+SUM_COLUMNS = ['articles', 'scored', 'score_sum', 'weighted_sum', 'relevance_sum', 'bullish', 'bearish']
+ROLLUP_COLUMNS = ['ticker', 'day'] + SUM_COLUMNS
+
+
+def daily_rollup(mentions: pd.DataFrame) -> pd.DataFrame:
+    """Aggregate ticker mentions to one ROLLUP_COLUMNS row per ticker and day.
+
+    mentions needs ticker, published_at, sentiment_label, sentiment_score
+    and relevance columns (the article_tickers layout).
+    """
+    if mentions.empty:
+        return pd.DataFrame(columns=ROLLUP_COLUMNS)
+
+    score = pd.to_numeric(mentions['sentiment_score'], errors='coerce')
+    relevance = pd.to_numeric(mentions['relevance'], errors='coerce').fillna(0.0)
+    scored = score.notna()
+    labels = mentions['sentiment_label']
+
+    frame = pd.DataFrame({
+        'ticker': mentions['ticker'],
+        'day': mentions['published_at'].str[:8],
+        'articles': 1,
+        'scored': scored.astype(int),
+        'score_sum': score.fillna(0.0),
+        'weighted_sum': (score * relevance).fillna(0.0),
+        'relevance_sum': relevance.where(scored, 0.0),
+        'bullish': labels.isin(BULLISH_LABELS).astype(int),
+        'bearish': labels.isin(BEARISH_LABELS).astype(int),
+    })
+    return frame.groupby(['ticker', 'day'], as_index=False, sort=True)[SUM_COLUMNS].sum()
+
+
+def with_scores(rollup: pd.DataFrame) -> pd.DataFrame:
+    """Add mean_score and weighted_score (NaN where nothing was scored)"""
+    rollup = rollup.copy()
+    rollup['mean_score'] = ratio(rollup['score_sum'], rollup['scored'])
+    rollup['weighted_score'] = ratio(rollup['weighted_sum'], rollup['relevance_sum'])
+    return rollup
+
+
+def ratio(numerator, denominator) -> np.ndarray:
+    numerator = np.asarray(numerator, dtype=np.float64)
+    denominator = np.asarray(denominator, dtype=np.float64)
+    return np.divide(numerator, denominator, out=np.full_like(numerator, np.nan), where=denominator > 0)
+
+
+def resample(daily: pd.DataFrame, rule: str) -> pd.DataFrame:
+    """Combine a daily rollup (indexed by Date) into coarser periods, e.g. 'W-MON'"""
+    periods = daily[SUM_COLUMNS].resample(rule, label='left', closed='left').sum()
+    return with_scores(periods[periods['articles'] > 0])
+
+
+def summarize(daily: pd.DataFrame) -> dict:
+    """Totals and averages over every row of a rollup"""
+    totals = daily[SUM_COLUMNS].sum() if not daily.empty else pd.Series(0, index=SUM_COLUMNS)
+    return {
+        'articles': int(totals['articles']),
+        'mean_score': float(ratio([totals['score_sum']], [totals['scored']])[0]),
+        'weighted_score': float(ratio([totals['weighted_sum']], [totals['relevance_sum']])[0]),
+        'bullish': int(totals['bullish']),
+        'bearish': int(totals['bearish']),
+    }
+
+
+def format_score(score: Optional[float]) -> str:
+    """'+0.18', or 'n/a' when nothing was scored"""
+    if score is None or np.isnan(score):
+        return 'n/a'
+    return f"{score:+.2f}"
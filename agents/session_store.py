@@ -0,0 +1,104 @@
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Deque, Optional
+
+# Remembered per session for follow-up questions
+RECENT_TICKERS = 5
+
+
+@dataclass
+class SessionState:
+    """What one chat connection remembers between messages.
+
+    Everything heavy (agents, HTTP clients, caches, prompt tables) is shared
+    by all sessions; a session only holds a few small values.
+    """
+    personality: str = "Warren Buffett"
+    recent_tickers: Deque[str] = field(default_factory=lambda: deque(maxlen=RECENT_TICKERS))
+
+    @property
+    def last_ticker(self) -> Optional[str]:
+        return self.recent_tickers[-1] if self.recent_tickers else None
+
+    def remember(self, tickers: list):
+        """Record the tickers a handled message was about"""
+        for ticker in tickers:
+            if ticker in self.recent_tickers:
+                self.recent_tickers.remove(ticker)
+            self.recent_tickers.append(ticker)
+
+
+class SessionStore:
+    """SessionState per Socket.IO sid, evicted by idle TTL and LRU size.
+
+    Sessions are per process; with several app instances the load balancer's
+    sticky sessions keep every message of a sid on the process that holds it.
+    """
+
+    def __init__(self, max_sessions: int = 10000, ttl: float = 3600):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.sessions = OrderedDict()  # sid -> (last_seen, SessionState)
+        self.lock = threading.Lock()
+
+        self.created = 0
+        self.evicted = 0
+        self.expired = 0
+
+    def get(self, sid: str) -> SessionState:
+        """Return the session for sid, creating it if needed, and mark it used"""
+        now = time.monotonic()
+
+        with self.lock:
+            entry = self.sessions.pop(sid, None)
+            if entry and now - entry[0] > self.ttl:
+                self.expired += 1
+                entry = None
+            session = entry[1] if entry else SessionState()
+            if entry is None:
+                self.created += 1
+
+            self.sessions[sid] = (now, session)
+            self.evict(now)
+            return session
+
+    def discard(self, sid: str):
+        """Forget a session (on disconnect)"""
+        with self.lock:
+            self.sessions.pop(sid, None)
+
+    def evict(self, now: float):
+        """Drop idle sessions from the LRU end, then any above max_sessions (lock held)"""
+        while self.sessions:
+            sid, (last_seen, _) = next(iter(self.sessions.items()))
+            if now - last_seen <= self.ttl:
+                break
+            del self.sessions[sid]
+            self.expired += 1
+
+        while len(self.sessions) > self.max_sessions:
+            self.sessions.popitem(last=False)
+            self.evicted += 1
+
+    def __len__(self) -> int:
+        with self.lock:
+            return len(self.sessions)
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                'sessions': len(self.sessions),
+                'created': self.created,
+                'expired': self.expired,
+                'evicted': self.evicted
+            }
+
+
+# Sessions of the Socket.IO clients connected to this process
+sessions = SessionStore(
+    max_sessions=int(os.getenv('SESSION_MAX', 10000)),
+    ttl=float(os.getenv('SESSION_TTL', 3600))
+)
@@ -0,0 +1,89 @@
+"""Request coalescing: concurrent identical calls share one execution"""
+
+import threading
+
+
+class Cancelled(Exception):
+    """Raised by a call abandoned on behalf of its own caller.
+
+    The work itself is still wanted by anyone else waiting on it, so
+    followers of a cancelled leader run the call again themselves.
+    """
+
+
+class _Call:
+    """An in-flight call that followers wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Deduplicate concurrent calls that have the same key.
+
+    The first caller for a key (the leader) runs the function; callers that
+    arrive while it is running wait for it and receive the same result or
+    exception. Once the call finishes the key is forgotten, so later calls
+    run again - caching is left to the caller.
+
+    Errors of the types in retry_errors are not handed on: followers of a
+    leader that failed that way run the call again themselves.
+    """
+
+    def __init__(self, retry_errors: tuple = (Cancelled,)):
+        self.retry_errors = retry_errors
+        self.lock = threading.Lock()
+        self.calls = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key, fn, *args, **kwargs) -> tuple:
+        """Run fn(*args, **kwargs) once per in-flight key.
+
+        Returns (result, shared) where shared is True for callers that
+        received another caller's result.
+        """
+        while True:
+            with self.lock:
+                call = self.calls.get(key)
+                if call is not None:
+                    self.coalesced += 1
+                    leader = False
+                else:
+                    call = _Call()
+                    self.calls[key] = call
+                    self.executed += 1
+                    leader = True
+
+            if leader:
+                break
+
+            call.done.wait()
+            if isinstance(call.error, self.retry_errors):
+                continue
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn(*args, **kwargs)
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+            call.done.set()
+
+        return call.result, False
+
+    def stats(self) -> dict:
+        """Return execution/coalescing counters"""
+        with self.lock:
+            return {
+                'in_flight': len(self.calls),
+                'executed': self.executed,
+                'coalesced': self.coalesced
+            }
@@ -1,10 +1,35 @@
 import os
+import re
+import time
 import pandas as pd
-import requests
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from dateutil.parser import parse
 from typing import Optional
+from .alpha_vantage import query_alpha_vantage
 from .base_agent import BaseAgent
+from .cache_policy import BACKGROUND_MAX_WAIT, EXPIRED, FRESH, NEWS_POLICY, STALE, background_refresher
+from .date_coverage import DateCoverage, as_date
+from .news_store import NewsStore
+from .parsed_message import ParsedMessage
+from .rate_limiter import BACKGROUND, INTERACTIVE, RateLimitExceeded
+from .sentiment_rollup import format_score, resample, summarize
+
+# Articles requested per NEWS_SENTIMENT call
+NEWS_FETCH_LIMIT = 50
+
+# Long ranges are backfilled in windows of about this many days; a window that
+# hits the (API maximum) limit is split in half until it fits
+NEWS_BACKFILL_WINDOW_DAYS = int(os.getenv('NEWS_BACKFILL_WINDOW_DAYS', 30))
+NEWS_BACKFILL_LIMIT = 1000
+_backfill_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv('NEWS_BACKFILL_WORKERS', 4)), thread_name_prefix='news-backfill'
+)
+
+# "How has TSLA sentiment moved this month?" is answered from the daily rollup
+SENTIMENT_TREND_PATTERN = re.compile(
+    r'\b(trend\w*|moved?|moving|changed?|changing|shift\w*|over time|evolv\w*|history)\b', re.IGNORECASE
+)
 
 class StockNewsAgent(BaseAgent):
     """Agent for fetching stock news and sentiment data"""
@@ -12,15 +37,29 @@ class StockNewsAgent(BaseAgent):
     def __init__(self):
         super().__init__("Stock News Agent")
         self.api_key = os.getenv('ALPHA_VANTAGE_API_KEY')
-        self.data_folder = 'data'
+        self.data_folder = os.getenv('DATA_FOLDER', 'data')
         
         # Create data folder if it doesn't exist
         if not os.path.exists(self.data_folder):
             os.makedirs(self.data_folder)
+        
+        self.news_store = NewsStore(os.path.join(self.data_folder, 'news.db'))
     
     def process_request(self, message: str, context: Optional[dict] = None) -> dict:
         """Process stock news request"""
+        return self.process_parsed(self.parse_message(message))
+    
+    def parse_message(self, message: str) -> ParsedMessage:
+        """Extract the ticker and date range from a raw message"""
         ticker = self.extract_ticker_from_text(message)
+        date_range = self.extract_date_range_from_text(message) if ticker else None
+        return ParsedMessage(text=message, intent="stock_news", ticker=ticker,
+                             tickers=[ticker] if ticker else [], date_range=date_range,
+                             search_terms=self.extract_search_terms(message))
+    
+    def process_parsed(self, parsed: ParsedMessage) -> dict:
+        """Process stock news request from an already parsed message"""
+        ticker = parsed.ticker
         
         if not ticker:
             return {
@@ -28,15 +67,29 @@ class StockNewsAgent(BaseAgent):
                 'data': None
             }
         
-        # Extract date range from message
-        date_range = self.extract_date_range_from_text(message)
+        # Fall back to the default window (last 30 days) when no range was parsed
+        date_range = parsed.date_range or self.default_date_range()
+        
+        # Other tickers in the message are warmed with one batch call in the background
+        other_tickers = [t for t in parsed.tickers if t != ticker]
+        if other_tickers:
+            background_refresher.submit(('news-batch', tuple(other_tickers)), self.fetch_news_batch,
+                                        other_tickers, BACKGROUND)
         
         try:
+            if self.is_sentiment_trend_request(parsed.text):
+                print(f"DEBUG: Processing sentiment trend request for {ticker} with date range: {date_range}")
+                return {
+                    'message': f"Here's how news sentiment for {ticker} has moved:",
+                    'data': {'news_data': self.get_sentiment_trend(ticker, date_range)}
+                }
+            
             print(f"DEBUG: Processing news request for {ticker} with date range: {date_range}")
-            news_data = self.get_news_data(ticker, date_range)
+            news_data = self.get_news_data(ticker, date_range, parsed.search_terms)
             if news_data:
+                mentioning = f" mentioning '{parsed.search_terms}'" if parsed.search_terms else ""
                 return {
-                    'message': f"Here's the latest news for {ticker}:",
+                    'message': f"Here's the latest news for {ticker}{mentioning}:",
                     'data': {'news_data': news_data}
                 }
             else:
@@ -45,6 +98,11 @@ class StockNewsAgent(BaseAgent):
                     'data': None
                 }
                 
+        except RateLimitExceeded as e:
+            return {
+                'message': self.rate_limit_message(e),
+                'data': None
+            }
         except Exception as e:
             print(f"Error processing stock news request: {e}")
             return {
@@ -52,6 +110,29 @@ class StockNewsAgent(BaseAgent):
                 'data': None
             }
     
+    def default_date_range(self) -> dict:
+        """Default news window: the last 30 days"""
+        end_date = datetime.now()
+        start_date = end_date - timedelta(days=30)
+        return {
+            'start_date': start_date.strftime('%Y-%m-%d'),
+            'end_date': end_date.strftime('%Y-%m-%d')
+        }
+    
+    def is_sentiment_trend_request(self, text: str) -> bool:
+        return 'sentiment' in text.lower() and SENTIMENT_TREND_PATTERN.search(text) is not None
+    
+    def extract_search_terms(self, text: str) -> Optional[str]:
+        """Topic filter from phrases like "news on AAPL mentioning tariffs" """
+        match = re.search(r'\b(?:mentioning|mentions|containing|regarding)\s+(["\']?)([^"\'?.!,]+)\1',
+                          text, re.IGNORECASE)
+        if not match:
+            return None
+        # Stop at a trailing date clause ("... tariffs from March to April")
+        terms = re.split(r'\s+(?:from|in|over|during|since|last|between)\s+', match.group(2).strip(),
+                         maxsplit=1, flags=re.IGNORECASE)[0]
+        return terms.strip() or None
+    
     def extract_date_range_from_text(self, text: str) -> dict:
         """Extract date range from text message"""
         # Default to last 30 days (from 30 days ago to today)
@@ -140,147 +221,335 @@ class StockNewsAgent(BaseAgent):
             'end_date': end_date.strftime('%Y-%m-%d')
         }
     
-    def get_news_data(self, ticker: str, date_range: dict) -> str:
-        """Get news data for ticker within date range"""
+    def get_news_data(self, ticker: str, date_range: dict, search: Optional[str] = None) -> str:
+        """Get news data for ticker within date range, optionally only articles matching search"""
         try:
-            # Check cache first
-            cache_file = os.path.join(self.data_folder, f"{ticker}_news.csv")
+            self.migrate_legacy_cache(ticker)
+            
+            # Fill older parts of the range the store has never fetched
+            failed_windows = self.backfill_range(ticker, date_range)
+            
+            # Check the store first
             cached_data = None
+            filtered_df = self.load_cached_news(ticker, date_range, search)
             
-            if os.path.exists(cache_file):
-                df = pd.read_csv(cache_file)
-                df['Date'] = pd.to_datetime(df['Date'])
+            if not filtered_df.empty:
+                cached_data = self.format_news_data(filtered_df, ticker)
+                if failed_windows:
+                    cached_data += "⚠️ Part of this date range could not be fetched yet (API rate limit). Ask again later to fill it in.\n"
+                print(f"DEBUG: Found {len(filtered_df)} stored news items for {ticker}")
                 
-                start_date = pd.to_datetime(date_range['start_date'])
-                end_date = pd.to_datetime(date_range['end_date'])
-                
-                # Filter by date range
-                filtered_df = df[(df['Date'] >= start_date) & (df['Date'] <= end_date)]
-                
-                if not filtered_df.empty:
-                    cached_data = self.format_news_data(filtered_df, ticker)
-                    print(f"DEBUG: Found {len(filtered_df)} cached news items for {ticker}")
-                    print(f"DEBUG: Returning cached data for {ticker}")
+                # Serve fresh or stale entries right away; stale ones refresh in the background
+                freshness = self.news_freshness(ticker, date_range)
+                if freshness == STALE:
+                    background_refresher.submit(('news', ticker), self.refresh_news, ticker)
+                if freshness != EXPIRED:
+                    print(f"DEBUG: Returning {freshness} stored data for {ticker}")
                     return cached_data
-                else:
-                    print(f"DEBUG: No cached data found for {ticker} in date range {date_range['start_date']} to {date_range['end_date']}")
+                print(f"DEBUG: Stored news for {ticker} has expired, refetching")
             else:
-                print(f"DEBUG: No cache file found for {ticker}")
+                print(f"DEBUG: No stored news for {ticker} in date range {date_range['start_date']} to {date_range['end_date']}")
             
-            # Fetch from API only if no cached data was found
-            print(f"DEBUG: Fetching from Alpha Vantage API for {ticker}")
-            url = f"https://www.alphavantage.co/query"
-            params = {
-                'function': 'NEWS_SENTIMENT',
-                'tickers': ticker,
-                'apikey': self.api_key,
-                'limit': 50
-            }
+            # A fully fetched range with no rows simply had no news
+            if cached_data is None and not self.coverage_gaps(ticker, date_range):
+                return self.no_news_message(ticker, date_range, search)
             
-            response = requests.get(url, params=params)
-            data = response.json()
+            # Fetch from API when the store has nothing usable
+            print(f"DEBUG: Fetching from Alpha Vantage API for {ticker}")
+            try:
+                data = self.fetch_news(ticker)
+            except RateLimitExceeded:
+                if cached_data:
+                    print(f"DEBUG: Rate limited, returning expired stored data for {ticker}")
+                    return cached_data
+                raise
             
             print(f"DEBUG: Alpha Vantage API response keys: {list(data.keys())}")
             
             if 'feed' in data:
-                news_items = data['feed']
-                print(f"DEBUG: Found {len(news_items)} news items from API")
-                
-                # Save to cache
-                self.save_news_to_cache(ticker, news_items)
-                
-                # Filter by date range
-                filtered_news = self.filter_news_by_date(news_items, date_range)
-                print(f"DEBUG: After date filtering: {len(filtered_news)} news items")
-                
-                if filtered_news:
-                    return self.format_api_news_data(filtered_news, ticker)
-                else:
-                    return f"No news found for {ticker} in the date range {date_range['start_date']} to {date_range['end_date']}. Try a different date range or check if the dates are in the future."
+                print(f"DEBUG: Found {len(data['feed'])} news items from API")
+                filtered_df = self.load_cached_news(ticker, date_range, search)
+                if not filtered_df.empty:
+                    return self.format_news_data(filtered_df, ticker)
+                return self.no_news_message(ticker, date_range, search)
             else:
                 print(f"DEBUG: API response error: {data}")
                 return f"Error retrieving news from Alpha Vantage API. Response: {data}"
                 
+        except RateLimitExceeded:
+            raise
         except Exception as e:
             print(f"Error fetching news data: {e}")
             return "Unable to retrieve news data due to an error."
     
-    def save_news_to_cache(self, ticker: str, news_items: list):
-        """Save news data to CSV cache"""
+    def sync_news(self, ticker: str, date_range: dict) -> int:
+        """Bring the store up to date for the range; returns the number of failed backfill windows"""
+        self.migrate_legacy_cache(ticker)
+        failed_windows = self.backfill_range(ticker, date_range)
+        
+        freshness = self.news_freshness(ticker, date_range)
+        if freshness == STALE:
+            background_refresher.submit(('news', ticker), self.refresh_news, ticker)
+        elif freshness == EXPIRED:
+            try:
+                self.fetch_news(ticker)
+            except RateLimitExceeded:
+                if not self.news_store.article_count(ticker):
+                    raise
+                print(f"DEBUG: Rate limited, using expired stored news for {ticker}")
+        return failed_windows
+    
+    def get_sentiment_trend(self, ticker: str, date_range: dict) -> str:
+        """Daily or weekly sentiment over the range, read from the rollup"""
+        failed_windows = self.sync_news(ticker, date_range)
+        daily = self.news_store.daily_sentiment(ticker, date_range['start_date'], date_range['end_date'])
+        if daily.empty:
+            return self.no_news_message(ticker, date_range)
+        
+        days = (pd.to_datetime(date_range['end_date']) - pd.to_datetime(date_range['start_date'])).days + 1
+        periods, label = (daily, 'day') if days <= 14 else (resample(daily, 'W-MON'), 'week of')
+        
+        overall = summarize(daily)
+        result = f"News sentiment for {ticker} from {date_range['start_date']} to {date_range['end_date']}:\n\n"
+        result += (f"📊 {overall['articles']} articles, weighted score {format_score(overall['weighted_score'])} "
+                   f"(mean {format_score(overall['mean_score'])}), "
+                   f"{overall['bullish']} bullish / {overall['bearish']} bearish\n\n")
+        for period_start, row in periods.iterrows():
+            result += (f"📅 {label} {period_start.strftime('%Y-%m-%d')}: {int(row['articles'])} articles, "
+                       f"weighted {format_score(row['weighted_score'])} "
+                       f"(🟢 {int(row['bullish'])} / 🔴 {int(row['bearish'])})\n")
+        
+        if len(periods) > 1:
+            first, last = periods['weighted_score'].iloc[0], periods['weighted_score'].iloc[-1]
+            if not (pd.isna(first) or pd.isna(last)):
+                direction = "improved" if last > first else "weakened" if last < first else "held steady"
+                result += f"\n📈 Sentiment {direction} from {format_score(first)} to {format_score(last)}\n"
+        
+        result += "\nScores run from -1 (bearish) to +1 (bullish), weighted by each article's relevance.\n"
+        if failed_windows:
+            result += "⚠️ Part of this date range could not be fetched yet (API rate limit). Ask again later to fill it in.\n"
+        return result
+    
+    def sentiment_summary(self, ticker: str, days: int = 30, recent_days: int = 7) -> Optional[str]:
+        """One-line numeric sentiment summary for advice context, or None without news"""
+        end = datetime.now()
+        date_range = {
+            'start_date': (end - timedelta(days=days - 1)).strftime('%Y-%m-%d'),
+            'end_date': end.strftime('%Y-%m-%d')
+        }
+        self.sync_news(ticker, date_range)
+        
+        daily = self.news_store.daily_sentiment(ticker, date_range['start_date'], date_range['end_date'])
+        overall = summarize(daily)
+        if not overall['articles']:
+            return None
+        
+        recent_start = pd.Timestamp((end - timedelta(days=recent_days - 1)).date())
+        recent = summarize(daily[daily.index >= recent_start])
+        earlier = summarize(daily[daily.index < recent_start])
+        return (f"{ticker} news sentiment (scores -1 bearish to +1 bullish, relevance-weighted): "
+                f"last {days} days {overall['articles']} articles, weighted {format_score(overall['weighted_score'])}, "
+                f"mean {format_score(overall['mean_score'])}, {overall['bullish']} bullish / {overall['bearish']} bearish; "
+                f"last {recent_days} days {recent['articles']} articles, weighted {format_score(recent['weighted_score'])} "
+                f"vs {format_score(earlier['weighted_score'])} before")
+    
+    def no_news_message(self, ticker: str, date_range: dict, search: Optional[str] = None) -> str:
+        mentioning = f" mentioning '{search}'" if search else ""
+        return f"No news found for {ticker}{mentioning} in the date range {date_range['start_date']} to {date_range['end_date']}. Try a different date range or check if the dates are in the future."
+    
+    def load_cached_news(self, ticker: str, date_range: dict, search: Optional[str] = None) -> pd.DataFrame:
+        """Stored articles for ticker within the date range (indexed seek, FTS filter if searching)"""
+        return self.news_store.articles_for(
+            ticker, date_range['start_date'], date_range['end_date'], search=fts_query(search)
+        )
+    
+    def migrate_legacy_cache(self, ticker: str):
+        """Import a {TICKER}_news.csv written by older versions the first time the ticker is used"""
+        csv_path = os.path.join(self.data_folder, f"{ticker}_news.csv")
+        if not os.path.exists(csv_path) or self.news_store.get_meta(ticker).get('migrated_csv'):
+            return
         try:
-            # Skip if no news items to save
-            if not news_items:
-                print(f"DEBUG: No news items to save for {ticker}")
-                return
-                
-            cache_file = os.path.join(self.data_folder, f"{ticker}_news.csv")
-            
-            # Convert to DataFrame
-            rows = []
-            for item in news_items:
-                # Extract relevant ticker sentiment
-                ticker_sentiment = None
-                relevance = 0
-                
-                if 'ticker_sentiment' in item:
-                    for ts in item['ticker_sentiment']:
-                        if ts['ticker'] == ticker:
-                            ticker_sentiment = ts['ticker_sentiment_label']
-                            relevance = float(ts['relevance_score'])
-                            break
-                
-                rows.append({
-                    'Date': item['time_published'][:8],  # YYYYMMDD format
-                    'title': item['title'],
-                    'description': item['summary'][:500],  # Truncate long descriptions
-                    'url': item['url'],
-                    'source': item['source'],
-                    'sentiment': ticker_sentiment or 'Neutral',
-                    'relevance': relevance
-                })
-            
-            # Skip if no rows were created
-            if not rows:
-                print(f"DEBUG: No valid rows created for {ticker}")
-                return
-            
-            new_df = pd.DataFrame(rows)
-            new_df['Date'] = pd.to_datetime(new_df['Date'], format='%Y%m%d')
-            
-            # If cache exists, merge with existing data
-            if os.path.exists(cache_file):
-                existing_df = pd.read_csv(cache_file)
-                existing_df['Date'] = pd.to_datetime(existing_df['Date'])
-                
-                # Combine and remove duplicates
-                combined_df = pd.concat([existing_df, new_df]).drop_duplicates(subset=['title', 'Date'])
-                combined_df = combined_df.sort_values('Date', ascending=False)
-            else:
-                combined_df = new_df.sort_values('Date', ascending=False)
-            
-            # Save to cache
-            combined_df.to_csv(cache_file, index=False)
-            print(f"DEBUG: Saved {len(rows)} news items to cache for {ticker}")
-            
+            rows = self.news_store.migrate_csv(csv_path, ticker)
+            self.news_store.update_meta(ticker, lambda meta: dict(meta, migrated_csv=True))
+            print(f"DEBUG: Imported {rows} cached news rows for {ticker} into the news store")
         except Exception as e:
-            print(f"Error saving news to cache: {e}")
+            print(f"Error importing news cache for {ticker}: {e}")
     
-    def filter_news_by_date(self, news_items: list, date_range: dict) -> list:
-        """Filter news items by date range"""
-        try:
-            start_date = datetime.strptime(date_range['start_date'], '%Y-%m-%d')
-            end_date = datetime.strptime(date_range['end_date'], '%Y-%m-%d')
+    def fetch_news(self, ticker: str, priority: int = INTERACTIVE) -> dict:
+        """Fetch articles published since the ticker's watermark and store them"""
+        params = {
+            'function': 'NEWS_SENTIMENT',
+            'tickers': ticker,
+            'apikey': self.api_key,
+            'limit': NEWS_FETCH_LIMIT
+        }
+        
+        watermark = self.news_store.get_meta(ticker).get('watermark')
+        if watermark:
+            # time_from has minute precision; repeats are ignored by the URL key
+            params['time_from'] = watermark[:13]
+        
+        max_wait = BACKGROUND_MAX_WAIT if priority == BACKGROUND else None
+        data = query_alpha_vantage(params, priority=priority, max_wait=max_wait)
+        
+        if 'feed' in data:
+            news_items = data['feed']
+            new_articles = self.news_store.store_articles(news_items)
+            print(f"DEBUG: Stored {new_articles} new articles for {ticker}")
             
-            filtered_items = []
-            for item in news_items:
-                item_date = datetime.strptime(item['time_published'][:8], '%Y%m%d')
-                if start_date <= item_date <= end_date:
-                    filtered_items.append(item)
+            truncated = len(news_items) >= NEWS_FETCH_LIMIT
+            if watermark and truncated:
+                print(f"DEBUG: {ticker} news since {watermark} exceeded {NEWS_FETCH_LIMIT} items; older ones were skipped")
             
-            return filtered_items
-        except Exception as e:
-            print(f"Error filtering news by date: {e}")
-            return news_items  # Return all if filtering fails
+            def record_fetch(meta):
+                # Record the days this response is complete for
+                coverage = DateCoverage.from_json(meta.get('coverage'))
+                if watermark and not truncated:
+                    coverage.add(as_date(watermark[:8]), datetime.now().date())
+                elif news_items:
+                    oldest = as_date(min(item['time_published'][:8] for item in news_items))
+                    coverage.add(oldest + timedelta(days=1) if truncated else oldest, datetime.now().date())
+                return dict(advance_watermark(meta, news_items), coverage=coverage.to_json(), fetched_at=time.time())
+            
+            self.news_store.update_meta(ticker, record_fetch)
+        return data
+    
+    def coverage_gaps(self, ticker: str, date_range: dict) -> list:
+        """Parts of the (past) date range that have never been fetched completely"""
+        start = as_date(date_range['start_date'])
+        end = min(as_date(date_range['end_date']), datetime.now().date())
+        if end < start:
+            return []
+        return DateCoverage.from_json(self.news_store.get_meta(ticker).get('coverage')).gaps(start, end)
+    
+    def backfill_range(self, ticker: str, date_range: dict, priority: int = INTERACTIVE) -> int:
+        """Fetch uncovered parts of the range older than yesterday; returns the number of failed windows.
+        
+        Gaps that only touch the last day are left to the watermark refresh.
+        """
+        recent = datetime.now().date() - timedelta(days=1)
+        gaps = self.coverage_gaps(ticker, date_range)
+        if not any(start < recent for start, _ in gaps):
+            return 0
+        
+        windows = [window for start, end in gaps for window in split_windows(start, end, NEWS_BACKFILL_WINDOW_DAYS)]
+        print(f"DEBUG: Backfilling {ticker} news in {len(windows)} windows: {gaps}")
+        futures = [_backfill_executor.submit(self.fetch_news_window, ticker, start, end, priority)
+                   for start, end in windows]
+        
+        news_items, covered, failed = [], [], 0
+        for future in futures:
+            try:
+                window_items, window_covered = future.result()
+                news_items.extend(window_items)
+                covered.extend(window_covered)
+            except RateLimitExceeded as e:
+                failed += 1
+                print(f"DEBUG: News backfill window for {ticker} skipped: {e}")
+        
+        self.store_backfill(ticker, news_items, covered)
+        return failed
+    
+    def fetch_news_window(self, ticker: str, start, end, priority: int = INTERACTIVE) -> tuple:
+        """Fetch every article in [start, end]; returns (items, covered intervals)"""
+        params = {
+            'function': 'NEWS_SENTIMENT',
+            'tickers': ticker,
+            'apikey': self.api_key,
+            'time_from': start.strftime('%Y%m%dT0000'),
+            'time_to': end.strftime('%Y%m%dT2359'),
+            'limit': NEWS_BACKFILL_LIMIT
+        }
+        
+        max_wait = BACKGROUND_MAX_WAIT if priority == BACKGROUND else None
+        data = query_alpha_vantage(params, priority=priority, max_wait=max_wait)
+        news_items = data.get('feed')
+        if news_items is None:
+            print(f"DEBUG: No feed for {ticker} news {start} to {end}: {data}")
+            return [], []
+        
+        if len(news_items) < NEWS_BACKFILL_LIMIT:
+            return news_items, [(start, end)]
+        if start == end:
+            # A single day over the limit; keep what we got but leave it uncovered
+            return news_items, []
+        
+        middle = start + (end - start) // 2
+        older_items, older_covered = self.fetch_news_window(ticker, start, middle, priority)
+        newer_items, newer_covered = self.fetch_news_window(ticker, middle + timedelta(days=1), end, priority)
+        return older_items + newer_items, older_covered + newer_covered
+    
+    def store_backfill(self, ticker: str, news_items: list, covered: list):
+        """Store backfilled articles and record the windows that are now complete"""
+        self.news_store.store_articles(news_items)
+        
+        def record_backfill(meta):
+            coverage = DateCoverage.from_json(meta.get('coverage'))
+            for start, end in covered:
+                coverage.add(start, end)
+            meta = dict(advance_watermark(meta, news_items), coverage=coverage.to_json())
+            if coverage.covers(datetime.now().date()):
+                meta['fetched_at'] = time.time()
+            return meta
+        
+        self.news_store.update_meta(ticker, record_backfill)
+    
+    def fetch_news_batch(self, tickers: list, priority: int = INTERACTIVE) -> int:
+        """Warm the news store for several tickers with one upstream call.
+        
+        NEWS_SENTIMENT's comma-separated `tickers` only returns articles that
+        mention every listed ticker, so a batch asks for the latest
+        market-wide articles instead. Every article is stored once with the
+        sentiment of each ticker it mentions. A feed below the article limit
+        holds every article published from its oldest one until now, so that
+        span is recorded as covered (and fetched now) for each ticker and
+        their own requests for it are answered from the store. A full feed
+        may have cut off articles anywhere in its span, so nothing is
+        recorded for it. Returns the new article count.
+        """
+        tickers = [ticker.upper() for ticker in tickers]
+        if len(tickers) == 1:
+            before = self.news_store.article_count(tickers[0])
+            self.fetch_news(tickers[0], priority)
+            return self.news_store.article_count(tickers[0]) - before
+        
+        params = {
+            'function': 'NEWS_SENTIMENT',
+            'apikey': self.api_key,
+            'limit': NEWS_BACKFILL_LIMIT
+        }
+        
+        max_wait = BACKGROUND_MAX_WAIT if priority == BACKGROUND else None
+        data = query_alpha_vantage(params, priority=priority, max_wait=max_wait)
+        news_items = data.get('feed')
+        if news_items is None:
+            print(f"DEBUG: No feed for batch news fetch of {tickers}: {data}")
+            return 0
+        new_articles = self.news_store.store_articles(news_items)
+        print(f"DEBUG: Batch news fetch stored {new_articles} new articles")
+        if not news_items or len(news_items) >= NEWS_BACKFILL_LIMIT:
+            return new_articles
+        
+        oldest = as_date(min(item['time_published'][:8] for item in news_items))
+        
+        def record_batch(meta):
+            coverage = DateCoverage.from_json(meta.get('coverage'))
+            coverage.add(oldest, datetime.now().date())
+            return dict(advance_watermark(meta, news_items), coverage=coverage.to_json(), fetched_at=time.time())
+        
+        for ticker in tickers:
+            self.news_store.update_meta(ticker, record_batch)
+        return new_articles
+    
+    def refresh_news(self, ticker: str):
+        """Background revalidation of stale stored news"""
+        self.fetch_news(ticker, priority=BACKGROUND)
+    
+    def news_freshness(self, ticker: str, date_range: dict) -> str:
+        """Cache state for a request; ranges that ended before yesterday no longer change"""
+        if pd.to_datetime(date_range['end_date']).date() < datetime.now().date() - timedelta(days=1):
+            return FRESH
+        return NEWS_POLICY.freshness(self.news_store.get_meta(ticker).get('fetched_at'))
     
     def format_news_data(self, df: pd.DataFrame, ticker: str) -> str:
         """Format news data from DataFrame"""
@@ -299,33 +568,37 @@ class StockNewsAgent(BaseAgent):
             result += f"🌐 {row['url']}\n\n"
         
         return result
+
+
+def advance_watermark(meta: dict, news_items: list) -> dict:
+    """Move the watermark (newest stored publish time) forward over news_items"""
+    if not news_items:
+        return meta
+    newest = max(item['time_published'] for item in news_items)
+    return dict(meta, watermark=max(newest, meta.get('watermark') or ''))
+
+
+def fts_query(search: Optional[str]) -> Optional[str]:
+    """Turn free text into an FTS5 query matching all of its words"""
+    if not search:
+        return None
+    words = re.findall(r"[\w'-]+", search)
+    return ' '.join('"' + word.replace('"', '') + '"' for word in words) or None
+
+
+def split_windows(start, end, days: int) -> list:
+    """Split [start, end] into consecutive windows of about `days` days.
     
-    def format_api_news_data(self, news_items: list, ticker: str) -> str:
-        """Format news data from API response"""
-        result = f"Recent news for {ticker}:\n\n"
-        
-        for item in news_items[:5]:  # Show top 5 items
-            # Extract ticker sentiment
-            sentiment = 'Neutral'
-            relevance = 0
-            
-            if 'ticker_sentiment' in item:
-                for ts in item['ticker_sentiment']:
-                    if ts['ticker'] == ticker:
-                        sentiment = ts['ticker_sentiment_label']
-                        relevance = float(ts['relevance_score'])
-                        break
-            
-            # Format date
-            date_str = item['time_published'][:8]
-            formatted_date = f"{date_str[:4]}-{date_str[4:6]}-{date_str[6:8]}"
-            
-            result += f"📰 {item['title']}\n"
-            result += f"📅 {formatted_date}\n"
-            result += f"📊 Sentiment: {sentiment}\n"
-            result += f"📈 Relevance: {relevance:.2f}\n"
-            result += f"🔗 Source: {item['source']}\n"
-            result += f"📝 {item['summary'][:200]}...\n"
-            result += f"🌐 {item['url']}\n\n"
-        
-        return result 
\ No newline at end of file
+    A last window shorter than a quarter of `days` is merged into the one
+    before it, so a range just over a window (like the default news range,
+    the last 30 days plus today) still costs a single call.
+    """
+    windows = []
+    while start <= end:
+        window_end = min(start + timedelta(days=days - 1), end)
+        if windows and (window_end - start).days + 1 < days // 4:
+            windows[-1] = (windows[-1][0], window_end)
+        else:
+            windows.append((start, window_end))
+        start = window_end + timedelta(days=1)
+    return windows
@@ -1,9 +1,21 @@
 import os
+import numpy as np
 import pandas as pd
-import requests
 from datetime import datetime, timedelta
 from dateutil.parser import parse
+from .alpha_vantage import query_alpha_vantage
 from .base_agent import BaseAgent
+from .cache_policy import BACKGROUND_MAX_WAIT, EXPIRED, FRESH, QUOTE_POLICY, STALE, background_refresher
+from .date_coverage import EARLIEST_DATE, as_date
+from .market_calendar import nyse_calendar
+from .parsed_message import ParsedMessage
+from .price_cache import PriceHistory, price_cache
+from .price_store import PriceStore
+from .rate_limiter import BACKGROUND, INTERACTIVE, RateLimitExceeded
+
+# Alpha Vantage's compact output is the latest 100 trading days; leave room for
+# a session that has closed but not been published yet
+COMPACT_TRADING_DAYS = 95
 
 class StockQuoteAgent(BaseAgent):
     """Agent for fetching stock quotes and price data"""
@@ -11,7 +23,8 @@ class StockQuoteAgent(BaseAgent):
     def __init__(self):
         super().__init__("Stock Quote Agent")
         self.api_key = os.getenv('ALPHA_VANTAGE_API_KEY')
-        self.data_folder = 'data'
+        self.data_folder = os.getenv('DATA_FOLDER', 'data')
+        self.price_store = PriceStore(os.path.join(self.data_folder, 'prices'))
         
         # Create data folder if it doesn't exist
         if not os.path.exists(self.data_folder):
@@ -19,7 +32,18 @@ class StockQuoteAgent(BaseAgent):
     
     def process_request(self, message: str, context: dict = None) -> dict:
         """Process stock quote request"""
+        return self.process_parsed(self.parse_message(message))
+    
+    def parse_message(self, message: str) -> ParsedMessage:
+        """Extract the ticker and optional date from a raw message"""
         ticker = self.extract_ticker_from_text(message)
+        date_str = self.extract_date_from_text(message) if ticker else None
+        return ParsedMessage(text=message, intent="stock_quote", ticker=ticker,
+                             tickers=[ticker] if ticker else [], date=date_str)
+    
+    def process_parsed(self, parsed: ParsedMessage) -> dict:
+        """Process stock quote request from an already parsed message"""
+        ticker = parsed.ticker
         
         if not ticker:
             return {
@@ -27,8 +51,7 @@ class StockQuoteAgent(BaseAgent):
                 'data': None
             }
         
-        # Extract date from message if present
-        date_str = self.extract_date_from_text(message)
+        date_str = parsed.date
         
         try:
             if date_str:
@@ -65,6 +88,11 @@ class StockQuoteAgent(BaseAgent):
                         'data': None
                     }
                     
+        except RateLimitExceeded as e:
+            return {
+                'message': self.rate_limit_message(e),
+                'data': None
+            }
         except Exception as e:
             print(f"Error processing stock quote request: {e}")
             return {
@@ -109,44 +137,39 @@ class StockQuoteAgent(BaseAgent):
     
     def get_current_data(self, ticker: str) -> str:
         """Get current stock data"""
+        cached = None
         try:
-            # First try to get from cache (today's data)
-            cache_file = os.path.join(self.data_folder, f"{ticker}_data.csv")
+            # First try to get from cache (data for the last completed session)
+            history = self.load_history(ticker)
             
-            if os.path.exists(cache_file):
-                df = pd.read_csv(cache_file)
-                df['Date'] = pd.to_datetime(df['Date'])
-                latest_date = df['Date'].max()
+            if history is not None and len(history):
+                cached = self.format_stock_data(history.row(len(history) - 1), ticker)
                 
-                # If we have today's data, return it
-                if latest_date.date() == datetime.now().date():
-                    latest_row = df[df['Date'] == latest_date].iloc[0]
-                    return self.format_stock_data(latest_row, ticker)
-            
-            # Fetch from API
-            url = f"https://www.alphavantage.co/query"
-            params = {
-                'function': 'TIME_SERIES_DAILY',
-                'symbol': ticker,
-                'apikey': self.api_key,
-                'outputsize': 'compact'
-            }
+                # Up to date, checked recently (bar not published yet) or stale: answer from cache
+                freshness = self.quote_freshness(ticker, history)
+                if freshness == STALE:
+                    background_refresher.submit(('quote', ticker), self.refresh_current_data, ticker)
+                if freshness != EXPIRED:
+                    return cached
             
-            response = requests.get(url, params=params)
-            data = response.json()
+            # Fetch from API; an expired quote still beats none when the quota is used up
+            try:
+                time_series = self.fetch_time_series(ticker, 'compact')
+            except RateLimitExceeded:
+                if cached is None:
+                    raise
+                print(f"DEBUG: Rate limited, returning expired stored quote for {ticker}")
+                latest_date = pd.Timestamp(history.latest_date).strftime('%Y-%m-%d')
+                return cached + f"⚠️ This is the last stored close ({latest_date}); newer prices could not be fetched yet (API rate limit).\n"
             
-            if 'Time Series (Daily)' in data:
-                time_series = data['Time Series (Daily)']
+            if time_series:
                 latest_date = max(time_series.keys())
-                latest_data = time_series[latest_date]
-                
-                # Save to cache
-                self.save_to_cache(ticker, {latest_date: latest_data})
-                
-                return self.format_current_data(latest_data, ticker, latest_date)
+                return self.format_current_data(time_series[latest_date], ticker, latest_date)
             else:
                 return None
                 
+        except RateLimitExceeded:
+            raise
         except Exception as e:
             print(f"Error fetching current data: {e}")
             return None
@@ -155,84 +178,150 @@ class StockQuoteAgent(BaseAgent):
         """Get historical stock data for specific date"""
         try:
             # Check cache first
-            cache_file = os.path.join(self.data_folder, f"{ticker}_data.csv")
-            
-            if os.path.exists(cache_file):
-                df = pd.read_csv(cache_file)
-                df['Date'] = pd.to_datetime(df['Date'])
-                
-                target_date = pd.to_datetime(date_str)
-                matching_rows = df[df['Date'].dt.date == target_date.date()]
-                
-                if not matching_rows.empty:
-                    row = matching_rows.iloc[0]
-                    return self.format_stock_data(row, ticker)
-            
-            # Fetch from API if not in cache
-            url = f"https://www.alphavantage.co/query"
-            params = {
-                'function': 'TIME_SERIES_DAILY',
-                'symbol': ticker,
-                'apikey': self.api_key,
-                'outputsize': 'full'
-            }
+            history = self.load_history(ticker)
             
-            response = requests.get(url, params=params)
-            data = response.json()
+            if history is not None:
+                index = history.index_of(date_str)
+                if index is not None:
+                    return self.format_stock_data(history.row(index), ticker)
             
-            if 'Time Series (Daily)' in data:
-                time_series = data['Time Series (Daily)']
-                
-                # Save all data to cache
-                self.save_to_cache(ticker, time_series)
+            # Fetch only as much history as the missing date needs
+            outputsize = self.plan_fetch(ticker, date_str)
+            if outputsize:
+                print(f"DEBUG: Fetching {outputsize} history for {ticker} to cover {date_str}")
+                time_series = self.fetch_time_series(ticker, outputsize)
+                if time_series is None:
+                    return None
                 
-                # Find the specific date
                 if date_str in time_series:
-                    stock_data = time_series[date_str]
-                    return self.format_historical_data(stock_data, ticker, date_str)
-                else:
-                    # Check if it's a weekend or potential holiday
-                    return self.get_holiday_message(ticker, date_str, time_series)
-            else:
-                return None
+                    return self.format_historical_data(time_series[date_str], ticker, date_str)
+                history = self.load_history(ticker)
+            
+            # Weekend, holiday or otherwise known to have no data
+            return self.get_holiday_message(ticker, date_str, history)
                 
+        except RateLimitExceeded:
+            raise
         except Exception as e:
             print(f"Error fetching historical data: {e}")
             return None
     
-    def save_to_cache(self, ticker: str, time_series_data: dict):
-        """Save stock data to CSV cache"""
+    def quote_freshness(self, ticker: str, history) -> str:
+        """Cache state of the latest quote for ticker"""
+        fetched_at = self.price_store.fetched_at(ticker)
+        # Nothing newer exists until the next session closes, provided the
+        # latest bar was fetched after its session closed (not a partial one)
+        if history is not None and len(history) and fetched_at:
+            latest_date = as_date(history.latest_date)
+            if latest_date >= nyse_calendar.last_completed_session() and \
+                    fetched_at >= nyse_calendar.session_close(latest_date).timestamp():
+                return FRESH
+        return QUOTE_POLICY.freshness(fetched_at)
+    
+    def sync_prices(self, ticker: str, start_date: str = None):
+        """Bring stored prices for ticker up to date, and back to start_date if given.
+        
+        Returns the stored PriceHistory (None if there is none). Stale data is
+        refreshed in the background; a rate-limited fetch falls back to what
+        is stored, if anything.
+        """
+        history = self.load_history(ticker)
+        
+        outputsize = None
+        if start_date:
+            first_day = nyse_calendar.next_trading_day(start_date)
+            if first_day is not None:
+                outputsize = self.plan_fetch(ticker, first_day.isoformat())
+        
+        freshness = self.quote_freshness(ticker, history)
+        if outputsize is None and freshness == EXPIRED:
+            outputsize = 'compact'
+        elif outputsize is None and freshness == STALE:
+            background_refresher.submit(('quote', ticker), self.refresh_current_data, ticker)
+        
+        if outputsize:
+            try:
+                self.fetch_time_series(ticker, outputsize)
+            except RateLimitExceeded:
+                if history is None or not len(history):
+                    raise
+                print(f"DEBUG: Rate limited, using stored prices for {ticker}")
+            history = self.load_history(ticker)
+        
+        return history
+    
+    def refresh_current_data(self, ticker: str):
+        """Background revalidation of a stale quote"""
+        self.fetch_time_series(ticker, 'compact', priority=BACKGROUND)
+    
+    def plan_fetch(self, ticker: str, date_str: str):
+        """Decide what a cache miss for date_str needs: None, 'compact' or 'full'"""
+        requested = as_date(date_str)
+        last_session = nyse_calendar.last_completed_session()
+        
+        # Closed days, unfinished sessions and ranges already fetched have nothing more to give
+        if not nyse_calendar.is_trading_day(requested) or requested > last_session:
+            return None
+        if self.price_store.coverage(ticker).covers(requested):
+            return None
+        
+        if nyse_calendar.trading_days_between(requested, last_session) < COMPACT_TRADING_DAYS:
+            return 'compact'
+        return 'full'
+    
+    def fetch_time_series(self, ticker: str, outputsize: str, priority: int = INTERACTIVE):
+        """Fetch daily prices, store them with the range they cover and return the raw series"""
+        params = {
+            'function': 'TIME_SERIES_DAILY',
+            'symbol': ticker,
+            'apikey': self.api_key,
+            'outputsize': outputsize
+        }
+        
+        max_wait = BACKGROUND_MAX_WAIT if priority == BACKGROUND else None
+        data = query_alpha_vantage(params, priority=priority, max_wait=max_wait)
+        time_series = data.get('Time Series (Daily)')
+        if not time_series:
+            return None
+        
+        # A full download settles every date before the first row as well
+        covered_from = EARLIEST_DATE if outputsize == 'full' else min(time_series.keys())
+        self.save_to_cache(ticker, time_series, covered=(covered_from, max(time_series.keys())))
+        return time_series
+    
+    def cache_path(self, ticker: str) -> str:
+        """Legacy CSV cache file, only read to migrate it into the price store"""
+        return os.path.join(self.data_folder, f"{ticker}_data.csv")
+    
+    def load_history(self, ticker: str):
+        """Return the cached PriceHistory for ticker (mapped at most once per store write)"""
+        if not self.price_store.exists(ticker) and os.path.exists(self.cache_path(ticker)):
+            self.migrate_csv_cache(ticker)
+        return price_cache.get(ticker, self.price_store.meta_path(ticker), self.read_history_file)
+    
+    def read_history_file(self, path: str):
+        """Memory-map the stored columns for the ticker whose meta.json is at path"""
+        ticker = os.path.basename(os.path.dirname(path))
         try:
-            cache_file = os.path.join(self.data_folder, f"{ticker}_data.csv")
-            
-            # Convert to DataFrame
-            rows = []
-            for date, data in time_series_data.items():
-                rows.append({
-                    'Date': date,
-                    'Open': data['1. open'],
-                    'High': data['2. high'],
-                    'Low': data['3. low'],
-                    'Close': data['4. close'],
-                    'Volume': data['5. volume']
-                })
-            
-            new_df = pd.DataFrame(rows)
-            new_df['Date'] = pd.to_datetime(new_df['Date'])
-            
-            # If cache exists, merge with existing data
-            if os.path.exists(cache_file):
-                existing_df = pd.read_csv(cache_file)
-                existing_df['Date'] = pd.to_datetime(existing_df['Date'])
-                
-                # Combine and remove duplicates
-                combined_df = pd.concat([existing_df, new_df]).drop_duplicates(subset=['Date'])
-                combined_df = combined_df.sort_values('Date', ascending=False)
-            else:
-                combined_df = new_df.sort_values('Date', ascending=False)
-            
-            # Save to cache
-            combined_df.to_csv(cache_file, index=False)
+            return self.price_store.read(ticker)
+        except Exception as e:
+            print(f"Error reading price store for {ticker}: {e}")
+            return None
+    
+    def migrate_csv_cache(self, ticker: str):
+        """Convert a CSV cache written by older versions into the price store"""
+        try:
+            self.price_store.migrate_csv(self.cache_path(ticker), ticker)
+            print(f"DEBUG: Migrated {self.cache_path(ticker)} to the price store")
+        except Exception as e:
+            print(f"Error migrating price cache for {ticker}: {e}")
+    
+    def save_to_cache(self, ticker: str, time_series_data: dict, covered: tuple = None):
+        """Append new or changed rows to the columnar price store"""
+        try:
+            appended = self.price_store.append(ticker, PriceHistory.from_time_series(time_series_data), covered)
+            if appended:
+                print(f"DEBUG: Appended {appended} price rows for {ticker}")
             
         except Exception as e:
             print(f"Error saving to cache: {e}")
@@ -270,49 +359,42 @@ Close: ${float(row['Close']):.2f}
 Volume: {int(row['Volume']):,}
 """
     
-    def get_holiday_message(self, ticker: str, date_str: str, time_series: dict) -> str:
+    def get_holiday_message(self, ticker: str, date_str: str, history) -> str:
         """Generate a meaningful message when stock data is not available for a specific date"""
-        from datetime import datetime
-        
         try:
             # Parse the requested date
-            requested_date = datetime.strptime(date_str, '%Y-%m-%d')
+            requested_date = as_date(date_str)
             day_of_week = requested_date.strftime('%A')
             
             # Check if it's a weekend
             if requested_date.weekday() >= 5:  # Saturday = 5, Sunday = 6
+                previous_session = nyse_calendar.previous_trading_day(requested_date)
+                suggestion = f" such as {previous_session}" if previous_session else ""
                 return f"""
 {ticker} stock data is not available for {date_str} ({day_of_week}).
 
-The stock market is closed on weekends. Please try a weekday date instead.
+The stock market is closed on weekends. Please try a weekday date instead{suggestion}.
 
 💡 Tip: Stock markets typically operate Monday through Friday, excluding holidays.
 """
             
-            # Find the closest trading day with data
-            closest_date = None
-            closest_data = None
-            min_diff = float('inf')
+            holiday = nyse_calendar.holiday_name(requested_date)
+            reason = (f"The market was closed for {holiday}." if holiday
+                      else "This date may be a market holiday, weekend, or the market may have been closed.")
             
-            for available_date, data in time_series.items():
-                try:
-                    avail_date = datetime.strptime(available_date, '%Y-%m-%d')
-                    diff = abs((avail_date - requested_date).days)
-                    if diff < min_diff:
-                        min_diff = diff
-                        closest_date = available_date
-                        closest_data = data
-                except:
-                    continue
+            # Find the closest trading day with data
+            closest_index = self.closest_index(history, requested_date) if history is not None else None
             
-            if closest_date and closest_data:
+            if closest_index is not None:
+                closest_row = history.row(closest_index)
+                closest_date = closest_row['Date'].strftime('%Y-%m-%d')
                 return f"""
 {ticker} stock data is not available for {date_str} ({day_of_week}).
 
-This date may be a market holiday or the market may have been closed.
+{reason}
 
 Here's the closest available trading data from {closest_date}:
-{self.format_historical_data(closest_data, ticker, closest_date)}
+{self.format_stock_data(closest_row, ticker)}
 
 💡 Tip: Stock markets are closed on federal holidays like New Year's Day, Independence Day, Thanksgiving, Christmas, etc.
 """
@@ -320,7 +402,7 @@ Here's the closest available trading data from {closest_date}:
                 return f"""
 {ticker} stock data is not available for {date_str} ({day_of_week}).
 
-This date may be a market holiday, weekend, or the market may have been closed.
+{reason}
 
 💡 Tip: Stock markets are typically closed on weekends and federal holidays.
 """
@@ -332,4 +414,13 @@ This date may be a market holiday, weekend, or the market may have been closed.
 This date may be a market holiday, weekend, or the market may have been closed.
 
 💡 Tip: Stock markets are typically closed on weekends and federal holidays.
-""" 
\ No newline at end of file
+"""
+    
+    def closest_index(self, history, requested_date):
+        """Row index of the cached date nearest to requested_date (binary search, earlier on ties)"""
+        if not len(history):
+            return None
+        target = np.datetime64(as_date(requested_date), 'D')
+        position = int(np.searchsorted(history.dates, target))
+        candidates = [i for i in (position - 1, position) if 0 <= i < len(history)]
+        return min(candidates, key=lambda i: abs(history.dates[i] - target))
@@ -0,0 +1,357 @@
+"""Precompiled ticker lookup tables shared by all agents.
+
+The company name table is compiled once at import time into:
+
+- ``TICKERS``: the set of known ticker symbols for direct mentions
+- an Aho-Corasick automaton that finds every company name in a message
+  in a single pass
+- a substring index that answers the partial (fuzzy) company name match
+  with one dict lookup per word
+"""
+
+from collections import deque
+
+# Comprehensive stock tickers mapping
+TICKER_MAP = {
+    # Technology Companies
+    'APPLE': 'AAPL',
+    'APPLE INC': 'AAPL',
+    'MICROSOFT': 'MSFT',
+    'MICROSOFT CORP': 'MSFT',
+    'MICROSOFT CORPORATION': 'MSFT',
+    'GOOGLE': 'GOOGL',
+    'ALPHABET': 'GOOGL',
+    'ALPHABET INC': 'GOOGL',
+    'AMAZON': 'AMZN',
+    'AMAZON.COM': 'AMZN',
+    'AMAZON COM': 'AMZN',
+    'TESLA': 'TSLA',
+    'TESLA INC': 'TSLA',
+    'TESLA MOTORS': 'TSLA',
+    'META': 'META',
+    'META PLATFORMS': 'META',
+    'FACEBOOK': 'META',
+    'NETFLIX': 'NFLX',
+    'NETFLIX INC': 'NFLX',
+    'PAYPAL': 'PYPL',
+    'PAYPAL HOLDINGS': 'PYPL',
+    'NVIDIA': 'NVDA',
+    'NVIDIA CORP': 'NVDA',
+    'NVIDIA CORPORATION': 'NVDA',
+    'INTEL': 'INTC',
+    'INTEL CORP': 'INTC',
+    'INTEL CORPORATION': 'INTC',
+    'ADOBE': 'ADBE',
+    'ADOBE INC': 'ADBE',
+    'SALESFORCE': 'CRM',
+    'SALESFORCE.COM': 'CRM',
+    'ORACLE': 'ORCL',
+    'ORACLE CORP': 'ORCL',
+    'ORACLE CORPORATION': 'ORCL',
+    'IBM': 'IBM',
+    'INTERNATIONAL BUSINESS MACHINES': 'IBM',
+    'CISCO': 'CSCO',
+    'CISCO SYSTEMS': 'CSCO',
+    'QUALCOMM': 'QCOM',
+    'QUALCOMM INC': 'QCOM',
+    'BROADCOM': 'AVGO',
+    'BROADCOM INC': 'AVGO',
+    'ADVANCED MICRO DEVICES': 'AMD',
+    'AMD': 'AMD',
+    
+    # Financial Services
+    'BERKSHIRE HATHAWAY': 'BRK.A',
+    'BERKSHIRE': 'BRK.A',
+    'JPMORGAN': 'JPM',
+    'JP MORGAN': 'JPM',
+    'JPMORGAN CHASE': 'JPM',
+    'BANK OF AMERICA': 'BAC',
+    'WELLS FARGO': 'WFC',
+    'GOLDMAN SACHS': 'GS',
+    'MORGAN STANLEY': 'MS',
+    'AMERICAN EXPRESS': 'AXP',
+    'VISA': 'V',
+    'VISA INC': 'V',
+    'MASTERCARD': 'MA',
+    'MASTERCARD INC': 'MA',
+    
+    # Healthcare & Pharmaceuticals
+    'JOHNSON & JOHNSON': 'JNJ',
+    'JOHNSON AND JOHNSON': 'JNJ',
+    'PFIZER': 'PFE',
+    'PFIZER INC': 'PFE',
+    'MODERNA': 'MRNA',
+    'MODERNA INC': 'MRNA',
+    'ABBVIE': 'ABBV',
+    'ABBVIE INC': 'ABBV',
+    'MERCK': 'MRK',
+    'MERCK & CO': 'MRK',
+    'BRISTOL MYERS SQUIBB': 'BMY',
+    'BRISTOL-MYERS SQUIBB': 'BMY',
+    'ELI LILLY': 'LLY',
+    'LILLY': 'LLY',
+    'UNITEDHEALTH': 'UNH',
+    'UNITED HEALTH': 'UNH',
+    'UNITEDHEALTH GROUP': 'UNH',
+    
+    # Consumer & Retail
+    'WALMART': 'WMT',
+    'WALMART INC': 'WMT',
+    'PROCTER & GAMBLE': 'PG',
+    'PROCTER AND GAMBLE': 'PG',
+    'COCA COLA': 'KO',
+    'COCA-COLA': 'KO',
+    'PEPSI': 'PEP',
+    'PEPSICO': 'PEP',
+    'NIKE': 'NKE',
+    'NIKE INC': 'NKE',
+    'MCDONALD\'S': 'MCD',
+    'MCDONALDS': 'MCD',
+    'STARBUCKS': 'SBUX',
+    'STARBUCKS CORP': 'SBUX',
+    'HOME DEPOT': 'HD',
+    'THE HOME DEPOT': 'HD',
+    'DISNEY': 'DIS',
+    'WALT DISNEY': 'DIS',
+    'THE WALT DISNEY COMPANY': 'DIS',
+    
+    # Industrial & Energy
+    'EXXON MOBIL': 'XOM',
+    'EXXON': 'XOM',
+    'CHEVRON': 'CVX',
+    'CHEVRON CORP': 'CVX',
+    'GENERAL ELECTRIC': 'GE',
+    'GE': 'GE',
+    'BOEING': 'BA',
+    'BOEING CO': 'BA',
+    'CATERPILLAR': 'CAT',
+    'CATERPILLAR INC': 'CAT',
+    '3M': 'MMM',
+    '3M COMPANY': 'MMM',
+    
+    # Communication Services
+    'VERIZON': 'VZ',
+    'VERIZON COMMUNICATIONS': 'VZ',
+    'AT&T': 'T',
+    'ATT': 'T',
+    'COMCAST': 'CMCSA',
+    'COMCAST CORP': 'CMCSA',
+    'TWITTER': 'TWTR',
+    'TWITTER INC': 'TWTR',
+    
+    # Electric Vehicles & Clean Energy
+    'RIVIAN': 'RIVN',
+    'RIVIAN AUTOMOTIVE': 'RIVN',
+    'LUCID': 'LCID',
+    'LUCID MOTORS': 'LCID',
+    'LUCID GROUP': 'LCID',
+    'NIO': 'NIO',
+    'NIO INC': 'NIO',
+    'FORD': 'F',
+    'FORD MOTOR': 'F',
+    'FORD MOTOR COMPANY': 'F',
+    'GENERAL MOTORS': 'GM',
+    'GM': 'GM',
+    
+    # Cryptocurrency Related
+    'COINBASE': 'COIN',
+    'COINBASE GLOBAL': 'COIN',
+    'MICROSTRATEGY': 'MSTR',
+    'MICROSTRATEGY INC': 'MSTR',
+    
+    # Emerging Tech
+    'PALANTIR': 'PLTR',
+    'PALANTIR TECHNOLOGIES': 'PLTR',
+    'SNOWFLAKE': 'SNOW',
+    'SNOWFLAKE INC': 'SNOW',
+    'ZOOM': 'ZM',
+    'ZOOM VIDEO': 'ZM',
+    'ZOOM VIDEO COMMUNICATIONS': 'ZM',
+    'SLACK': 'WORK',
+    'SLACK TECHNOLOGIES': 'WORK',
+    'SHOPIFY': 'SHOP',
+    'SHOPIFY INC': 'SHOP',
+    'SQUARE': 'SQ',
+    'BLOCK': 'SQ',
+    'BLOCK INC': 'SQ',
+    'UBER': 'UBER',
+    'UBER TECHNOLOGIES': 'UBER',
+    'LYFT': 'LYFT',
+    'LYFT INC': 'LYFT',
+    'AIRBNB': 'ABNB',
+    'AIRBNB INC': 'ABNB',
+    'DOORDASH': 'DASH',
+    'DOORDASH INC': 'DASH',
+    'SPOTIFY': 'SPOT',
+    'SPOTIFY TECHNOLOGY': 'SPOT',
+    'ROBLOX': 'RBLX',
+    'ROBLOX CORP': 'RBLX',
+    'PELOTON': 'PTON',
+    'PELOTON INTERACTIVE': 'PTON'
+}
+
+# Characters stripped from each word before matching it as a ticker
+WORD_STRIP_CHARS = '.,!?()[]{}'
+
+TICKERS = frozenset(TICKER_MAP.values())
+
+
+class CompanyNameMatcher:
+    """Aho-Corasick automaton over the company names in ``TICKER_MAP``.
+
+    Every state remembers the lowest ``TICKER_MAP`` position of any name that
+    ends there, so a single scan returns the same ticker as checking each
+    company name in dictionary order.
+    """
+
+    def __init__(self, names: list):
+        self.transitions = [{}]
+        self.failure = [0]
+        self.best = [None]
+        self.outputs = [()]
+
+        for position, name in enumerate(names):
+            state = 0
+            for char in name:
+                next_state = self.transitions[state].get(char)
+                if next_state is None:
+                    next_state = len(self.transitions)
+                    self.transitions[state][char] = next_state
+                    self.transitions.append({})
+                    self.failure.append(0)
+                    self.best.append(None)
+                    self.outputs.append(())
+                state = next_state
+            if self.best[state] is None:
+                self.best[state] = position
+            self.outputs[state] += (position,)
+
+        # Breadth-first pass to build failure links and merge outputs
+        queue = deque(self.transitions[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.transitions[state].items():
+                queue.append(next_state)
+                fallback = self.failure[state]
+                while fallback and char not in self.transitions[fallback]:
+                    fallback = self.failure[fallback]
+                self.failure[next_state] = self.transitions[fallback].get(char, 0)
+                self.outputs[next_state] += self.outputs[self.failure[next_state]]
+                inherited = self.best[self.failure[next_state]]
+                if inherited is not None and (self.best[next_state] is None or inherited < self.best[next_state]):
+                    self.best[next_state] = inherited
+
+    def first_match(self, text: str):
+        """Return the lowest name position found anywhere in text, or None"""
+        transitions = self.transitions
+        failure = self.failure
+        best = self.best
+        state = 0
+        found = None
+
+        for char in text:
+            while state and char not in transitions[state]:
+                state = failure[state]
+            state = transitions[state].get(char, 0)
+            position = best[state]
+            if position is not None and (found is None or position < found):
+                found = position
+                if found == 0:
+                    break
+
+        return found
+
+    def all_matches(self, text: str) -> list:
+        """Return the name positions found in text, in order of appearance"""
+        transitions = self.transitions
+        failure = self.failure
+        outputs = self.outputs
+        state = 0
+        found = []
+
+        for char in text:
+            while state and char not in transitions[state]:
+                state = failure[state]
+            state = transitions[state].get(char, 0)
+            if outputs[state]:
+                found.extend(outputs[state])
+
+        return found
+
+
+def _build_partial_index(ticker_map: dict) -> dict:
+    """Map every word that partially matches a company name to its ticker.
+
+    A word matches a company name when it is at least 4 characters long, is a
+    substring of the name and covers at least 40% of it. Names are visited in
+    dictionary order so the first matching name wins.
+    """
+    index = {}
+    for company_name, ticker in ticker_map.items():
+        name_length = len(company_name)
+        for start in range(name_length):
+            for end in range(start + 4, name_length + 1):
+                fragment = company_name[start:end]
+                if ' ' in fragment:
+                    break
+                if len(fragment) >= name_length * 0.4:
+                    index.setdefault(fragment, ticker)
+    return index
+
+
+_COMPANY_NAMES = list(TICKER_MAP.keys())
+_COMPANY_TICKERS = list(TICKER_MAP.values())
+_COMPANY_MATCHER = CompanyNameMatcher(_COMPANY_NAMES)
+_PARTIAL_INDEX = _build_partial_index(TICKER_MAP)
+
+
+def extract_ticker(text: str) -> str:
+    """Extract a stock ticker from text using the precompiled tables"""
+    text_upper = text.upper()
+    words = [word.strip(WORD_STRIP_CHARS) for word in text_upper.split()]
+
+    # First, check for direct ticker mentions (highest priority)
+    for word in words:
+        if 2 <= len(word) <= 5 and word.isalpha() and word in TICKERS:
+            return word
+
+    # Then try to find exact company name matches
+    position = _COMPANY_MATCHER.first_match(text_upper)
+    if position is not None:
+        return _COMPANY_TICKERS[position]
+
+    # Finally, check for partial matches (fuzzy matching)
+    for word in words:
+        if len(word) >= 4:
+            ticker = _PARTIAL_INDEX.get(word)
+            if ticker:
+                return ticker
+
+    return ""
+
+
+def extract_tickers(text: str) -> list:
+    """Extract every ticker mentioned in text.
+
+    The first entry is always the ticker ``extract_ticker`` would return; the
+    rest follow in order of appearance without duplicates.
+    """
+    text_upper = text.upper()
+    words = [word.strip(WORD_STRIP_CHARS) for word in text_upper.split()]
+
+    direct = [word for word in words if 2 <= len(word) <= 5 and word.isalpha() and word in TICKERS]
+    positions = _COMPANY_MATCHER.all_matches(text_upper)
+    by_name = [_COMPANY_TICKERS[position] for position in positions]
+
+    if direct:
+        primary = direct[0]
+    elif positions:
+        primary = _COMPANY_TICKERS[min(positions)]
+    else:
+        primary = next((_PARTIAL_INDEX[word] for word in words if len(word) >= 4 and word in _PARTIAL_INDEX), "")
+
+    tickers = []
+    for ticker in [primary] + direct + by_name:
+        if ticker and ticker not in tickers:
+            tickers.append(ticker)
+    return tickers
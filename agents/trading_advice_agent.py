@@ -1,6 +1,11 @@
 import os
 from typing import Optional
-from .base_agent import BaseAgent
+from .base_agent import BaseAgent, OPENAI_MODEL, GENERATION_ERROR_MESSAGE, IncompleteResponse, llm_in_flight
+from .response_cache import llm_response_cache
+from .single_flight import Cancelled
+
+# Appended to advice whose stream broke off part-way
+INCOMPLETE_ADVICE_NOTE = "\n\n⚠️ This answer was cut off before it finished. Please ask again for the full analysis."
 
 class TradingAdviceAgent(BaseAgent):
     """Agent for providing trading advice based on different investment personalities"""
@@ -212,35 +217,96 @@ Then provide detailed reasoning in Aswath Damodaran's style and philosophy.
         if personality in self.personality_prompts:
             self.current_personality = personality
     
-    def process_request(self, message: str, context: Optional[dict] = None) -> dict:
-        """Process trading advice request"""
+    def process_request(self, message: str, context: Optional[dict] = None, on_chunk=None,
+                        personality: Optional[str] = None) -> dict:
+        """Process trading advice request.
+        
+        When on_chunk is given the response is streamed and on_chunk is called
+        with each piece of text as it arrives; the full text is still returned.
+        personality overrides current_personality for this request only.
+        """
+        personality = self.resolve_personality(personality)
         try:
-            # Get the personality prompt
-            system_prompt = self.personality_prompts.get(
-                self.current_personality, 
-                self.personality_prompts["Warren Buffett"]
-            )
+            system_prompt, enhanced_message = self.build_prompt(message, context, personality)
             
-            # Enhance the message with any available context
-            enhanced_message = self.enhance_message_with_context(message, context)
+            # Identical questions over identical context share one completion
+            cache_key = llm_response_cache.make_key(OPENAI_MODEL, system_prompt, message, context)
+            response = llm_response_cache.get(cache_key)
             
-            # Generate response using the personality
-            response = self.generate_response(enhanced_message, system_prompt)
+            if response is not None:
+                if on_chunk:
+                    on_chunk(response)
+            else:
+                # Callers asking the same question while it is being answered wait for that answer
+                try:
+                    response, shared = llm_in_flight.do(
+                        ('advice', cache_key), self.generate_advice, enhanced_message, system_prompt, on_chunk
+                    )
+                except IncompleteResponse as e:
+                    # This caller has already seen the fragment; it is neither cached nor shared
+                    print(f"Trading advice stream ended early: {e.reason}")
+                    if on_chunk:
+                        on_chunk(INCOMPLETE_ADVICE_NOTE)
+                    return {
+                        'message': e.text + INCOMPLETE_ADVICE_NOTE,
+                        'personality': personality,
+                        'data': None
+                    }
+                if shared and on_chunk:
+                    on_chunk(response)
+                
+                if response and response != GENERATION_ERROR_MESSAGE:
+                    llm_response_cache.set(cache_key, response)
             
             return {
                 'message': response,
-                'personality': self.current_personality,
+                'personality': personality,
                 'data': None
             }
             
+        except Cancelled:
+            raise
         except Exception as e:
             print(f"Error processing trading advice request: {e}")
             return {
                 'message': "I apologize, but I'm having trouble providing investment advice right now. Please try again.",
-                'personality': self.current_personality,
+                'personality': personality,
                 'data': None
             }
     
+    def generate_advice(self, enhanced_message: str, system_prompt: str, on_chunk=None) -> str:
+        """Generate advice text, streaming it to on_chunk when given"""
+        if not on_chunk:
+            # Generate response using the personality
+            return self.generate_response(enhanced_message, system_prompt)
+        
+        chunks = []
+        stream = self.generate_response_stream(enhanced_message, system_prompt)
+        try:
+            for chunk in stream:
+                chunks.append(chunk)
+                on_chunk(chunk)
+        finally:
+            # on_chunk raises Cancelled when the client has gone; stop reading the completion
+            stream.close()
+        return ''.join(chunks).strip()
+    
+    def resolve_personality(self, personality: Optional[str]) -> str:
+        """The requested personality if it is known, else current_personality"""
+        return personality if personality in self.personality_prompts else self.current_personality
+    
+    def build_prompt(self, message: str, context: Optional[dict], personality: Optional[str] = None) -> tuple:
+        """Return the (system prompt, user prompt) pair for a personality (default: the current one)"""
+        # Get the personality prompt
+        system_prompt = self.personality_prompts.get(
+            personality or self.current_personality, 
+            self.personality_prompts["Warren Buffett"]
+        )
+        
+        # Enhance the message with any available context
+        enhanced_message = self.enhance_message_with_context(message, context)
+        return system_prompt, enhanced_message
+    
     def enhance_message_with_context(self, message: str, context: Optional[dict]) -> str:
         """Enhance the message with additional context from other agents"""
         enhanced_message = message
@@ -250,17 +316,19 @@ Then provide detailed reasoning in Aswath Damodaran's style and philosophy.
             if 'stock_data' in context:
                 enhanced_message += f"\n\nRelevant stock data: {context['stock_data']}"
             
-            # Add news context if available
-            if 'news_data' in context:
-                enhanced_message += f"\n\nRelevant news: {context['news_data']}"
+            # Add news sentiment context if available
+            if 'news_sentiment' in context:
+                enhanced_message += f"\n\nRecent news sentiment: {context['news_sentiment']}"
         
         return enhanced_message
     
-    def get_personality_specific_advice(self, ticker: str, analysis_type: str = "general") -> str:
+    def get_personality_specific_advice(self, ticker: str, analysis_type: str = "general",
+                                        personality: Optional[str] = None) -> str:
         """Get personality-specific advice for a specific ticker"""
+        personality = self.resolve_personality(personality)
         try:
             prompt = f"""
-Please provide investment advice for {ticker} stock from the perspective of {self.current_personality}.
+Please provide investment advice for {ticker} stock from the perspective of {personality}.
 Analysis type: {analysis_type}
 
 Consider:
@@ -271,13 +339,10 @@ Consider:
 5. Investment timeline
 6. Position sizing recommendations
 
-Provide specific, actionable advice in the style of {self.current_personality}.
+Provide specific, actionable advice in the style of {personality}.
 """
             
-            system_prompt = self.personality_prompts.get(
-                self.current_personality,
-                self.personality_prompts["Warren Buffett"]
-            )
+            system_prompt = self.personality_prompts[personality]
             
             response = self.generate_response(prompt, system_prompt)
             return response
@@ -286,11 +351,12 @@ Provide specific, actionable advice in the style of {self.current_personality}.
             print(f"Error getting personality-specific advice: {e}")
             return "I apologize, but I'm having trouble providing specific advice right now."
     
-    def analyze_portfolio(self, portfolio_data: dict) -> str:
-        """Analyze a portfolio from the current personality's perspective"""
+    def analyze_portfolio(self, portfolio_data: dict, personality: Optional[str] = None) -> str:
+        """Analyze a portfolio from the given (default: current) personality's perspective"""
+        personality = self.resolve_personality(personality)
         try:
             prompt = f"""
-Please analyze this portfolio from the perspective of {self.current_personality}:
+Please analyze this portfolio from the perspective of {personality}:
 
 Portfolio: {portfolio_data}
 
@@ -302,13 +368,10 @@ Provide analysis on:
 5. Position sizing suggestions
 6. Rebalancing recommendations
 
-Provide specific advice in the style of {self.current_personality}.
+Provide specific advice in the style of {personality}.
 """
             
-            system_prompt = self.personality_prompts.get(
-                self.current_personality,
-                self.personality_prompts["Warren Buffett"]
-            )
+            system_prompt = self.personality_prompts[personality]
             
             response = self.generate_response(prompt, system_prompt)
             return response
@@ -0,0 +1,249 @@
+"""JSON API over the agents' price and news stores.
+
+    GET /api/quote/<ticker>
+    GET /api/history/<ticker>?from=YYYY-MM-DD&to=YYYY-MM-DD
+    GET /api/news/<ticker>?from=YYYY-MM-DD&to=YYYY-MM-DD[&q=search terms][&limit=N]
+
+Data is served from the same stores the chat agents use and follows their
+freshness rules: missing or expired data is fetched first, stale data is
+served while it refreshes in the background. Responses carry an ETag and a
+Cache-Control max-age for as long as the data stays fresh, so nginx and
+clients can reuse them or revalidate with If-None-Match and get a 304.
+Price responses also carry Last-Modified (when the prices were last
+fetched) for If-Modified-Since.
+"""
+
+import re
+import time
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+from flask import Blueprint, jsonify, request
+
+from agents.cache_policy import DAY, FRESH, NEWS_POLICY, QUOTE_POLICY
+from agents.date_coverage import as_date
+from agents.market_calendar import nyse_calendar
+from agents.rate_limiter import RateLimitExceeded
+from agents.stock_news_agent import fts_query
+
+TICKER_PATTERN = re.compile(r'^[A-Z][A-Z0-9.\-]{0,9}$')
+
+DEFAULT_HISTORY_DAYS = 30
+DEFAULT_NEWS_LIMIT = 50
+MAX_NEWS_LIMIT = 500
+
+# max-age for ranges that ended before the latest published session
+SETTLED_MAX_AGE = DAY
+
+
+class ApiError(Exception):
+    """An error answered as {"error": message} with an HTTP status"""
+
+    def __init__(self, status: int, message: str):
+        self.status = status
+        super().__init__(message)
+
+
+def create_api(quote_agent, news_agent) -> Blueprint:
+    """Blueprint serving the quote agent's price store and the news agent's news store"""
+    api = Blueprint('api', __name__, url_prefix='/api')
+
+    @api.errorhandler(ApiError)
+    def api_error(e):
+        return jsonify({'error': str(e)}), e.status
+
+    @api.errorhandler(RateLimitExceeded)
+    def rate_limited(e):
+        response = jsonify({'error': str(e), 'retry_after': max(1, round(e.retry_after))})
+        response.status_code = 503
+        response.headers['Retry-After'] = str(max(1, round(e.retry_after)))
+        return response
+
+    @api.route('/quote/<ticker>')
+    def quote(ticker):
+        ticker = parse_ticker(ticker)
+        history = quote_agent.sync_prices(ticker)
+        if history is None or not len(history):
+            raise ApiError(404, f"No price data for {ticker}")
+
+        latest = price_records(history.take(slice(-2, None)))
+        body = {'ticker': ticker, 'quote': latest[-1]}
+        if len(latest) > 1:
+            previous_close = latest[0]['close']
+            body['previous_close'] = previous_close
+            body['change'] = round(latest[-1]['close'] - previous_close, 4)
+            body['change_percent'] = round(100 * body['change'] / previous_close, 4) if previous_close else None
+
+        fetched_at = quote_agent.price_store.fetched_at(ticker)
+        max_age = price_max_age(quote_agent.quote_freshness(ticker, history) == FRESH, fetched_at)
+        return cached_response(body, fetched_at, max_age, QUOTE_POLICY.max_stale)
+
+    @api.route('/history/<ticker>')
+    def history(ticker):
+        ticker = parse_ticker(ticker)
+        end = parse_date('to', datetime.now().date())
+        start = parse_date('from', end - timedelta(days=DEFAULT_HISTORY_DAYS))
+        if start > end:
+            raise ApiError(400, "'from' must not be after 'to'")
+
+        stored = quote_agent.sync_prices(ticker, start.isoformat())
+        if stored is None or not len(stored):
+            raise ApiError(404, f"No price data for {ticker}")
+
+        body = {
+            'ticker': ticker,
+            'from': start.isoformat(),
+            'to': end.isoformat(),
+            'prices': price_records(stored.between(start, end))
+        }
+
+        fetched_at = quote_agent.price_store.fetched_at(ticker)
+        last_session = nyse_calendar.last_completed_session()
+        if end < last_session and not quote_agent.price_store.coverage(ticker).gaps(start, end):
+            max_age = SETTLED_MAX_AGE
+        else:
+            max_age = price_max_age(quote_agent.quote_freshness(ticker, stored) == FRESH, fetched_at)
+        return cached_response(body, fetched_at, max_age, QUOTE_POLICY.max_stale)
+
+    @api.route('/news/<ticker>')
+    def news(ticker):
+        ticker = parse_ticker(ticker)
+        default_range = news_agent.default_date_range()
+        end = parse_date('to', as_date(default_range['end_date']))
+        start = parse_date('from', as_date(default_range['start_date']))
+        if start > end:
+            raise ApiError(400, "'from' must not be after 'to'")
+        limit = parse_limit()
+        search = request.args.get('q', '').strip() or None
+
+        date_range = {'start_date': start.isoformat(), 'end_date': end.isoformat()}
+        failed_windows = news_agent.sync_news(ticker, date_range)
+        articles = news_agent.news_store.articles_for(
+            ticker, date_range['start_date'], date_range['end_date'], fts_query(search), limit
+        )
+
+        body = {
+            'ticker': ticker,
+            'from': date_range['start_date'],
+            'to': date_range['end_date'],
+            'search': search,
+            'complete': not failed_windows and not news_agent.coverage_gaps(ticker, date_range),
+            'articles': article_records(articles)
+        }
+
+        fetched_at = news_agent.news_store.get_meta(ticker).get('fetched_at')
+        if not body['complete']:
+            # Gaps are filled on a later request; don't let anyone keep this answer
+            max_age = 0
+        elif end < datetime.now().date() - timedelta(days=1):
+            # Like news_freshness: a range that ended before yesterday no longer changes
+            max_age = SETTLED_MAX_AGE
+        else:
+            max_age = remaining_ttl(NEWS_POLICY, fetched_at)
+        # A backfill adds articles without touching fetched_at, so news is validated by ETag only
+        return cached_response(body, None, max_age, NEWS_POLICY.max_stale)
+
+    return api
+
+
+def parse_ticker(ticker: str) -> str:
+    ticker = ticker.upper()
+    if not TICKER_PATTERN.match(ticker):
+        raise ApiError(400, f"Invalid ticker: {ticker}")
+    return ticker
+
+
+def parse_date(name: str, default):
+    """Date from a YYYY-MM-DD query parameter"""
+    value = request.args.get(name)
+    if not value:
+        return default
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise ApiError(400, f"'{name}' must be a date in YYYY-MM-DD format")
+
+
+def parse_limit() -> int:
+    value = request.args.get('limit')
+    if not value:
+        return DEFAULT_NEWS_LIMIT
+    try:
+        limit = int(value)
+    except ValueError:
+        raise ApiError(400, "'limit' must be a number")
+    return max(1, min(limit, MAX_NEWS_LIMIT))
+
+
+def price_records(history) -> list:
+    """PriceHistory rows as JSON objects, oldest first"""
+    return [
+        {'date': str(day), 'open': float(open_), 'high': float(high), 'low': float(low),
+         'close': float(close), 'volume': int(volume)}
+        for day, open_, high, low, close, volume in zip(
+            history.dates, history.open, history.high, history.low, history.close, history.volume
+        )
+    ]
+
+
+def article_records(df) -> list:
+    """NewsStore.articles_for rows as JSON objects, newest first"""
+    return [
+        {
+            'published_at': iso_timestamp(row.published_at),
+            'title': row.title,
+            'summary': row.description,
+            'url': row.url,
+            'source': row.source,
+            'sentiment': row.sentiment,
+            'score': None if pd.isna(row.score) else float(row.score),
+            'relevance': None if pd.isna(row.relevance) else float(row.relevance)
+        }
+        for row in df.itertuples(index=False)
+    ]
+
+
+def iso_timestamp(published_at: str) -> str:
+    """Alpha Vantage's YYYYMMDDTHHMMSS (UTC) as ISO 8601"""
+    try:
+        return datetime.strptime(published_at[:15], '%Y%m%dT%H%M%S').isoformat() + 'Z'
+    except ValueError:
+        return published_at
+
+
+def remaining_ttl(policy, fetched_at, now: float = None) -> int:
+    """Seconds until data fetched at fetched_at stops being fresh under policy"""
+    if not fetched_at:
+        return 0
+    now = time.time() if now is None else now
+    return max(0, int(policy.ttl(now) - (now - fetched_at)))
+
+
+def price_max_age(up_to_date: bool, fetched_at, now: float = None) -> int:
+    """max-age for prices ending at the latest stored session"""
+    now = time.time() if now is None else now
+    if not up_to_date:
+        return remaining_ttl(QUOTE_POLICY, fetched_at, now)
+
+    # The newest published bar can't change before the next session closes
+    next_session = nyse_calendar.next_trading_day(nyse_calendar.last_completed_session(), inclusive=False)
+    if next_session is None:
+        return SETTLED_MAX_AGE
+    until_close = nyse_calendar.session_close(next_session).timestamp() - now
+    return max(int(QUOTE_POLICY.ttl(now)), int(until_close))
+
+
+def cached_response(body: dict, last_modified, max_age: int, max_stale: float):
+    """JSON response with validators and freshness headers, answered with 304 when the client's copy matches.
+
+    last_modified (a timestamp, or None for ETag only) must change whenever body can.
+    """
+    response = jsonify(body)
+    response.add_etag()
+    if last_modified:
+        response.last_modified = datetime.fromtimestamp(last_modified, timezone.utc)
+    if max_age > 0:
+        response.headers['Cache-Control'] = f"public, max-age={max_age}, stale-while-revalidate={int(max_stale)}"
+    else:
+        response.headers['Cache-Control'] = 'public, no-cache'
+    return response.make_conditional(request)
@@ -1,55 +1,163 @@
 import os
-from flask import Flask, render_template
-from flask_socketio import SocketIO, emit
 from dotenv import load_dotenv
-from agents.coordinator_agent import CoordinatorAgent
 
 # Load environment variables
 load_dotenv()
 
+# Socket.IO concurrency mode: "eventlet" (matches the gunicorn worker in
+# deploy.sh) or "threading". Under eventlet the standard library is
+# monkey-patched before requests/openai are imported so their sockets yield
+# to other green threads instead of blocking every connected user.
+ASYNC_MODE = os.getenv('SOCKETIO_ASYNC_MODE', 'eventlet')
+if ASYNC_MODE == 'eventlet':
+    try:
+        import eventlet
+        eventlet.monkey_patch()
+    except ImportError:
+        print('eventlet is not installed, falling back to threading mode')
+        ASYNC_MODE = 'threading'
+
+import threading
+import uuid
+from flask import Flask, jsonify, render_template, request
+from flask_socketio import SocketIO, emit
+from api import create_api
+from agents.admission import Overloaded, RequestCancelled, admission
+from agents.alpha_vantage import alpha_vantage_in_flight
+from agents.base_agent import llm_in_flight
+from agents.cache_policy import background_refresher
+from agents.coordinator_agent import CoordinatorAgent
+from agents.price_cache import price_cache
+from agents.rate_limiter import alpha_vantage_limiter
+from agents.response_cache import llm_response_cache
+from agents.session_store import sessions
+
+# Messages processed at once (MAX_CONCURRENT_REQUESTS); up to
+# MAX_QUEUED_REQUESTS more wait for a slot and the rest are shed
+MAX_CONCURRENT_REQUESTS = admission.max_active
+
+# Running several app processes behind a sticky load balancer needs a shared
+# message queue (e.g. redis://localhost:6379/0) so an emit from one process
+# reaches clients connected to another. Unset for a single process.
+SOCKETIO_MESSAGE_QUEUE = os.getenv('SOCKETIO_MESSAGE_QUEUE') or None
+SOCKETIO_CHANNEL = os.getenv('SOCKETIO_CHANNEL', 'ai-investment-advisor')
+
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.getenv('FLASK_SECRET_KEY', 'your-secret-key-here')
-socketio = SocketIO(app, cors_allowed_origins="*")
+socketio = SocketIO(app, cors_allowed_origins="*", async_mode=ASYNC_MODE,
+                    message_queue=SOCKETIO_MESSAGE_QUEUE, channel=SOCKETIO_CHANNEL)
 
-# Initialize the coordinator agent
+# One coordinator (agents, HTTP clients, caches) shared by every connection;
+# per-connection state lives in `sessions`, keyed by Socket.IO sid
 coordinator = CoordinatorAgent()
 
+# JSON endpoints for dashboards and scripts, served from the same stores
+app.register_blueprint(create_api(coordinator.stock_quote_agent, coordinator.stock_news_agent))
+
 @app.route('/')
 def index():
     return render_template('index.html')
 
+@app.route('/metrics')
+def metrics():
+    """Queue depth, shed counts and cache statistics of this process"""
+    return jsonify({
+        'admission': admission.stats(),
+        'sessions': sessions.stats(),
+        'llm_response_cache': llm_response_cache.stats(),
+        'llm_in_flight': llm_in_flight.stats(),
+        'alpha_vantage_in_flight': alpha_vantage_in_flight.stats(),
+        'alpha_vantage_limiter': alpha_vantage_limiter.stats(),
+        'price_cache': price_cache.stats(),
+        'background_refresher': background_refresher.stats()
+    })
+
 @socketio.on('connect')
 def handle_connect():
     print('Client connected')
+    session = sessions.get(request.sid)
     emit('message_from_server', {
         'message': 'Welcome! I am your AI investment advisor. How can I help you today?',
-        'personality': 'Warren Buffett'
+        'personality': session.personality
     })
 
 @socketio.on('disconnect')
 def handle_disconnect():
     print('Client disconnected')
+    # Work still queued or running for this client is abandoned
+    admission.cancel(request.sid)
+    sessions.discard(request.sid)
 
 @socketio.on('message_from_user')
 def handle_message(data):
     message = data.get('message', '')
+    request_id = data.get('request_id') or uuid.uuid4().hex
     print(f'Received message: {message}')
     
+    try:
+        ticket = admission.admit(request.sid, request_id)
+    except Overloaded as e:
+        # Saturated: answer at once rather than queue behind everyone else
+        emit('message_from_server', {
+            'request_id': request_id,
+            'message': e.user_message,
+            'personality': sessions.get(request.sid).personality,
+            'retry_after': max(1, round(e.retry_after))
+        })
+        return
+    
+    # Process in a background task so the handler returns immediately and
+    # slow OpenAI/Alpha Vantage calls only occupy this client's task
+    socketio.start_background_task(admission.run, ticket, process_user_message, ticket, message)
+
+def process_user_message(ticket, message):
+    """Run a user message through the coordinator and reply to its sender"""
+    sid, request_id = ticket.sid, ticket.request_id
+    
+    def send_chunk(chunk):
+        # Streamed advice text; the client appends it to the pending reply.
+        # Raises RequestCancelled once the client has disconnected.
+        ticket.check()
+        socketio.emit('message_chunk', {'request_id': request_id, 'chunk': chunk}, to=sid)
+    
+    # A context card that times out can arrive after the final message; by then the
+    # client has closed the reply and the advice went ahead without it, so it is dropped
+    reply_lock = threading.Lock()
+    finished = threading.Event()
+    
+    def send_partial(kind, data):
+        # Quote/news card of an advice answer; the client adds it to the same reply
+        ticket.check()
+        with reply_lock:
+            if not finished.is_set():
+                socketio.emit('partial_result', {'request_id': request_id, 'kind': kind, 'data': data}, to=sid)
+    
+    def send_reply(reply):
+        # The final message (or error) for the request; nothing is sent for it afterwards
+        with reply_lock:
+            finished.set()
+            socketio.emit('message_from_server', dict(reply, request_id=request_id), to=sid)
+    
+    session = sessions.get(sid)
     try:
         # Process the message through the coordinator agent
-        response = coordinator.process_message(message)
+        response = coordinator.process_message(message, on_chunk=send_chunk, session=session,
+                                               on_partial=send_partial)
+        ticket.check()
         
-        # Emit response back to client
-        emit('message_from_server', {
+        # Emit the complete response; it replaces any streamed text
+        send_reply({
             'message': response['message'],
-            'personality': response.get('personality', 'Warren Buffett'),
+            'personality': response.get('personality', session.personality),
             'data': response.get('data', None)
         })
+    except RequestCancelled:
+        raise
     except Exception as e:
         print(f'Error processing message: {e}')
-        emit('message_from_server', {
+        send_reply({
             'message': 'Sorry, I encountered an error processing your request. Please try again.',
-            'personality': 'Warren Buffett'
+            'personality': session.personality
         })
 
 @socketio.on('personality_change')
@@ -57,8 +165,8 @@ def handle_personality_change(data):
     personality = data.get('personality', 'Warren Buffett')
     print(f'Personality changed to: {personality}')
     
-    # Update the coordinator's personality
-    coordinator.set_personality(personality)
+    # Only this connection's personality changes
+    coordinator.set_personality(personality, sessions.get(request.sid))
     
     emit('personality_updated', {
         'personality': personality,
@@ -68,4 +176,4 @@ def handle_personality_change(data):
 if __name__ == '__main__':
     port = int(os.getenv('FLASK_APP_PORT', 5000))
     debug = os.getenv('FLASK_DEBUG', 'True').lower() == 'true'
-    socketio.run(app, debug=debug, port=port, host='0.0.0.0') 
\ No newline at end of file
+    socketio.run(app, debug=debug, port=port, host='0.0.0.0', allow_unsafe_werkzeug=(ASYNC_MODE == 'threading')) 
\ No newline at end of file
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark for ticker extraction
+Compares the precompiled ticker index against the previous implementation,
+which rebuilt the company name table and scanned it on every call.
+Usage: python3 benchmark_ticker_extraction.py [iterations]
+"""
+
+import sys
+import os
+import time
+
+# Add the project root to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from agents.ticker_index import TICKER_MAP, extract_ticker
+
+SAMPLE_MESSAGES = [
+    "Should I buy AAPL?",
+    "What do you think about investing in Tesla?",
+    "Show me Microsoft stock price on 2024-01-05",
+    "Any news about Johnson & Johnson last 7 days",
+    "Is coca-cola a good dividend stock for my portfolio?",
+    "What's your outlook on Palantir Technologies",
+    "Thoughts on Netf for the long run?",
+    "Should I hold or sell my shares before earnings season?",
+    "Compare the walt disney company with comcast",
+    "I am worried about the market, what is your opinion on the economy overall?",
+]
+
+
+def legacy_extract_ticker(text: str) -> str:
+    """Previous implementation of BaseAgent.extract_ticker_from_text"""
+    text_upper = text.upper()
+
+    # The old code rebuilt its mapping on every call
+    ticker_map = dict(TICKER_MAP)
+
+    words = text_upper.split()
+    for word in words:
+        word = word.strip('.,!?()[]{}')
+        if len(word) >= 2 and len(word) <= 5 and word.isalpha():
+            if word in ticker_map.values():
+                return word
+
+    for company_name, ticker in ticker_map.items():
+        if company_name in text_upper:
+            return ticker
+
+    for word in words:
+        word = word.strip('.,!?()[]{}')
+        if len(word) >= 4:
+            for company_name, ticker in ticker_map.items():
+                if (len(word) >= len(company_name) * 0.4 and
+                    (word in company_name or company_name.startswith(word))):
+                    return ticker
+
+    return ""
+
+
+def time_per_call(func, iterations: int) -> float:
+    """Return the mean latency of func over the sample messages in microseconds"""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for message in SAMPLE_MESSAGES:
+            func(message)
+    elapsed = time.perf_counter() - start
+    return elapsed / (iterations * len(SAMPLE_MESSAGES)) * 1_000_000
+
+
+def check_results():
+    """Verify that both implementations agree on the sample messages"""
+    print("=" * 60)
+    print("CHECKING RESULTS")
+    print("=" * 60)
+
+    all_match = True
+    for message in SAMPLE_MESSAGES:
+        expected = legacy_extract_ticker(message)
+        actual = extract_ticker(message)
+        status = "✅" if expected == actual else "❌"
+        if expected != actual:
+            all_match = False
+        print(f"{status} '{message}' -> {actual or '(none)'} (legacy: {expected or '(none)'})")
+
+    return all_match
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+    if not check_results():
+        print("\n❌ Implementations disagree, skipping timing")
+        sys.exit(1)
+
+    print("\n" + "=" * 60)
+    print(f"TIMING ({iterations} iterations x {len(SAMPLE_MESSAGES)} messages)")
+    print("=" * 60)
+
+    legacy_us = time_per_call(legacy_extract_ticker, iterations)
+    indexed_us = time_per_call(extract_ticker, iterations)
+
+    print(f"Legacy implementation:   {legacy_us:8.2f} µs/call")
+    print(f"Precompiled index:       {indexed_us:8.2f} µs/call")
+    print(f"Speedup:                 {legacy_us / indexed_us:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
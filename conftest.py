@@ -0,0 +1,17 @@
+"""
+pytest setup: point every cache, store and the Alpha Vantage rate-limit
+state at a throwaway folder, so test runs never touch data/ or spend the
+real request quota, and turn off background cache refreshes. Must run
+before the agents are imported, which is why it lives here rather than in
+a fixture.
+"""
+
+import atexit
+import os
+import shutil
+import tempfile
+
+_data_folder = tempfile.mkdtemp(prefix='bd2-test-data-')
+os.environ['DATA_FOLDER'] = _data_folder
+os.environ['CACHE_REFRESH_WORKERS'] = '0'
+atexit.register(shutil.rmtree, _data_folder, True)
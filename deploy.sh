@@ -85,17 +85,34 @@ FLASK_APP_PORT=5000
 FLASK_SECRET_KEY=your_very_secure_secret_key_here
 FLASK_DEBUG=False
 FLASK_ENV=production
+# Shared by every app instance so Socket.IO emits reach clients on any of them
+SOCKETIO_MESSAGE_QUEUE=redis://localhost:6379/0
+# Share cached LLM answers between instances through data/llm_cache
+LLM_CACHE_DISK=True
 EOF
     print_warning "Please edit $ENV_FILE with your actual API keys and secret key!"
 fi
 
-# Create startup script
+# Number of app instances (one eventlet worker each, one per CPU core by default)
+APP_INSTANCES="${APP_INSTANCES:-$(nproc)}"
+APP_BASE_PORT=5000
+print_status "Running $APP_INSTANCES app instances from port $APP_BASE_PORT"
+
+# Redis carries Socket.IO emits between instances
+sudo systemctl enable redis-server
+sudo systemctl start redis-server
+
+# Create startup script; instance N listens on APP_BASE_PORT + N.
+# Socket.IO long-polling needs every request of a session to reach the same
+# process, which gunicorn cannot guarantee across workers, so each instance
+# runs a single worker and nginx pins clients to an instance (ip_hash).
 print_status "Creating startup script..."
-sudo -u appuser cat > "$APP_DIR/start_app.sh" << 'EOF'
+sudo -u appuser cat > "$APP_DIR/start_app.sh" << EOF
 #!/bin/bash
 cd /home/appuser/ai-investment-advisor
 source venv/bin/activate
-exec gunicorn --worker-class eventlet -w 1 --bind 0.0.0.0:5000 app:app
+PORT=\$(( $APP_BASE_PORT + \${1:-0} ))
+exec gunicorn --worker-class eventlet -w 1 --bind 127.0.0.1:\$PORT app:app
 EOF
 sudo -u appuser chmod +x "$APP_DIR/start_app.sh"
 
@@ -103,7 +120,9 @@ sudo -u appuser chmod +x "$APP_DIR/start_app.sh"
 print_status "Configuring supervisor..."
 sudo tee /etc/supervisor/conf.d/ai-investment-advisor.conf > /dev/null << 'EOF'
 [program:ai-investment-advisor]
-command=/home/appuser/ai-investment-advisor/start_app.sh
+command=/home/appuser/ai-investment-advisor/start_app.sh %(process_num)d
+process_name=%(program_name)s_%(process_num)02d
+numprocs=APP_INSTANCES
 directory=/home/appuser/ai-investment-advisor
 user=appuser
 autostart=true
@@ -112,6 +131,7 @@ redirect_stderr=true
 stdout_logfile=/var/log/ai-investment-advisor.log
 environment=PATH="/home/appuser/ai-investment-advisor/venv/bin"
 EOF
+sudo sed -i "s/^numprocs=APP_INSTANCES$/numprocs=$APP_INSTANCES/" /etc/supervisor/conf.d/ai-investment-advisor.conf
 
 # Update supervisor
 sudo supervisorctl reread
@@ -119,13 +139,40 @@ sudo supervisorctl update
 
 # Configure nginx
 print_status "Configuring nginx..."
+UPSTREAM_SERVERS=""
+for ((i = 0; i < APP_INSTANCES; i++)); do
+    UPSTREAM_SERVERS+="    server 127.0.0.1:$((APP_BASE_PORT + i));"$'\n'
+done
+sudo tee /etc/nginx/conf.d/ai-investment-advisor-upstream.conf > /dev/null << EOF
+# ip_hash keeps each client on one instance (sticky sessions for Socket.IO)
+upstream ai_investment_advisor {
+    ip_hash;
+$UPSTREAM_SERVERS}
+
+# /api/ responses, kept for as long as their Cache-Control allows
+proxy_cache_path /var/cache/nginx/ai-investment-advisor levels=1:2 keys_zone=ai_investment_advisor_api:10m max_size=256m inactive=1d use_temp_path=off;
+EOF
 sudo tee /etc/nginx/sites-available/ai-investment-advisor > /dev/null << 'EOF'
 server {
     listen 80;
     server_name _;
 
     location / {
-        proxy_pass http://127.0.0.1:5000;
+        proxy_pass http://ai_investment_advisor;
+        proxy_set_header Host $host;
+        proxy_set_header X-Real-IP $remote_addr;
+        proxy_set_header X-Forwarded-For $proxy_add_x_forwarded_for;
+        proxy_set_header X-Forwarded-Proto $scheme;
+    }
+
+    location /api/ {
+        proxy_pass http://ai_investment_advisor;
+        proxy_cache ai_investment_advisor_api;
+        proxy_cache_revalidate on;
+        proxy_cache_lock on;
+        proxy_cache_use_stale error timeout updating;
+        proxy_cache_background_update on;
+        add_header X-Cache-Status $upstream_cache_status;
         proxy_set_header Host $host;
         proxy_set_header X-Real-IP $remote_addr;
         proxy_set_header X-Forwarded-For $proxy_add_x_forwarded_for;
@@ -133,7 +180,7 @@ server {
     }
 
     location /socket.io/ {
-        proxy_pass http://127.0.0.1:5000;
+        proxy_pass http://ai_investment_advisor;
         proxy_http_version 1.1;
         proxy_set_header Upgrade $http_upgrade;
         proxy_set_header Connection "upgrade";
@@ -161,7 +208,7 @@ fi
 print_status "Starting services..."
 sudo systemctl restart nginx
 sudo systemctl enable nginx
-sudo supervisorctl start ai-investment-advisor
+sudo supervisorctl start 'ai-investment-advisor:*'
 
 # Configure firewall
 print_status "Configuring firewall..."
@@ -193,10 +240,10 @@ print_status "Setting up automated backups..."
 print_status "Checking deployment status..."
 sleep 5
 
-if sudo supervisorctl status ai-investment-advisor | grep -q "RUNNING"; then
+if sudo supervisorctl status 'ai-investment-advisor:*' | grep -q "RUNNING"; then
     print_status "Application is running successfully!"
 else
-    print_error "Application failed to start. Check logs with: sudo supervisorctl tail ai-investment-advisor"
+    print_error "Application failed to start. Check logs with: sudo supervisorctl tail ai-investment-advisor:ai-investment-advisor_00"
     exit 1
 fi
 
@@ -214,14 +261,14 @@ print_status "Deployment completed successfully!"
 echo ""
 echo "Next steps:"
 echo "1. Edit $ENV_FILE with your actual API keys"
-echo "2. Restart the application: sudo supervisorctl restart ai-investment-advisor"
+echo "2. Restart the application: sudo supervisorctl restart 'ai-investment-advisor:*'"
 echo "3. Access your application at: http://$SERVER_IP"
 echo "4. For HTTPS, configure SSL certificate using certbot"
 echo ""
 echo "Useful commands:"
-echo "- Check app status: sudo supervisorctl status ai-investment-advisor"
-echo "- View app logs: sudo supervisorctl tail ai-investment-advisor"
-echo "- Restart app: sudo supervisorctl restart ai-investment-advisor"
+echo "- Check app status: sudo supervisorctl status 'ai-investment-advisor:*'"
+echo "- View app logs: sudo supervisorctl tail ai-investment-advisor:ai-investment-advisor_00"
+echo "- Restart app: sudo supervisorctl restart 'ai-investment-advisor:*'"
 echo "- Check nginx status: sudo systemctl status nginx"
 echo ""
 print_warning "Remember to configure your domain DNS and SSL certificate for production use!" 
\ No newline at end of file
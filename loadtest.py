@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Load test for the Socket.IO server
+Starts the app in-process with the coordinator replaced by a fixed-latency
+stand-in for the OpenAI/Alpha Vantage round trips, then measures message
+throughput as the number of concurrent clients grows.
+Usage: python3 loadtest.py [--latency SECONDS] [--messages N] [--clients 1,2,4,8,16] [--port PORT]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# Add the project root to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# app.py applies eventlet monkey patching on import, so import it before
+# anything that opens sockets
+import app as server
+
+import socketio
+import threading
+
+
+def fake_process_message(latency: float):
+    """Stand-in for CoordinatorAgent.process_message that blocks on I/O for `latency` seconds"""
+    def process_message(message: str, on_chunk=None, session=None, on_partial=None) -> dict:
+        time.sleep(latency)
+        return {'message': f'echo: {message}', 'personality': 'Warren Buffett', 'data': None}
+    return process_message
+
+
+def run_client(url: str, messages: int, results: list):
+    """Connect one client, send messages one at a time and record completions"""
+    client = socketio.Client()
+    replies = threading.Semaphore(0)
+
+    @client.on('message_from_server')
+    def on_message(data):
+        if str(data.get('message', '')).startswith('echo:'):
+            replies.release()
+
+    client.connect(url, transports=['polling'])
+    for i in range(messages):
+        client.emit('message_from_user', {'message': f'load test {i}'})
+        if replies.acquire(timeout=60):
+            results.append(time.perf_counter())
+    client.disconnect()
+
+
+def run_level(url: str, clients: int, messages: int) -> tuple:
+    """Run `clients` concurrent clients and return (completed, elapsed seconds)"""
+    results = []
+    threads = [threading.Thread(target=run_client, args=(url, messages, results)) for _ in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return len(results), time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--latency', type=float, default=0.5, help='simulated upstream latency per message')
+    parser.add_argument('--messages', type=int, default=4, help='messages sent by each client')
+    parser.add_argument('--clients', default='1,2,4,8,16', help='comma-separated concurrency levels')
+    parser.add_argument('--port', type=int, default=5055)
+    args = parser.parse_args()
+
+    server.coordinator.process_message = fake_process_message(args.latency)
+    threading.Thread(
+        target=server.socketio.run,
+        args=(server.app,),
+        kwargs={'host': '127.0.0.1', 'port': args.port, 'log_output': False, 'allow_unsafe_werkzeug': True},
+        daemon=True
+    ).start()
+    time.sleep(1)
+
+    url = f'http://127.0.0.1:{args.port}'
+    print("🚀 SOCKET.IO LOAD TEST")
+    print(f"Async mode: {server.ASYNC_MODE}, max concurrent requests: {server.MAX_CONCURRENT_REQUESTS}")
+    print(f"Simulated upstream latency: {args.latency}s, {args.messages} messages per client")
+    print("=" * 60)
+    print(f"{'clients':>8} {'messages':>10} {'seconds':>10} {'msg/s':>10} {'serialized msg/s':>18}")
+
+    for clients in [int(level) for level in args.clients.split(',')]:
+        completed, elapsed = run_level(url, clients, args.messages)
+        throughput = completed / elapsed if elapsed else 0
+        print(f"{clients:>8} {completed:>10} {elapsed:>10.2f} {throughput:>10.2f} {1 / args.latency:>18.2f}")
+
+    print("=" * 60)
+    stats = server.admission.stats()
+    print(f"Admission: {stats['admitted']} admitted, {stats['shed_busy'] + stats['shed_client']} shed")
+    print("Throughput should grow with the number of clients until MAX_CONCURRENT_REQUESTS is reached;")
+    print("a server that blocks on each request stays at the serialized rate.")
+
+
+if __name__ == "__main__":
+    main()
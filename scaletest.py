@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+Multi-process test for the Socket.IO server
+Starts several app processes that share a Socket.IO message queue, with
+the coordinator replaced by a fixed-latency stand-in, and checks that
+  - every client gets its replies from the process it is connected to,
+  - an emit from one process reaches a client connected to another,
+  - an external write-only emitter reaches clients on every process,
+then measures throughput with clients spread over the processes.
+Without --message-queue a minimal in-process Redis stand-in (PUBLISH and
+SUBSCRIBE only) is started, so no Redis server is needed locally.
+Usage: python3 scaletest.py [--workers 2] [--clients 8] [--messages 4] [--latency 0.5] [--message-queue redis://...]
+"""
+
+import argparse
+import logging
+import os
+import socket
+import socketserver
+import subprocess
+import sys
+import threading
+import time
+
+# Add the project root to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+CHANNEL = 'ai-investment-advisor-scaletest'
+
+
+class RedisStandIn(socketserver.ThreadingTCPServer):
+    """Just enough of the Redis protocol for Socket.IO's pub/sub manager"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, port: int = 0):
+        self.subscribers = {}  # channel -> set of handlers
+        self.lock = threading.Lock()
+        super().__init__(('127.0.0.1', port), RedisConnection)
+
+    @property
+    def url(self) -> str:
+        return f'redis://127.0.0.1:{self.server_address[1]}/0'
+
+    def publish(self, channel: bytes, message: bytes) -> int:
+        with self.lock:
+            receivers = list(self.subscribers.get(channel, ()))
+        for receiver in receivers:
+            receiver.send([b'message', channel, message])
+        return len(receivers)
+
+
+class RedisConnection(socketserver.StreamRequestHandler):
+    def setup(self):
+        super().setup()
+        self.write_lock = threading.Lock()
+        self.channels = set()
+
+    def handle(self):
+        while True:
+            command = self.read_command()
+            if command is None:
+                break
+            name = command[0].upper()
+            if name == b'PING':
+                self.send_raw(b'+PONG\r\n')
+            elif name == b'PUBLISH':
+                self.send(self.server.publish(command[1], command[2]))
+            elif name == b'SUBSCRIBE':
+                for channel in command[1:]:
+                    with self.server.lock:
+                        self.server.subscribers.setdefault(channel, set()).add(self)
+                    self.channels.add(channel)
+                    self.send([b'subscribe', channel, len(self.channels)])
+            elif name == b'UNSUBSCRIBE':
+                for channel in command[1:] or list(self.channels):
+                    with self.server.lock:
+                        self.server.subscribers.get(channel, set()).discard(self)
+                    self.channels.discard(channel)
+                    self.send([b'unsubscribe', channel, len(self.channels)])
+            elif name == b'SELECT':
+                self.send_raw(b'+OK\r\n')
+            else:
+                self.send_raw(b'-ERR unknown command\r\n')
+
+    def finish(self):
+        with self.server.lock:
+            for channel in self.channels:
+                self.server.subscribers.get(channel, set()).discard(self)
+        super().finish()
+
+    def read_command(self):
+        """Read one RESP array of bulk strings, or None at end of stream"""
+        header = self.rfile.readline()
+        if not header:
+            return None
+        if not header.startswith(b'*'):
+            return header.split()
+        parts = []
+        for _ in range(int(header[1:])):
+            length = int(self.rfile.readline()[1:])
+            parts.append(self.rfile.read(length + 2)[:-2])
+        return parts
+
+    def send(self, value):
+        self.send_raw(encode(value))
+
+    def send_raw(self, data: bytes):
+        with self.write_lock:
+            try:
+                self.wfile.write(data)
+                self.wfile.flush()
+            except OSError:
+                pass
+
+
+def encode(value) -> bytes:
+    if isinstance(value, int):
+        return b':%d\r\n' % value
+    if isinstance(value, bytes):
+        return b'$%d\r\n%s\r\n' % (len(value), value)
+    return b'*%d\r\n' % len(value) + b''.join(encode(item) for item in value)
+
+
+def serve(port: int, latency: float):
+    """Worker process: the real app with a stand-in coordinator"""
+    import app as server
+
+    def process_message(message: str, on_chunk=None, session=None, on_partial=None) -> dict:
+        if message.startswith('relay '):
+            # Emit to a client that may be connected to another process
+            _, target_sid = message.split(' ', 1)
+            server.socketio.emit('relayed', {'from_port': port}, to=target_sid)
+        else:
+            time.sleep(latency)
+        return {'message': f'echo from {port}: {message}', 'personality': 'Warren Buffett', 'data': None}
+
+    server.coordinator.process_message = process_message
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server.socketio.run(server.app, host='127.0.0.1', port=port, log_output=False, allow_unsafe_werkzeug=True)
+
+
+def start_workers(count: int, base_port: int, message_queue: str, latency: float) -> list:
+    env = dict(os.environ, SOCKETIO_MESSAGE_QUEUE=message_queue, SOCKETIO_CHANNEL=CHANNEL, FLASK_DEBUG='False')
+    workers = [
+        subprocess.Popen([sys.executable, os.path.abspath(__file__), '--serve', str(base_port + i),
+                          '--latency', str(latency)], env=env, stdout=subprocess.DEVNULL)
+        for i in range(count)
+    ]
+    for i in range(count):
+        wait_for_port(base_port + i)
+    return workers
+
+
+def wait_for_port(port: int, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"worker on port {port} did not start")
+
+
+class TestClient:
+    """Socket.IO client that collects replies and relayed events"""
+
+    def __init__(self, url: str):
+        import socketio
+
+        self.client = socketio.Client()
+        self.replies = []
+        self.relayed = []
+        self.broadcasts = []
+        self.reply_event = threading.Semaphore(0)
+        self.client.on('message_from_server', self.on_reply)
+        self.client.on('relayed', lambda data: self.relayed.append(data))
+        self.client.on('broadcast', lambda data: self.broadcasts.append(data))
+        self.client.connect(url, transports=['polling'])
+        self.sid = self.client.get_sid()
+
+    def on_reply(self, data):
+        if str(data.get('message', '')).startswith('echo from'):
+            self.replies.append(data['message'])
+            self.reply_event.release()
+
+    def ask(self, message: str, timeout: float = 30) -> bool:
+        self.client.emit('message_from_user', {'message': message})
+        return self.reply_event.acquire(timeout=timeout)
+
+
+def wait_until(condition, timeout: float = 10) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return condition()
+
+
+def check_routing(urls: list, message_queue: str) -> bool:
+    """The three cross-process checks from the module docstring"""
+    import socketio
+
+    clients = [TestClient(url) for url in urls]
+    ok = True
+
+    for client, url in zip(clients, urls):
+        client.ask('hello')
+        port = url.rsplit(':', 1)[1]
+        served_locally = client.replies and client.replies[-1].startswith(f'echo from {port}')
+        print(f"{'✅' if served_locally else '❌'} reply served by the client's own process ({url})")
+        ok = ok and served_locally
+
+    if len(clients) > 1:
+        first, last = clients[0], clients[-1]
+        last.ask(f'relay {first.sid}')
+        relayed = wait_until(lambda: first.relayed)
+        print(f"{'✅' if relayed else '❌'} emit from process {urls[-1]} reached a client on {urls[0]}")
+        ok = ok and relayed
+
+    emitter = socketio.RedisManager(message_queue, channel=CHANNEL, write_only=True)
+    emitter.emit('broadcast', {'text': 'to everyone'}, namespace='/')
+    broadcast = wait_until(lambda: all(client.broadcasts for client in clients))
+    print(f"{'✅' if broadcast else '❌'} external emitter reached clients on all {len(urls)} processes")
+    ok = ok and broadcast
+
+    for client in clients:
+        client.client.disconnect()
+    return ok
+
+
+def measure(urls: list, clients: int, messages: int) -> tuple:
+    """Clients spread round-robin over the processes; returns (completed, elapsed seconds)"""
+    completed = []
+
+    def run(url):
+        client = TestClient(url)
+        for i in range(messages):
+            if client.ask(f'load test {i}'):
+                completed.append(1)
+        client.client.disconnect()
+
+    threads = [threading.Thread(target=run, args=(urls[i % len(urls)],)) for i in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return len(completed), time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=2, help='app processes to start')
+    parser.add_argument('--clients', type=int, default=8, help='concurrent clients for the throughput run')
+    parser.add_argument('--messages', type=int, default=4, help='messages sent by each client')
+    parser.add_argument('--latency', type=float, default=0.5, help='simulated upstream latency per message')
+    parser.add_argument('--port', type=int, default=5060, help='port of the first app process')
+    parser.add_argument('--message-queue', help='Redis URL; a local stand-in is used when omitted')
+    parser.add_argument('--serve', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.latency)
+        return
+
+    stand_in = None
+    message_queue = args.message_queue
+    if not message_queue:
+        stand_in = RedisStandIn()
+        threading.Thread(target=stand_in.serve_forever, daemon=True).start()
+        message_queue = stand_in.url
+
+    print("🚀 SOCKET.IO MULTI-PROCESS TEST")
+    print(f"{args.workers} app processes, message queue: {message_queue}{' (stand-in)' if stand_in else ''}")
+    print("=" * 60)
+
+    workers = start_workers(args.workers, args.port, message_queue, args.latency)
+    try:
+        urls = [f'http://127.0.0.1:{args.port + i}' for i in range(args.workers)]
+        ok = check_routing(urls, message_queue)
+
+        completed, elapsed = measure(urls, args.clients, args.messages)
+        print(f"Throughput: {completed} messages from {args.clients} clients in {elapsed:.2f}s "
+              f"({completed / elapsed:.2f} msg/s)")
+        print("=" * 60)
+        print("✅ ALL CHECKS PASSED" if ok else "❌ SOME CHECKS FAILED")
+    finally:
+        for worker in workers:
+            worker.terminate()
+        for worker in workers:
+            worker.wait()
+        if stand_in:
+            stand_in.shutdown()
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
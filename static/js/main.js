@@ -9,6 +9,9 @@ document.addEventListener('DOMContentLoaded', () => {
     
     let currentPersonality = 'Warren Buffett';
     
+    // Replies built up from streamed chunks and partial results, keyed by request id
+    const pendingReplies = new Map();
+    
     // Input history management
     let inputHistory = [];
     let historyIndex = -1;
@@ -19,6 +22,14 @@ document.addEventListener('DOMContentLoaded', () => {
         const messageElement = document.createElement('div');
         messageElement.classList.add('message', `${sender}-message`);
         
+        messageElement.innerHTML = renderMessageContent(message, sender, personality, data);
+        chatBox.appendChild(messageElement);
+        chatBox.scrollTop = chatBox.scrollHeight;
+        return messageElement;
+    }
+    
+    // Function to build the HTML for a chat message
+    function renderMessageContent(message, sender, personality, data) {
         let messageContent = '';
         
         if (sender === 'bot' && personality) {
@@ -42,11 +53,70 @@ document.addEventListener('DOMContentLoaded', () => {
             messageContent += `<div class="news-data">${formatNewsData(data.news_data)}</div>`;
         }
         
-        messageElement.innerHTML = messageContent;
-        chatBox.appendChild(messageElement);
+        return messageContent;
+    }
+    
+    // Function to get (or start) the message bubble for a request
+    function getReply(requestId) {
+        let reply = pendingReplies.get(requestId);
+        
+        if (!reply) {
+            const element = addMessage('', 'bot', currentPersonality);
+            element.classList.add('streaming');
+            reply = { element: element, text: '', data: {} };
+            pendingReplies.set(requestId, reply);
+        }
+        
+        return reply;
+    }
+    
+    // Function to append a streamed chunk to the reply for a request
+    function appendChunk(requestId, chunk) {
+        const reply = getReply(requestId);
+        
+        reply.text += chunk;
+        reply.element.querySelector('.message-text').innerHTML = reply.text.replace(/\n/g, '<br>');
+        chatBox.scrollTop = chatBox.scrollHeight;
+    }
+    
+    // Function to add a quote or news card to the reply for a request
+    function addPartialResult(requestId, kind, partialData) {
+        const reply = getReply(requestId);
+        reply.data[kind] = partialData;
+        
+        const text = reply.text.replace(/\n/g, '<br>');
+        reply.element.innerHTML = renderMessageContent(text, 'bot', currentPersonality, reply.data);
         chatBox.scrollTop = chatBox.scrollHeight;
     }
     
+    // Function to replace a streamed reply with the final formatted message
+    function completeReply(requestId, message, personality, data) {
+        const reply = getReply(requestId);
+        
+        // Cards that arrived earlier stay in the bubble
+        reply.data = Object.assign(reply.data, data || {});
+        
+        reply.element.classList.remove('streaming');
+        reply.element.innerHTML = renderMessageContent(message, 'bot', personality, reply.data);
+        chatBox.scrollTop = chatBox.scrollHeight;
+        
+        // Final answers and error replies both end the request
+        pendingReplies.delete(requestId);
+    }
+    
+    // Function to abandon replies that will never complete (the server drops them on disconnect)
+    function abandonPendingReplies() {
+        pendingReplies.forEach((reply) => {
+            reply.element.classList.remove('streaming');
+        });
+        pendingReplies.clear();
+    }
+    
+    // Function to create a unique id for each request
+    function createRequestId() {
+        return Date.now().toString(36) + Math.random().toString(36).slice(2, 10);
+    }
+    
     // Function to format stock data
     function formatStockData(stockData) {
         if (typeof stockData === 'string') {
@@ -178,7 +248,7 @@ document.addEventListener('DOMContentLoaded', () => {
         if (message) {
             addToHistory(message);
             addMessage(message, 'user');
-            socket.emit('message_from_user', { message: message });
+            socket.emit('message_from_user', { message: message, request_id: createRequestId() });
             messageInput.value = '';
             messageInput.classList.remove('history-mode');
         }
@@ -244,6 +314,15 @@ document.addEventListener('DOMContentLoaded', () => {
     
     socket.on('disconnect', () => {
         console.log('Disconnected from server');
+        abandonPendingReplies();
+    });
+    
+    socket.on('message_chunk', (data) => {
+        appendChunk(data.request_id, data.chunk);
+    });
+    
+    socket.on('partial_result', (data) => {
+        addPartialResult(data.request_id, data.kind, data.data);
     });
     
     socket.on('message_from_server', (data) => {
@@ -251,7 +330,11 @@ document.addEventListener('DOMContentLoaded', () => {
         const personality = data.personality || currentPersonality;
         const stockData = data.data || null;
         
-        addMessage(message, 'bot', personality, stockData);
+        if (data.request_id) {
+            completeReply(data.request_id, message, personality, stockData);
+        } else {
+            addMessage(message, 'bot', personality, stockData);
+        }
     });
     
     socket.on('personality_updated', (data) => {
@@ -265,6 +348,7 @@ document.addEventListener('DOMContentLoaded', () => {
     
     socket.on('error', (error) => {
         console.error('Socket error:', error);
+        abandonPendingReplies();
         addMessage('Connection error. Please refresh the page.', 'bot');
     });
     
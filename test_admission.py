@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Test script for admission control of chat messages
+Checks load shedding when the queue is full, the per-client limit,
+cancellation of queued and running work on disconnect, and that a
+cancelled SingleFlight leader hands the call over to its followers.
+Runs offline.
+"""
+
+import sys
+import os
+import threading
+import time
+
+# Add the project root to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from agents.admission import AdmissionController, Overloaded
+from agents.single_flight import Cancelled, SingleFlight
+
+
+def start(controller, ticket, fn, *args):
+    thread = threading.Thread(target=controller.run, args=(ticket, fn) + args)
+    thread.start()
+    return thread
+
+
+def test_shedding():
+    """Messages beyond the running and queued limits are rejected at once"""
+    print("=" * 60)
+    print("TESTING LOAD SHEDDING")
+    print("=" * 60)
+
+    controller = AdmissionController(max_active=1, max_queued=2, per_client=5)
+    release = threading.Event()
+    tickets = [controller.admit(f'client-{i}', str(i)) for i in range(2)]
+    threads = [start(controller, ticket, release.wait) for ticket in tickets]
+    time.sleep(0.1)
+
+    controller.admit('client-2', '2')  # fills the queue behind the running message
+    try:
+        controller.admit('client-3', '3')
+        assert False, "expected the fourth message to be shed"
+    except Overloaded as e:
+        print(f"Shed: {e.user_message}")
+        assert e.reason == 'busy' and e.retry_after >= 1
+
+    stats = controller.stats()
+    print(f"Stats while saturated: {stats}")
+    assert stats['active'] == 1 and stats['queued'] == 2 and stats['shed_busy'] == 1
+
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert controller.stats()['completed'] == 2
+
+
+def test_per_client_limit():
+    """One client cannot hold more than per_client admitted messages"""
+    print("\n" + "=" * 60)
+    print("TESTING PER-CLIENT LIMIT")
+    print("=" * 60)
+
+    controller = AdmissionController(max_active=4, max_queued=8, per_client=1)
+    ticket = controller.admit('alice', '1')
+    try:
+        controller.admit('alice', '2')
+        assert False, "expected alice's second message to be shed"
+    except Overloaded as e:
+        assert e.reason == 'client'
+    controller.admit('bob', '1')
+
+    controller.run(ticket, lambda: None)
+    controller.admit('alice', '3')  # a slot of her own is free again
+    assert controller.stats()['shed_client'] == 1
+
+
+def test_cancel_on_disconnect():
+    """Queued work never starts and running work stops at its next check"""
+    print("\n" + "=" * 60)
+    print("TESTING CANCELLATION")
+    print("=" * 60)
+
+    controller = AdmissionController(max_active=1, max_queued=4, per_client=2)
+    ran = []
+
+    def work(ticket, name):
+        for _ in range(50):
+            ticket.check()
+            time.sleep(0.01)
+        ran.append(name)
+        return name
+
+    running = controller.admit('alice', 'running')
+    queued = controller.admit('alice', 'queued')
+    threads = [start(controller, running, work, running, 'running'),
+               start(controller, queued, work, queued, 'queued')]
+    time.sleep(0.1)
+
+    assert controller.cancel('alice') == 2
+    for thread in threads:
+        thread.join(timeout=2)
+    stats = controller.stats()
+    print(f"Stats after disconnect: {stats}")
+    assert ran == [] and stats['active'] == 0 and stats['queued'] == 0 and stats['clients'] == 0
+    assert controller.run(controller.admit('bob', '1'), lambda: 'ok') == 'ok'
+
+
+def test_cancelled_leader():
+    """Followers of a cancelled leader run the call themselves instead of failing"""
+    print("\n" + "=" * 60)
+    print("TESTING CANCELLED SINGLE-FLIGHT LEADER")
+    print("=" * 60)
+
+    flight = SingleFlight()
+    started = threading.Event()
+    results = []
+
+    def leader_call():
+        started.set()
+        time.sleep(0.1)
+        raise Cancelled("leader's client went away")
+
+    def follower():
+        started.wait()
+        results.append(flight.do('key', lambda: 'answer'))
+
+    thread = threading.Thread(target=follower)
+    thread.start()
+    try:
+        flight.do('key', leader_call)
+    except Cancelled:
+        pass
+    thread.join()
+    print(f"Follower got: {results}")
+    assert results == [('answer', False)]
+
+
+def main():
+    """Run all tests"""
+    test_shedding()
+    test_per_client_limit()
+    test_cancel_on_disconnect()
+    test_cancelled_leader()
+    print("\n✅ ALL ADMISSION TESTS COMPLETED")
+
+
+if __name__ == "__main__":
+    main()
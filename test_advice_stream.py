@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Test script for streamed trading advice
+Feeds the advice agent scripted OpenAI streams and checks that only
+completions that finished normally are cached and shared with coalesced
+callers, while one that breaks off part-way is shown to its own caller
+with a note. Runs offline.
+"""
+
+import sys
+import os
+import threading
+import time
+from types import SimpleNamespace
+
+# Add the project root to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from agents.base_agent import OPENAI_MODEL, llm_in_flight
+from agents.response_cache import llm_response_cache
+from agents.trading_advice_agent import INCOMPLETE_ADVICE_NOTE, TradingAdviceAgent
+
+
+def chunk(content=None, finish_reason=None):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content),
+                                                    finish_reason=finish_reason)])
+
+
+class ScriptedStream:
+    """Yields chunks, then raises `error` if given"""
+
+    def __init__(self, chunks, error=None, started=None, proceed=None):
+        self.chunks = chunks
+        self.error = error
+        self.started = started
+        self.proceed = proceed
+        self.response = SimpleNamespace(close=lambda: None)
+
+    def __iter__(self):
+        for i, item in enumerate(self.chunks):
+            if i == 1 and self.started:
+                # Let a second caller join while this stream is under way
+                self.started.set()
+                self.proceed.wait(timeout=5)
+            yield item
+        if self.error:
+            raise self.error
+
+
+class ScriptedAgent(TradingAdviceAgent):
+    """Advice agent whose OpenAI client returns the scripted streams in order"""
+
+    def __init__(self, streams):
+        super().__init__()
+        self.streams = list(streams)
+        self.requests = 0
+        completions = SimpleNamespace(create=self.create)
+        self.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+
+    @property
+    def openai_client(self):
+        return self.client
+
+    def create(self, **kwargs):
+        self.requests += 1
+        return self.streams.pop(0)
+
+
+def cached_answer(agent, message):
+    system_prompt, _ = agent.build_prompt(message, None, "Warren Buffett")
+    return llm_response_cache.get(llm_response_cache.make_key(OPENAI_MODEL, system_prompt, message, None))
+
+
+def test_broken_stream_is_not_cached():
+    """A stream that fails after the first chunk is returned with a note and not cached"""
+    print("=" * 60)
+    print("TESTING STREAM THAT BREAKS OFF")
+    print("=" * 60)
+
+    message = "Should I buy ACME? (broken stream test)"
+    agent = ScriptedAgent([
+        ScriptedStream([chunk("**RECOMMENDATION: BUY**"), chunk(" because")], error=ConnectionError("reset")),
+        ScriptedStream([chunk("**RECOMMENDATION: HOLD**"), chunk(" for now", finish_reason='stop')]),
+    ])
+
+    streamed = []
+    response = agent.process_request(message, on_chunk=streamed.append, personality="Warren Buffett")
+    print(f"Broken answer: {response['message']!r}")
+    assert response['message'] == "**RECOMMENDATION: BUY** because" + INCOMPLETE_ADVICE_NOTE
+    assert streamed[-1] == INCOMPLETE_ADVICE_NOTE
+    assert cached_answer(agent, message) is None
+
+    # Asking again runs a new completion, and a complete one is cached
+    response = agent.process_request(message, on_chunk=lambda text: None, personality="Warren Buffett")
+    assert response['message'] == "**RECOMMENDATION: HOLD** for now"
+    assert agent.requests == 2 and cached_answer(agent, message) == response['message']
+
+
+def test_truncated_stream_is_not_cached():
+    """A stream that ends without finish_reason 'stop' (here: max_tokens) is not cached"""
+    print("\n" + "=" * 60)
+    print("TESTING STREAM CUT OFF BY LENGTH")
+    print("=" * 60)
+
+    message = "Should I buy ACME? (length test)"
+    agent = ScriptedAgent([ScriptedStream([chunk("**RECOMMENDATION: SELL**"), chunk(" and", finish_reason='length')])])
+    response = agent.process_request(message, on_chunk=lambda text: None, personality="Warren Buffett")
+    assert response['message'].endswith(INCOMPLETE_ADVICE_NOTE)
+    assert cached_answer(agent, message) is None
+
+
+def test_follower_does_not_share_fragment():
+    """A caller coalesced onto a stream that breaks off gets its own complete answer"""
+    print("\n" + "=" * 60)
+    print("TESTING COALESCED CALLER OF A BROKEN STREAM")
+    print("=" * 60)
+
+    message = "Should I buy ACME? (coalescing test)"
+    started, proceed = threading.Event(), threading.Event()
+    agent = ScriptedAgent([
+        ScriptedStream([chunk("**RECOMMENDATION: BUY**"), chunk(" because")], error=ConnectionError("reset"),
+                       started=started, proceed=proceed),
+        ScriptedStream([chunk("**RECOMMENDATION: HOLD**"), chunk(" for now", finish_reason='stop')]),
+    ])
+
+    results = {}
+
+    def ask(name):
+        results[name] = agent.process_request(message, on_chunk=lambda text: None, personality="Warren Buffett")
+
+    leader = threading.Thread(target=ask, args=('leader',))
+    leader.start()
+    started.wait(timeout=5)
+    coalesced = llm_in_flight.coalesced
+    follower = threading.Thread(target=ask, args=('follower',))
+    follower.start()
+    deadline = time.monotonic() + 5
+    while llm_in_flight.coalesced == coalesced and time.monotonic() < deadline:
+        time.sleep(0.01)
+    proceed.set()
+    leader.join()
+    follower.join()
+
+    print(f"Leader: {results['leader']['message']!r}")
+    print(f"Follower: {results['follower']['message']!r}")
+    assert results['leader']['message'].endswith(INCOMPLETE_ADVICE_NOTE)
+    assert results['follower']['message'] == "**RECOMMENDATION: HOLD** for now"
+    assert cached_answer(agent, message) == "**RECOMMENDATION: HOLD** for now"
+
+
+def main():
+    """Run all tests"""
+    test_broken_stream_is_not_cached()
+    test_truncated_stream_is_not_cached()
+    test_follower_does_not_share_fragment()
+    print("\n✅ ALL ADVICE STREAM TESTS COMPLETED")
+
+
+if __name__ == "__main__":
+    main()
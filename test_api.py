@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Test script for the JSON API
+Serves quotes, price history and news from temporary stores and checks
+the JSON shapes, ETag/Last-Modified revalidation with 304 responses,
+Cache-Control lifetimes, that an incomplete news answer is never
+revalidated once the gap is filled, and parameter validation. Runs
+offline: any attempt to fetch from Alpha Vantage fails the test.
+"""
+
+import sys
+import os
+import tempfile
+import time
+import numpy as np
+from datetime import timedelta
+from flask import Flask
+
+# Add the project root to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from api import SETTLED_MAX_AGE, create_api
+from agents.market_calendar import nyse_calendar
+from agents.news_store import NewsStore
+from agents.price_cache import PriceHistory
+from agents.price_store import PriceStore
+from agents.rate_limiter import RateLimitExceeded
+from agents.stock_news_agent import StockNewsAgent
+from agents.stock_quote_agent import StockQuoteAgent
+
+
+def no_fetch(*args, **kwargs):
+    raise AssertionError("the API fetched from Alpha Vantage although the stores were fresh")
+
+
+def create_client(folder: str):
+    """Test client for an app whose agents use stores in folder"""
+    quote_agent = StockQuoteAgent()
+    quote_agent.price_store = PriceStore(os.path.join(folder, 'prices'))
+    quote_agent.fetch_time_series = no_fetch
+
+    news_agent = StockNewsAgent()
+    news_agent.news_store = NewsStore(os.path.join(folder, 'news.db'))
+    news_agent.fetch_news = no_fetch
+
+    # Sixty trading days up to the last completed session, fetched just now
+    last_session = nyse_calendar.last_completed_session()
+    days = [last_session]
+    while len(days) < 60:
+        days.insert(0, nyse_calendar.previous_trading_day(days[0], inclusive=False))
+    prices = np.arange(60, dtype=np.float64) + 100
+    history = PriceHistory(np.array(days, dtype='datetime64[D]'), prices, prices + 1, prices - 1,
+                           prices + 0.5, np.arange(60) * 1000)
+    quote_agent.price_store.append('APIT', history, covered=(days[0], last_session))
+
+    published = last_session.strftime('%Y%m%dT120000')
+    news_agent.news_store.store_articles([{
+        'url': 'https://example.com/a', 'title': 'APIT beats estimates', 'summary': 'Strong quarter',
+        'source': 'Wire', 'time_published': published,
+        'ticker_sentiment': [{'ticker': 'APIT', 'relevance_score': '0.9', 'ticker_sentiment_score': '0.4',
+                              'ticker_sentiment_label': 'Bullish'}]
+    }])
+    coverage = [[(last_session - timedelta(days=90)).isoformat(), (last_session + timedelta(days=10)).isoformat()]]
+    news_agent.news_store.update_meta('APIT', lambda meta: dict(meta, coverage=coverage, fetched_at=time.time()))
+
+    app = Flask(__name__)
+    app.register_blueprint(create_api(quote_agent, news_agent))
+    client = app.test_client()
+    client.news_agent = news_agent
+    return client, days
+
+
+def max_age(response) -> int:
+    for directive in response.headers['Cache-Control'].split(','):
+        name, _, value = directive.strip().partition('=')
+        if name == 'max-age':
+            return int(value)
+    return 0
+
+
+def test_quote_and_revalidation():
+    """Quotes are structured JSON and repeats revalidate to 304"""
+    print("=" * 60)
+    print("TESTING QUOTE AND REVALIDATION")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as folder:
+        client, days = create_client(folder)
+
+        response = client.get('/api/quote/apit')
+        body = response.get_json()
+        print(f"Quote: {body}")
+        print(f"Headers: ETag={response.headers['ETag']}, Cache-Control={response.headers['Cache-Control']}")
+        assert response.status_code == 200
+        assert body['quote'] == {'date': days[-1].isoformat(), 'open': 159.0, 'high': 160.0, 'low': 158.0,
+                                 'close': 159.5, 'volume': 59000}
+        assert body['previous_close'] == 158.5 and body['change'] == 1.0
+        assert max_age(response) > 0 and 'Last-Modified' in response.headers
+
+        etag = response.headers['ETag']
+        assert client.get('/api/quote/APIT', headers={'If-None-Match': etag}).status_code == 304
+        modified = client.get('/api/quote/APIT', headers={'If-Modified-Since': response.headers['Last-Modified']})
+        assert modified.status_code == 304
+
+
+def test_history():
+    """History is limited to the requested range; settled ranges are cacheable for long"""
+    print("\n" + "=" * 60)
+    print("TESTING HISTORY")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as folder:
+        client, days = create_client(folder)
+
+        response = client.get(f'/api/history/APIT?from={days[10].isoformat()}&to={days[19].isoformat()}')
+        prices = response.get_json()['prices']
+        print(f"{len(prices)} rows, Cache-Control={response.headers['Cache-Control']}")
+        assert [row['date'] for row in prices] == [day.isoformat() for day in days[10:20]]
+        assert max_age(response) == SETTLED_MAX_AGE
+
+        assert client.get('/api/history/APIT?from=2024-13-01').status_code == 400
+        assert client.get(f'/api/history/APIT?from={days[5]}&to={days[1]}').status_code == 400
+        assert client.get('/api/history/NOT%20A%20TICKER').status_code == 400
+
+
+def test_news():
+    """News articles come back as JSON, optionally narrowed by full-text search"""
+    print("\n" + "=" * 60)
+    print("TESTING NEWS")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as folder:
+        client, days = create_client(folder)
+        window = f'from={(days[-1] - timedelta(days=7)).isoformat()}&to={days[-1].isoformat()}'
+
+        response = client.get(f'/api/news/APIT?{window}')
+        body = response.get_json()
+        print(f"News: {body}")
+        assert body['complete'] and len(body['articles']) == 1
+        article = body['articles'][0]
+        assert article['title'] == 'APIT beats estimates' and article['sentiment'] == 'Bullish'
+        assert article['published_at'] == days[-1].strftime('%Y-%m-%dT12:00:00Z')
+
+        assert client.get(f'/api/news/APIT?{window}&q=estimates').get_json()['articles']
+        assert not client.get(f'/api/news/APIT?{window}&q=tariffs').get_json()['articles']
+        assert client.get(f'/api/news/APIT?{window}', headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+
+
+def test_incomplete_news_revalidation():
+    """An answer missing a rate-limited window is not kept, and revalidating it returns the filled range"""
+    print("\n" + "=" * 60)
+    print("TESTING INCOMPLETE NEWS REVALIDATION")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as folder:
+        client, days = create_client(folder)
+        end = days[-1] - timedelta(days=120)
+        start = end - timedelta(days=9)
+        window = f'from={start.isoformat()}&to={end.isoformat()}'
+        outcomes = [RateLimitExceeded(30), None]
+
+        def fetch_news_window(ticker, window_start, window_end, priority=None):
+            outcome = outcomes.pop(0)
+            if outcome:
+                raise outcome
+            published = window_end.strftime('%Y%m%dT090000')
+            return [{
+                'url': f'https://example.com/{ticker}/backfill', 'title': 'APIT older story', 'summary': '',
+                'source': 'Wire', 'time_published': published,
+                'ticker_sentiment': [{'ticker': ticker, 'relevance_score': '0.5', 'ticker_sentiment_score': '0.0',
+                                      'ticker_sentiment_label': 'Neutral'}]
+            }], [(window_start, window_end)]
+
+        client.news_agent.fetch_news_window = fetch_news_window
+
+        first = client.get(f'/api/news/APIT?{window}')
+        print(f"First: {first.get_json()}, Cache-Control={first.headers['Cache-Control']}")
+        assert not first.get_json()['complete'] and not first.get_json()['articles']
+        assert max_age(first) == 0 and 'Last-Modified' not in first.headers
+
+        revalidated = client.get(f'/api/news/APIT?{window}', headers={
+            'If-None-Match': first.headers['ETag'], 'If-Modified-Since': 'Mon, 01 Jan 2024 00:00:00 GMT'
+        })
+        body = revalidated.get_json()
+        print(f"Revalidated: {revalidated.status_code} {body}")
+        assert revalidated.status_code == 200 and body['complete'] and len(body['articles']) == 1
+        assert max_age(revalidated) == SETTLED_MAX_AGE and not outcomes
+
+
+def main():
+    """Run all tests"""
+    test_quote_and_revalidation()
+    test_history()
+    test_news()
+    test_incomplete_news_revalidation()
+    print("\n✅ ALL API TESTS COMPLETED")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Test script for the offline NYSE trading calendar
+Checks holiday rules, trading-day counts, nearest-day lookups, the last
+completed session around the close and the phase-aware cache TTLs.
+"""
+
+import sys
+import os
+from datetime import date, datetime
+
+# Add the project root to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from agents.cache_policy import EXPIRED, FRESH, NEWS_POLICY, STALE
+from agents.market_calendar import CLOSED, MARKET_TIMEZONE, POST_MARKET, PRE_MARKET, SESSION, nyse_calendar, nyse_holidays
+
+
+def test_holidays():
+    """Generated holidays match the published NYSE schedule"""
+    print("=" * 60)
+    print("TESTING HOLIDAYS")
+    print("=" * 60)
+
+    holidays_2024 = sorted(day.isoformat() for day in nyse_holidays(2024))
+    print(f"2024 holidays: {holidays_2024}")
+    assert holidays_2024 == [
+        '2024-01-01', '2024-01-15', '2024-02-19', '2024-03-29', '2024-05-27',
+        '2024-06-19', '2024-07-04', '2024-09-02', '2024-11-28', '2024-12-25'
+    ]
+
+    # Saturday Independence Day is observed on Friday; one-off closures are included
+    assert nyse_calendar.holiday_name('2026-07-03') == "Independence Day"
+    assert not nyse_calendar.is_trading_day('2025-01-09')
+    assert nyse_calendar.trading_days_between('2024-01-01', '2025-01-01') == 252
+
+
+def test_nearest_and_sessions():
+    """Nearest/previous trading days and the last completed session"""
+    print("\n" + "=" * 60)
+    print("TESTING LOOKUPS")
+    print("=" * 60)
+
+    assert nyse_calendar.nearest_trading_day('2024-12-25') == date(2024, 12, 24)
+    assert nyse_calendar.previous_trading_day('2024-03-31') == date(2024, 3, 28)
+    assert nyse_calendar.next_trading_day('2024-03-29') == date(2024, 4, 1)
+
+    # Day after Thanksgiving closes at 1 p.m.
+    early_close = datetime(2024, 11, 29, 13, 30, tzinfo=MARKET_TIMEZONE)
+    monday_open = datetime(2024, 12, 2, 10, 0, tzinfo=MARKET_TIMEZONE)
+    print(f"Last session at {early_close}: {nyse_calendar.last_completed_session(early_close)}")
+    print(f"Last session at {monday_open}: {nyse_calendar.last_completed_session(monday_open)}")
+    assert nyse_calendar.last_completed_session(early_close) == date(2024, 11, 29)
+    assert nyse_calendar.last_completed_session(monday_open) == date(2024, 11, 29)
+
+
+def test_phases_and_cache_policy():
+    """Market phases drive the TTL used for freshness checks"""
+    print("\n" + "=" * 60)
+    print("TESTING PHASES AND CACHE POLICY")
+    print("=" * 60)
+
+    def at(day, hour, minute=0):
+        return datetime(2024, 11, day, hour, minute, tzinfo=MARKET_TIMEZONE)
+
+    assert nyse_calendar.phase(at(26, 8)) == PRE_MARKET
+    assert nyse_calendar.phase(at(26, 11)) == SESSION
+    assert nyse_calendar.phase(at(29, 14)) == POST_MARKET  # early close
+    assert nyse_calendar.phase(at(26, 22)) == CLOSED
+    assert nyse_calendar.phase(at(28, 11)) == CLOSED  # Thanksgiving
+
+    session = at(26, 11).timestamp()
+    closed = at(28, 11).timestamp()
+    states = [
+        NEWS_POLICY.freshness(session - 10 * 60, now=session),
+        NEWS_POLICY.freshness(session - 60 * 60, now=session),
+        NEWS_POLICY.freshness(closed - 60 * 60, now=closed),
+        NEWS_POLICY.freshness(session - 3 * 24 * 3600, now=session),
+        NEWS_POLICY.freshness(None, now=session),
+    ]
+    print(f"News freshness: {states}")
+    assert states == [FRESH, STALE, FRESH, EXPIRED, EXPIRED]
+
+
+def main():
+    """Run all tests"""
+    test_holidays()
+    test_nearest_and_sessions()
+    test_phases_and_cache_policy()
+    print("\n✅ ALL MARKET CALENDAR TESTS COMPLETED")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Test script for news backfill
+Replaces the Alpha Vantage call with a scripted feed and checks that long
+ranges are split into windows, that a window hitting the article limit is
+halved, that only windows that were fetched completely are recorded as
+covered while failed ones are reported, and that a batch fetch for several
+tickers spares their later requests an upstream call. Runs offline in a
+temporary directory.
+"""
+
+import sys
+import os
+import tempfile
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+
+# Add the project root to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import agents.stock_news_agent as news_module
+from agents.news_store import NewsStore
+from agents.rate_limiter import RateLimitExceeded
+from agents.stock_news_agent import StockNewsAgent, split_windows
+
+
+class ScriptedFeed:
+    """Stand-in for query_alpha_vantage serving `per_day` articles for every day asked for.
+
+    Calls without time_from get the last `recent_days` days, like a latest-news query.
+    """
+
+    def __init__(self, *tickers, per_day: int = 1, fail_from=None, recent_days: int = 3):
+        self.tickers = tickers
+        self.per_day = per_day
+        self.fail_from = fail_from  # time_from values answered with RateLimitExceeded
+        self.recent_days = recent_days
+        self.calls = []
+
+    def __call__(self, params, priority=None, max_wait=None):
+        self.calls.append(params)
+        if params.get('time_from') in (self.fail_from or ()):
+            raise RateLimitExceeded(30)
+
+        if 'time_from' in params:
+            start = datetime.strptime(params['time_from'][:8], '%Y%m%d').date()
+            end = datetime.strptime(params['time_to'][:8], '%Y%m%d').date()
+        else:
+            end = datetime.now().date()
+            start = end - timedelta(days=self.recent_days - 1)
+        feed = []
+        day = start
+        while day <= end:
+            for i in range(self.per_day):
+                feed.append({
+                    'url': f'https://example.com/{"-".join(self.tickers)}/{day}/{i}',
+                    'title': f'{" and ".join(self.tickers)} story {i}',
+                    'summary': '', 'source': 'Wire', 'time_published': day.strftime('%Y%m%dT120000'),
+                    'ticker_sentiment': [{'ticker': ticker, 'relevance_score': '0.5',
+                                          'ticker_sentiment_score': '0.1', 'ticker_sentiment_label': 'Neutral'}
+                                         for ticker in self.tickers]
+                })
+            day += timedelta(days=1)
+        return {'feed': feed[:params['limit']]}
+
+
+@contextmanager
+def scripted(feed, **settings):
+    """Route the news agent's upstream calls to feed and override module settings"""
+    saved = {name: getattr(news_module, name) for name in ['query_alpha_vantage', *settings]}
+    news_module.query_alpha_vantage = feed
+    for name, value in settings.items():
+        setattr(news_module, name, value)
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(news_module, name, value)
+
+
+def create_agent(folder: str) -> StockNewsAgent:
+    agent = StockNewsAgent()
+    agent.news_store = NewsStore(os.path.join(folder, 'news.db'))
+    return agent
+
+
+def test_split_windows():
+    """Ranges are cut into consecutive windows of at most the given length"""
+    print("=" * 60)
+    print("TESTING WINDOW SPLITTING")
+    print("=" * 60)
+
+    windows = split_windows(date(2024, 1, 1), date(2024, 2, 15), 30)
+    print(f"Windows: {windows}")
+    assert windows == [(date(2024, 1, 1), date(2024, 1, 30)), (date(2024, 1, 31), date(2024, 2, 15))]
+    assert split_windows(date(2024, 1, 1), date(2024, 1, 1), 30) == [(date(2024, 1, 1), date(2024, 1, 1))]
+    assert split_windows(date(2024, 1, 2), date(2024, 1, 1), 30) == []
+
+    # The default news range (the last 30 days plus today) is a single window
+    agent = StockNewsAgent()
+    default_range = agent.default_date_range()
+    start, end = date.fromisoformat(default_range['start_date']), date.fromisoformat(default_range['end_date'])
+    assert split_windows(start, end, news_module.NEWS_BACKFILL_WINDOW_DAYS) == [(start, end)]
+    assert split_windows(date(2024, 1, 1), date(2024, 2, 3), 30) == [(date(2024, 1, 1), date(2024, 2, 3))]
+
+
+def test_full_window_is_halved():
+    """A window that returns the article limit is fetched again as two halves"""
+    print("\n" + "=" * 60)
+    print("TESTING FULL WINDOW SPLIT")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as folder:
+        agent = create_agent(folder)
+        feed = ScriptedFeed('BKFL', per_day=2)
+        with scripted(feed, NEWS_BACKFILL_LIMIT=10):
+            items, covered = agent.fetch_news_window('BKFL', date(2024, 3, 1), date(2024, 3, 8))
+
+        print(f"{len(feed.calls)} calls, covered: {covered}")
+        assert len(feed.calls) == 3  # the full 8-day window, then two 4-day halves
+        assert covered == [(date(2024, 3, 1), date(2024, 3, 4)), (date(2024, 3, 5), date(2024, 3, 8))]
+        assert len({item['url'] for item in items}) == 16
+
+
+def test_failed_window_is_reported():
+    """A rate-limited window is counted as failed and stays uncovered; the others are recorded"""
+    print("\n" + "=" * 60)
+    print("TESTING FAILED WINDOW")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as folder:
+        agent = create_agent(folder)
+        start = datetime.now().date() - timedelta(days=20)
+        end = start + timedelta(days=8)
+        date_range = {'start_date': start.isoformat(), 'end_date': end.isoformat()}
+        middle = (start + timedelta(days=3), start + timedelta(days=5))
+
+        feed = ScriptedFeed('BKFL', fail_from={middle[0].strftime('%Y%m%dT0000')})
+        with scripted(feed, NEWS_BACKFILL_WINDOW_DAYS=3):
+            failed = agent.backfill_range('BKFL', date_range)
+
+        gaps = agent.coverage_gaps('BKFL', date_range)
+        print(f"Failed windows: {failed}, remaining gaps: {gaps}")
+        assert failed == 1 and len(feed.calls) == 3
+        assert gaps == [middle]
+        assert agent.news_store.article_count('BKFL') == 6
+
+        # Asking again only fetches the window that failed
+        feed = ScriptedFeed('BKFL')
+        with scripted(feed, NEWS_BACKFILL_WINDOW_DAYS=3):
+            assert agent.backfill_range('BKFL', date_range) == 0
+        assert len(feed.calls) == 1 and not agent.coverage_gaps('BKFL', date_range)
+
+
+def test_batch_covers_later_requests():
+    """After a batch fetch, a single ticker's request within its span is served without an upstream call"""
+    print("\n" + "=" * 60)
+    print("TESTING BATCH FETCH COVERAGE")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as folder:
+        agent = create_agent(folder)
+        feed = ScriptedFeed('BTCA', 'BTCB', recent_days=3)
+        today = datetime.now().date()
+        date_range = {'start_date': (today - timedelta(days=2)).isoformat(), 'end_date': today.isoformat()}
+
+        with scripted(feed):
+            assert agent.fetch_news_batch(['BTCA', 'BTCB']) == 3
+            assert len(feed.calls) == 1 and 'tickers' not in feed.calls[0]
+
+            for ticker in ['BTCA', 'BTCB']:
+                meta = agent.news_store.get_meta(ticker)
+                print(f"{ticker} meta: {meta}")
+                assert meta['fetched_at'] and meta['watermark'] == today.strftime('%Y%m%dT120000')
+                assert not agent.coverage_gaps(ticker, date_range)
+
+                news = agent.get_news_data(ticker, date_range)
+                assert f"Recent news for {ticker}" in news
+        assert len(feed.calls) == 1
+
+    # A feed that hits the article limit is stored but proves nothing about coverage
+    with tempfile.TemporaryDirectory() as folder:
+        agent = create_agent(folder)
+        feed = ScriptedFeed('BTCA', 'BTCB', per_day=4, recent_days=3)
+        with scripted(feed, NEWS_BACKFILL_LIMIT=10):
+            assert agent.fetch_news_batch(['BTCA', 'BTCB']) == 10
+        for ticker in ['BTCA', 'BTCB']:
+            assert agent.news_store.get_meta(ticker) == {} and agent.coverage_gaps(ticker, date_range)
+
+
+def main():
+    """Run all tests"""
+    test_split_windows()
+    test_full_window_is_halved()
+    test_failed_window_is_reported()
+    test_batch_covers_later_requests()
+    print("\n✅ ALL NEWS BACKFILL TESTS COMPLETED")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Test script for the SQLite news store
+Checks that articles are stored once with every ticker they mention,
+date-range and full-text queries, the daily sentiment rollup, meta
+bookkeeping and CSV migration.
+Runs offline in a temporary directory.
+"""
+
+import sys
+import os
+import tempfile
+import pandas as pd
+
+# Add the project root to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from agents.news_store import ARTICLE_COLUMNS, NewsStore
+from agents.sentiment_rollup import summarize
+from agents.stock_news_agent import fts_query
+
+
+def news_item(url, published, title, summary, tickers):
+    return {
+        'url': url, 'title': title, 'summary': summary, 'source': 'Wire',
+        'time_published': published,
+        'overall_sentiment_score': 0.1, 'overall_sentiment_label': 'Neutral',
+        'ticker_sentiment': [
+            {'ticker': ticker, 'relevance_score': '0.5', 'ticker_sentiment_score': '0.2',
+             'ticker_sentiment_label': 'Somewhat-Bullish'}
+            for ticker in tickers
+        ]
+    }
+
+
+SAMPLE_FEED = [
+    news_item('https://a', '20240105T120000', "Apple and Microsoft rally", "Tech stocks gain", ['AAPL', 'MSFT']),
+    news_item('https://b', '20240110T090000', "Apple faces new tariffs", "Import tariffs on phones", ['AAPL']),
+    news_item('https://c', '20240201T150000', "Microsoft cloud growth", "Azure revenue beats", ['MSFT']),
+]
+
+
+def test_store_and_fan_out():
+    """Each article is stored once and is visible from every ticker it mentions"""
+    print("=" * 60)
+    print("TESTING STORE AND FAN-OUT")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as folder:
+        store = NewsStore(os.path.join(folder, 'news.db'))
+        assert store.store_articles(SAMPLE_FEED) == 3
+        assert store.store_articles(SAMPLE_FEED[:2]) == 0
+
+        stats = store.stats()
+        print(f"Stats: {stats}")
+        assert stats['articles'] == 3 and stats['mentions'] == 4
+        assert store.tickers() == {'AAPL', 'MSFT'}
+        assert store.article_count('MSFT') == 2
+
+
+def test_date_range_and_search():
+    """Range queries are inclusive of both days; FTS narrows them to matching articles"""
+    print("\n" + "=" * 60)
+    print("TESTING DATE RANGE AND SEARCH")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as folder:
+        store = NewsStore(os.path.join(folder, 'news.db'))
+        store.store_articles(SAMPLE_FEED)
+
+        january = store.articles_for('AAPL', '2024-01-05', '2024-01-10')
+        assert list(january.columns) == ARTICLE_COLUMNS
+        assert list(january['url']) == ['https://b', 'https://a']
+        assert january['Date'].iloc[0] == pd.Timestamp('2024-01-10')
+
+        assert store.articles_for('MSFT', '2024-01-06', '2024-01-31').empty
+
+        tariffs = store.articles_for('AAPL', '2024-01-01', '2024-12-31', search=fts_query('tariffs'))
+        print(f"Matches for 'tariffs': {list(tariffs['title'])}")
+        assert list(tariffs['url']) == ['https://b']
+        assert store.articles_for('MSFT', '2024-01-01', '2024-12-31', search=fts_query('tariffs')).empty
+
+
+def test_sentiment_rollup():
+    """The daily rollup follows stored articles, including re-scored ones"""
+    print("\n" + "=" * 60)
+    print("TESTING SENTIMENT ROLLUP")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as folder:
+        store = NewsStore(os.path.join(folder, 'news.db'))
+        store.store_articles(SAMPLE_FEED)
+
+        daily = store.daily_sentiment('MSFT', '2024-01-01', '2024-02-29')
+        print(daily[['articles', 'weighted_score', 'bullish']])
+        assert list(daily.index) == [pd.Timestamp('2024-01-05'), pd.Timestamp('2024-02-01')]
+        assert list(daily['articles']) == [1, 1] and list(daily['bullish']) == [1, 1]
+
+        rescored = news_item('https://c', '20240201T150000', "Microsoft cloud growth", "Azure revenue beats", ['MSFT'])
+        rescored['ticker_sentiment'][0].update(ticker_sentiment_score='-0.4', ticker_sentiment_label='Bearish')
+        store.store_articles([rescored])
+
+        summary = summarize(store.daily_sentiment('MSFT', '2024-01-01', '2024-02-29'))
+        print(f"Summary after rescoring: {summary}")
+        assert summary['articles'] == 2 and summary['bullish'] == 1 and summary['bearish'] == 1
+        assert abs(summary['weighted_score'] - (-0.1)) < 1e-9
+
+
+def test_meta_and_migration():
+    """Meta updates are read-modify-write; legacy CSV caches import with their sidecar"""
+    print("\n" + "=" * 60)
+    print("TESTING META AND CSV MIGRATION")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as folder:
+        store = NewsStore(os.path.join(folder, 'news.db'))
+        store.update_meta('AAPL', lambda meta: dict(meta, watermark='20240101T000000'))
+        store.update_meta('AAPL', lambda meta: dict(meta, fetched_at=1.0))
+        assert store.get_meta('AAPL') == {'watermark': '20240101T000000', 'fetched_at': 1.0}
+
+        csv_path = os.path.join(folder, 'TSLA_news.csv')
+        pd.DataFrame({
+            'Date': ['2024-03-01', '2024-03-02'], 'title': ['One', 'Two'],
+            'description': ['First', None], 'url': ['https://1', 'https://2'],
+            'source': ['Wire', 'Wire'], 'sentiment': ['Neutral', 'Bearish'], 'relevance': [0.3, 0.9]
+        }).to_csv(csv_path, index=False)
+
+        assert store.migrate_csv(csv_path, 'TSLA') == 2
+        migrated = store.articles_for('TSLA', '2024-03-01', '2024-03-02')
+        print(f"Migrated: {list(migrated['title'])}")
+        assert list(migrated['sentiment']) == ['Bearish', 'Neutral']
+        assert migrated['description'].iloc[0] == ''
+
+
+def main():
+    """Run all tests"""
+    test_store_and_fan_out()
+    test_date_range_and_search()
+    test_sentiment_rollup()
+    test_meta_and_migration()
+    print("\n✅ ALL NEWS STORE TESTS COMPLETED")
+
+
+if __name__ == "__main__":
+    main()
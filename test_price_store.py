@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Test script for the columnar price store
+Checks round-tripping, column selection, CSV migration, incremental
+appends with compaction, date coverage tracking and that readers keep a consistent view while the
+ticker is rewritten. Runs offline in a
+temporary directory.
+"""
+
+import sys
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+
+# Add the project root to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from agents.date_coverage import DateCoverage
+from agents.price_cache import PriceHistory
+from agents.price_store import PriceStore
+
+
+def sample_history(start='2024-01-01', days=10) -> PriceHistory:
+    dates = np.arange(np.datetime64(start), np.datetime64(start) + days)
+    prices = np.arange(days, dtype=np.float64) + 100
+    return PriceHistory(dates, prices, prices + 1, prices - 1, prices + 0.5, np.arange(days) * 1000)
+
+
+def test_round_trip_and_columns():
+    """Written columns come back memory-mapped and equal, optionally only some of them"""
+    print("=" * 60)
+    print("TESTING ROUND TRIP")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as folder:
+        store = PriceStore(folder)
+        history = sample_history()
+        store.write('AAPL', history)
+
+        loaded = store.read('AAPL')
+        assert len(loaded) == len(history)
+        assert (loaded.dates == history.dates).all()
+        assert (loaded.close == history.close).all()
+        assert (loaded.volume == history.volume).all()
+        assert loaded.row(loaded.index_of('2024-01-05'))['Close'] == 104.5
+
+        closes = store.read('AAPL', ['Date', 'Close'])
+        print(f"Full read: {loaded.nbytes} bytes, Date+Close read: {closes.nbytes} bytes")
+        assert closes.open is None and closes.nbytes < loaded.nbytes
+
+
+def test_rewrite_keeps_old_readers_valid():
+    """A reader mapped before a rewrite still sees the old generation intact"""
+    print("\n" + "=" * 60)
+    print("TESTING REWRITE")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as folder:
+        store = PriceStore(folder)
+        store.write('MSFT', sample_history(days=5))
+        before = store.read('MSFT')
+
+        store.write('MSFT', sample_history(days=8))
+        after = store.read('MSFT')
+
+        print(f"Rows before: {len(before)}, after: {len(after)}, files: {sorted(os.listdir(store.ticker_folder('MSFT')))}")
+        assert len(before) == 5 and before.close[-1] == 104.5
+        assert len(after) == 8
+
+
+def test_append_and_compact():
+    """Appends write only new or changed rows; compaction folds the tail back in"""
+    print("\n" + "=" * 60)
+    print("TESTING APPEND AND COMPACT")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as folder:
+        store = PriceStore(folder)
+        assert store.append('NVDA', sample_history(days=10)) == 10
+        assert store.append('NVDA', sample_history(days=10)) == 0
+
+        # Latest day only: stays sorted, no tail
+        assert store.append('NVDA', sample_history(start='2024-01-11', days=1)) == 1
+        meta = store.read_meta('NVDA')
+        assert meta['rows'] == meta['sorted_rows'] == 11 and meta['generation'] == 1
+
+        # Older, corrected rows go to the unsorted tail and win on read
+        corrected = sample_history(start='2023-12-30', days=4)
+        assert store.append('NVDA', corrected) == 4
+        meta = store.read_meta('NVDA')
+        loaded = store.read('NVDA')
+        print(f"Meta after out-of-order append: {meta}")
+        assert meta['rows'] == 15 and meta['sorted_rows'] == 11
+        assert len(loaded) == 13 and (np.diff(loaded.dates) > np.timedelta64(0, 'D')).all()
+        assert loaded.row(loaded.index_of('2024-01-02'))['Close'] == 103.5
+
+        assert store.compact('NVDA')
+        assert not store.compact('NVDA')
+        compacted = store.read('NVDA')
+        meta = store.read_meta('NVDA')
+        print(f"Meta after compaction: {meta}")
+        assert meta['rows'] == meta['sorted_rows'] == 13
+        assert (compacted.close == loaded.close).all()
+
+
+def test_coverage():
+    """Fetched ranges merge, survive compaction and report the remaining gaps"""
+    print("\n" + "=" * 60)
+    print("TESTING COVERAGE")
+    print("=" * 60)
+
+    coverage = DateCoverage([('2024-01-10', '2024-01-20'), ('2024-01-01', '2024-01-05')])
+    coverage.add('2024-01-06', '2024-01-08')
+    print(f"Coverage: {coverage}, gaps: {coverage.gaps('2023-12-30', '2024-01-25')}")
+    assert coverage.to_json() == [['2024-01-01', '2024-01-08'], ['2024-01-10', '2024-01-20']]
+    assert coverage.covers('2024-01-15') and not coverage.covers('2024-01-09')
+    assert [(str(s), str(e)) for s, e in coverage.gaps('2023-12-30', '2024-01-25')] == [
+        ('2023-12-30', '2023-12-31'), ('2024-01-09', '2024-01-09'), ('2024-01-21', '2024-01-25')
+    ]
+
+    with tempfile.TemporaryDirectory() as folder:
+        store = PriceStore(folder)
+        store.append('AMD', sample_history(days=5), covered=('2024-01-01', '2024-01-05'))
+        assert store.append('AMD', sample_history(days=5), covered=('2023-12-25', '2024-01-05')) == 0
+        store.append('AMD', sample_history(start='2023-12-25', days=3))
+        store.compact('AMD')
+        print(f"Stored coverage: {store.coverage('AMD')}")
+        assert store.coverage('AMD').to_json() == [['2023-12-25', '2024-01-05']]
+
+
+def test_csv_migration():
+    """Legacy CSV caches (newest first, possible duplicate dates) convert cleanly"""
+    print("\n" + "=" * 60)
+    print("TESTING CSV MIGRATION")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as folder:
+        csv_path = os.path.join(folder, 'TSLA_data.csv')
+        pd.DataFrame({
+            'Date': ['2024-01-03', '2024-01-02', '2024-01-02'],
+            'Open': [3.0, 2.0, 9.0], 'High': [3.0, 2.0, 9.0], 'Low': [3.0, 2.0, 9.0],
+            'Close': [3.5, 2.5, 9.5], 'Volume': [30, 20, 90]
+        }).to_csv(csv_path, index=False)
+
+        store = PriceStore(os.path.join(folder, 'prices'))
+        store.migrate_csv(csv_path, 'TSLA')
+        loaded = store.read('TSLA')
+
+        print(f"Migrated dates: {loaded.dates}")
+        assert list(loaded.close) == [2.5, 3.5]
+
+
+def main():
+    """Run all tests"""
+    test_round_trip_and_columns()
+    test_rewrite_keeps_old_readers_valid()
+    test_append_and_compact()
+    test_coverage()
+    test_csv_migration()
+    print("\n✅ ALL PRICE STORE TESTS COMPLETED")
+
+
+if __name__ == "__main__":
+    main()
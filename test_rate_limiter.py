@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Test script for the Alpha Vantage rate limiter
+Checks the token bucket, priority ordering, wait estimates and that the
+limit is shared between processes. Runs offline in a temporary directory.
+"""
+
+import sys
+import os
+import tempfile
+import threading
+import time
+from multiprocessing import Pool
+
+# Add the project root to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from agents.rate_limiter import BACKGROUND, INTERACTIVE, RateLimiter, RateLimitExceeded
+
+
+def test_bucket_capacity():
+    """A full bucket grants `per_minute` requests immediately, then waits"""
+    print("=" * 60)
+    print("TESTING TOKEN BUCKET")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as folder:
+        limiter = RateLimiter(os.path.join(folder, 'limit.json'), per_minute=60, per_day=1000)
+
+        started = time.monotonic()
+        for _ in range(60):
+            limiter.acquire()
+        burst = time.monotonic() - started
+
+        waited = limiter.acquire()
+        print(f"Burst of 60 took {burst:.3f}s, next request waited {waited:.3f}s")
+        assert burst < 0.5
+        assert waited > 0.5
+
+
+def test_priority_order():
+    """Queued interactive requests are served before queued background work"""
+    print("\n" + "=" * 60)
+    print("TESTING PRIORITY QUEUE")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as folder:
+        limiter = RateLimiter(os.path.join(folder, 'limit.json'), per_minute=60, per_day=1000)
+        for _ in range(60):
+            limiter.acquire()
+
+        order = []
+
+        def request(name, priority):
+            limiter.acquire(priority)
+            order.append(name)
+
+        threads = [threading.Thread(target=request, args=(f"background-{i}", BACKGROUND)) for i in range(2)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.2)
+
+        print(f"Estimated wait for an interactive request: {limiter.estimate_wait(INTERACTIVE):.2f}s")
+        print(f"Estimated wait for a background request: {limiter.estimate_wait(BACKGROUND):.2f}s")
+        assert limiter.estimate_wait(INTERACTIVE) < limiter.estimate_wait(BACKGROUND)
+
+        interactive = threading.Thread(target=request, args=("interactive", INTERACTIVE))
+        interactive.start()
+        for thread in threads + [interactive]:
+            thread.join()
+
+        print(f"Service order: {order}")
+        assert order.index("interactive") <= 1
+
+
+def test_max_wait_and_daily_quota():
+    """Requests fail fast with an estimated wait when quota is unavailable"""
+    print("\n" + "=" * 60)
+    print("TESTING MAX WAIT AND DAILY QUOTA")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as folder:
+        limiter = RateLimiter(os.path.join(folder, 'limit.json'), per_minute=2, per_day=3)
+        limiter.acquire()
+        limiter.acquire()
+
+        try:
+            limiter.acquire(max_wait=1)
+            assert False, "expected RateLimitExceeded"
+        except RateLimitExceeded as e:
+            print(f"Minute limit: {e}")
+            assert 1 < e.retry_after <= 30
+
+        limiter.penalize(daily=True)
+        try:
+            limiter.acquire(max_wait=60)
+            assert False, "expected RateLimitExceeded"
+        except RateLimitExceeded as e:
+            print(f"Daily limit: retry in {e.retry_after:.0f}s")
+            assert e.retry_after > 60 or limiter.seconds_until_reset() <= 60
+
+
+def take_tokens(state_path):
+    limiter = RateLimiter(state_path, per_minute=20, per_day=1000)
+    granted = 0
+    for _ in range(20):
+        try:
+            limiter.acquire(max_wait=0)
+            granted += 1
+        except RateLimitExceeded:
+            pass
+    return granted
+
+
+def test_shared_across_processes():
+    """Several processes share one bucket through the state file"""
+    print("\n" + "=" * 60)
+    print("TESTING CROSS-PROCESS LIMIT")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as folder:
+        state_path = os.path.join(folder, 'limit.json')
+        with Pool(4) as pool:
+            granted = pool.map(take_tokens, [state_path] * 4)
+
+        print(f"Granted per process: {granted} (total {sum(granted)}, bucket size 20)")
+        assert sum(granted) <= 21
+
+
+def main():
+    """Run all tests"""
+    test_bucket_capacity()
+    test_priority_order()
+    test_max_wait_and_daily_quota()
+    test_shared_across_processes()
+    print("\n✅ ALL RATE LIMITER TESTS COMPLETED")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Test script for per-connection session state
+Checks LRU and idle-TTL eviction, recent-ticker bookkeeping and that
+personality changes stay within one session. Runs offline.
+"""
+
+import sys
+import os
+import time
+
+# Add the project root to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from agents.session_store import RECENT_TICKERS, SessionState, SessionStore
+
+
+def test_eviction():
+    """Sessions beyond max_sessions or idle past the TTL are dropped"""
+    print("=" * 60)
+    print("TESTING SESSION EVICTION")
+    print("=" * 60)
+
+    store = SessionStore(max_sessions=3, ttl=3600)
+    first = store.get('a')
+    for sid in ['b', 'c', 'a', 'd']:
+        store.get(sid)
+    print(f"Stats after 4 sids with room for 3: {store.stats()}")
+    assert len(store) == 3 and store.stats()['evicted'] == 1
+    assert store.get('a') is first  # recently used, so 'b' went instead
+
+    store = SessionStore(ttl=0.05)
+    store.get('a')
+    time.sleep(0.1)
+    store.get('b')
+    assert len(store) == 1 and store.stats()['expired'] == 1
+
+    store.discard('b')
+    assert len(store) == 0
+
+
+def test_session_state():
+    """Each session keeps its own personality and most recent tickers"""
+    print("\n" + "=" * 60)
+    print("TESTING SESSION STATE")
+    print("=" * 60)
+
+    store = SessionStore()
+    alice, bob = store.get('alice'), store.get('bob')
+    alice.personality = "Peter Lynch"
+    assert bob.personality == SessionState().personality
+
+    for i in range(RECENT_TICKERS + 2):
+        alice.remember([f"T{i}"])
+    alice.remember(['T3'])
+    print(f"Recent tickers: {list(alice.recent_tickers)}")
+    assert len(alice.recent_tickers) == RECENT_TICKERS
+    assert alice.last_ticker == 'T3' and list(alice.recent_tickers).count('T3') == 1
+    assert bob.last_ticker is None
+
+
+def main():
+    """Run all tests"""
+    test_eviction()
+    test_session_state()
+    print("\n✅ ALL SESSION STORE TESTS COMPLETED")
+
+
+if __name__ == "__main__":
+    main()
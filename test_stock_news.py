@@ -149,27 +149,23 @@ def test_process_request():
         print("-" * 40)
 
 def test_cache_functionality():
-    """Test CSV cache functionality"""
+    """Test the SQLite news store"""
     print("\n" + "=" * 60)
     print("TESTING CACHE FUNCTIONALITY")
     print("=" * 60)
     
     agent = StockNewsAgent()
-    
-    # Check if cache files exist
-    cache_dir = agent.data_folder
-    print(f"Cache directory: {cache_dir}")
-    
-    if os.path.exists(cache_dir):
-        cache_files = [f for f in os.listdir(cache_dir) if f.endswith('_news.csv')]
-        print(f"Found {len(cache_files)} cache files:")
-        for file in cache_files:
-            file_path = os.path.join(cache_dir, file)
-            file_size = os.path.getsize(file_path)
-            mod_time = datetime.fromtimestamp(os.path.getmtime(file_path))
-            print(f"  - {file} ({file_size} bytes, modified: {mod_time})")
-    else:
-        print("Cache directory does not exist")
+    store = agent.news_store
+    print(f"News store: {store.path}")
+    
+    stats = store.stats()
+    print(f"Stored {stats['articles']} articles, {stats['mentions']} ticker mentions "
+          f"across {stats['tickers']} tickers ({stats['bytes']} bytes)")
+    for ticker in sorted(store.tickers()):
+        meta = store.get_meta(ticker)
+        fetched_at = meta.get('fetched_at')
+        fetched = datetime.fromtimestamp(fetched_at) if fetched_at else 'never'
+        print(f"  - {ticker}: {store.article_count(ticker)} articles (last fetched: {fetched})")
 
 def main():
     """Run all tests"""
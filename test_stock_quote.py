@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Test script for the Stock Quote Agent
+Checks that an expired stored quote is still answered, with a note, when
+Alpha Vantage is rate limited, that the limit is only reported when
+nothing is stored, and that the latest session's bar only stays fresh
+once it was fetched after the close. Runs offline in a temporary directory.
+"""
+
+import sys
+import os
+import tempfile
+import time
+import numpy as np
+
+# Add the project root to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from agents.cache_policy import FRESH
+from agents.market_calendar import nyse_calendar
+from agents.price_cache import PriceHistory
+from agents.price_store import PriceStore
+from agents.rate_limiter import RateLimitExceeded
+from agents.stock_quote_agent import StockQuoteAgent
+
+
+def rate_limited(*args, **kwargs):
+    raise RateLimitExceeded(30)
+
+
+def test_expired_quote_when_rate_limited():
+    """A rate-limited refresh falls back to the stored (expired) quote"""
+    print("=" * 60)
+    print("TESTING EXPIRED QUOTE UNDER RATE LIMIT")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as folder:
+        agent = StockQuoteAgent()
+        agent.price_store = PriceStore(os.path.join(folder, 'prices'))
+        agent.fetch_time_series = rate_limited
+
+        # Old rows, never stamped with a fetch time, are EXPIRED
+        dates = np.arange(np.datetime64('2024-01-02'), np.datetime64('2024-01-06'))
+        prices = np.array([100.0, 101.0, 102.0, 103.0])
+        agent.price_store.write('QTST', PriceHistory(dates, prices, prices + 1, prices - 1, prices, np.full(4, 1000)))
+
+        quote = agent.get_current_data('QTST')
+        print(quote)
+        assert 'Close: $103.00' in quote and '2024-01-05' in quote and 'rate limit' in quote
+
+        try:
+            agent.get_current_data('QNONE')
+            assert False, "expected RateLimitExceeded with nothing stored"
+        except RateLimitExceeded:
+            pass
+
+
+def test_partial_bar_is_not_final():
+    """A bar for the last session fetched before its close is refreshed like any other quote"""
+    print("\n" + "=" * 60)
+    print("TESTING BAR FETCHED BEFORE THE CLOSE")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as folder:
+        agent = StockQuoteAgent()
+        agent.price_store = PriceStore(os.path.join(folder, 'prices'))
+        last_session = nyse_calendar.last_completed_session()
+        dates = np.array([last_session], dtype='datetime64[D]')
+        prices = np.array([100.0])
+        history = PriceHistory(dates, prices, prices + 1, prices - 1, prices, np.array([1000]))
+
+        # Fetched an hour into the session: a partial bar, long past its TTL
+        agent.price_store.fetched_at = lambda ticker: nyse_calendar.session_open(last_session).timestamp() + 3600
+        partial = agent.quote_freshness('QTST', history)
+
+        agent.price_store.fetched_at = lambda ticker: time.time()
+        final = agent.quote_freshness('QTST', history)
+
+        print(f"Fetched mid-session: {partial}, fetched after the close: {final}")
+        assert partial != FRESH and final == FRESH
+
+
+def main():
+    """Run all tests"""
+    test_expired_quote_when_rate_limited()
+    test_partial_bar_is_not_final()
+    print("\n✅ ALL STOCK QUOTE TESTS COMPLETED")
+
+
+if __name__ == "__main__":
+    main()